@@ -0,0 +1,5 @@
+from nq_precision.collector import main
+
+
+if __name__ == "__main__":
+    main()
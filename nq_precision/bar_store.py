@@ -0,0 +1,184 @@
+"""Local Parquet bar store: <root>/<symbol>/<interval>/<YYYY-MM-DD>.parquet (ET dates), appended incrementally.
+
+Readers get whatever is on disk; `sync` fetches only what is missing — bars after the last stored one, plus a
+one-off backfill when a caller asks further back than the store reaches.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+STORE_TZ = "America/New_York"
+
+
+def _safe_name(value):
+    return re.sub(r"[^A-Za-z0-9._=-]", "_", str(value))
+
+
+class BarStore:
+    def __init__(self, root, refresh_s=30.0):
+        self.root = root
+        self.refresh_s = float(refresh_s)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._partitions = {}
+        self.stats = {"syncs": 0, "fetches": 0, "failed_ranges": 0, "bars_fetched": 0, "bars_written": 0, "reads": 0}
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, _safe_name(symbol), _safe_name(interval))
+
+    def _lock(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _manifest_path(self, symbol, interval):
+        return os.path.join(self._dir(symbol, interval), "_manifest.json")
+
+    def manifest(self, symbol, interval):
+        try:
+            with open(self._manifest_path(symbol, interval)) as fh:
+                return json.load(fh)
+        except Exception:
+            return {}
+
+    def _write_atomic(self, path, write):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp)
+        os.replace(tmp, path)
+
+    def _save_manifest(self, symbol, interval, manifest):
+        def write(tmp):
+            with open(tmp, "w") as fh:
+                json.dump(manifest, fh)
+
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        self._write_atomic(self._manifest_path(symbol, interval), write)
+
+    def _read_partition(self, path):
+        # Parsed partitions are kept per (path, mtime), so unchanged days are never re-read.
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._partitions.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        frame = pd.read_parquet(path)
+        if len(self._partitions) >= 4096:
+            self._partitions.clear()
+        self._partitions[path] = (mtime, frame)
+        return frame
+
+    def write(self, symbol, interval, bars):
+        """Merge bars into their date partitions; later bars replace stored ones with the same timestamp."""
+        if bars is None or bars.empty:
+            return 0
+        bars = bars[[c for c in BAR_COLUMNS if c in bars.columns]].dropna(subset=["Open", "High", "Low", "Close"])
+        if bars.empty:
+            return 0
+        if bars.index.tz is None:
+            bars = bars.tz_localize("UTC")
+        bars = bars.tz_convert(STORE_TZ)
+        folder = self._dir(symbol, interval)
+        os.makedirs(folder, exist_ok=True)
+        written = 0
+        for day, part in bars.groupby(bars.index.date):
+            path = os.path.join(folder, f"{day.isoformat()}.parquet")
+            existing = self._read_partition(path)
+            if existing is not None and not existing.empty:
+                part = pd.concat([existing, part])
+                part = part[~part.index.duplicated(keep="last")]
+            part = part.sort_index()
+            self._write_atomic(path, part.to_parquet)
+            self._partitions[path] = (os.stat(path).st_mtime_ns, part)
+            written += len(part)
+        self.stats["bars_written"] += written
+        return written
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Stored bars (ET index) with start <= ts <= end; partitions outside the window are not opened."""
+        self.stats["reads"] += 1
+        folder = self._dir(symbol, interval)
+        try:
+            names = sorted(n for n in os.listdir(folder) if n.endswith(".parquet"))
+        except OSError:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        start_day = start.tz_convert(STORE_TZ).date().isoformat() if start is not None else None
+        end_day = end.tz_convert(STORE_TZ).date().isoformat() if end is not None else None
+        frames = []
+        for name in names:
+            day = name[: -len(".parquet")]
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            frame = self._read_partition(os.path.join(folder, name))
+            if frame is not None and not frame.empty:
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        bars = pd.concat(frames).sort_index()
+        if start is not None:
+            bars = bars[bars.index >= start]
+        if end is not None:
+            bars = bars[bars.index <= end]
+        return bars.copy()
+
+    def sync(self, symbol, interval, start, fetch_fn, force=False, refresh_s=None):
+        """Bring [start, now] up to date via `fetch_fn(symbol, interval, start, end) -> (DataFrame, failed)`, where
+        `failed` lists the (start, end) sub-ranges the provider did not deliver.
+
+        Tail fetches restart at the last stored bar (it may have been partial). A backfill before the stored range
+        runs once per requested start, so history the provider no longer serves is not re-requested every sync.
+        The manifest only advances over ranges that arrived whole, so failed ones are asked for again next sync.
+        """
+        with self._lock(symbol, interval):
+            manifest = self.manifest(symbol, interval)
+            now = pd.Timestamp.now(tz=STORE_TZ)
+            start = pd.Timestamp(start).tz_convert(STORE_TZ)
+            covered_from = pd.Timestamp(manifest["covered_from_ms"], unit="ms", tz="UTC") if manifest else None
+            last_bar = pd.Timestamp(manifest["last_ms"], unit="ms", tz="UTC") if manifest.get("last_ms") else None
+            refresh_s = self.refresh_s if refresh_s is None else float(refresh_s)
+            synced_recently = bool(manifest) and time.time() - manifest.get("synced_at", 0) < refresh_s
+
+            ranges = []
+            if covered_from is None or start < covered_from:
+                ranges.append((start, covered_from or now, True))
+            if covered_from is not None and not (synced_recently and not force):
+                ranges.append((last_bar or covered_from, now, False))
+            if not ranges:
+                return 0
+
+            self.stats["syncs"] += 1
+            fetched = 0
+            covered = covered_from
+            for range_start, range_end, backfill in ranges:
+                self.stats["fetches"] += 1
+                bars, failed = fetch_fn(symbol, interval, range_start, range_end + timedelta(minutes=1))
+                self.stats["failed_ranges"] += len(failed)
+                # Whole from range_start up to the first failure, and from the last failure on to range_end.
+                whole_until = min((fail_start for fail_start, _ in failed), default=None)
+                whole_from = max((fail_end for _, fail_end in failed), default=range_start)
+                if bars is not None and not bars.empty:
+                    fetched += len(bars)
+                    self.write(symbol, interval, bars)
+                    settled = bars.index if whole_until is None else bars.index[bars.index < whole_until]
+                    if len(settled):
+                        bar_ms = int(settled.max().value // 10**6)
+                        manifest["last_ms"] = max(manifest.get("last_ms") or 0, bar_ms)
+                if backfill:
+                    covered = whole_from if covered is None else min(covered, whole_from)
+            manifest["covered_from_ms"] = int(covered.value // 10**6)
+            manifest["synced_at"] = time.time()
+            self._save_manifest(symbol, interval, manifest)
+            self.stats["bars_fetched"] += fetched
+            return fetched
+
+    def bars(self, symbol, interval, start, fetch_fn, end=None, refresh_s=None):
+        self.sync(symbol, interval, start, fetch_fn, refresh_s=refresh_s)
+        return self.read(symbol, interval, start=pd.Timestamp(start).tz_convert(STORE_TZ), end=end)
@@ -0,0 +1,137 @@
+"""Option-chain snapshot with a fingerprint computed once at fetch time, plus the compact storage schema."""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+
+FINGERPRINT_COLUMNS = [
+    "strike",
+    "type",
+    "expiration",
+    "open_interest",
+    "volume",
+    "iv",
+    "bid",
+    "ask",
+    "delta",
+    "gamma",
+]
+
+
+# Storage schema: anything cached or kept in session state is compacted, and expanded back on read.
+CATEGORICAL_COLUMNS = ("type", "source")
+SYMBOL_COLUMNS = ("option",)
+COUNT_COLUMNS = ("open_interest", "volume")
+EXACT_COLUMNS = ("strike",)
+EXPIRATION_DAY_COLUMN = "expiration_day"
+LEVEL_FRAME_KEYS = ("df", "calls", "puts")
+
+
+def _is_compact_expiration(col):
+    if not pd.api.types.is_datetime64_dtype(col.dtype) or col.isna().any():
+        return False
+    return bool((col == col.dt.normalize()).all())
+
+
+def compact_chain(df):
+    """Categorical type/source, Arrow-backed symbols, float32 quotes/greeks, int32 OI/volume, int day-index expiries.
+
+    Strikes stay float64 so level strikes round-trip exactly. `expand_chain` restores the working schema.
+    """
+    if df is None or EXPIRATION_DAY_COLUMN in df.columns:
+        return df
+    out = {}
+    for name in df.columns:
+        col = df[name]
+        if name in CATEGORICAL_COLUMNS and col.dtype == object:
+            out[name] = col.astype("category")
+        elif name in SYMBOL_COLUMNS and col.dtype == object:
+            out[name] = col.astype("string[pyarrow]")
+        elif name == "expiration" and _is_compact_expiration(col):
+            days = col.to_numpy().astype("datetime64[D]").astype(np.int64)
+            out[EXPIRATION_DAY_COLUMN] = pd.Series(days.astype(np.int32), index=df.index)
+        elif name in EXACT_COLUMNS or not pd.api.types.is_float_dtype(col.dtype):
+            out[name] = col
+        elif name in COUNT_COLUMNS and col.notna().all() and (col == np.round(col)).all() and col.abs().max() < 2**31:
+            out[name] = col.astype(np.int32)
+        else:
+            out[name] = col.astype(np.float32)
+    return pd.DataFrame(out, index=df.index)
+
+
+def expand_chain(df):
+    """Working schema for a `compact_chain` frame (object strings, float64, datetime64 expiration)."""
+    if df is None or EXPIRATION_DAY_COLUMN not in df.columns:
+        return df
+    out = {}
+    for name in df.columns:
+        col = df[name]
+        if name == EXPIRATION_DAY_COLUMN:
+            out["expiration"] = pd.Series(col.to_numpy().astype("datetime64[D]").astype("datetime64[ns]"), index=df.index)
+        elif isinstance(col.dtype, pd.CategoricalDtype) or isinstance(col.dtype, pd.StringDtype):
+            out[name] = col.astype(object)
+        elif name in COUNT_COLUMNS or col.dtype == np.float32:
+            out[name] = col.astype(np.float64)
+        else:
+            out[name] = col
+    return pd.DataFrame(out, index=df.index)
+
+
+def _map_level_frames(payload, convert):
+    if not payload:
+        return payload
+    out = dict(payload)
+    for key in LEVEL_FRAME_KEYS:
+        if isinstance(out.get(key), pd.DataFrame):
+            out[key] = convert(out[key])
+    return out
+
+
+def compact_level_payload(payload):
+    return _map_level_frames(payload, compact_chain)
+
+
+def expand_level_payload(payload):
+    return _map_level_frames(payload, expand_chain)
+
+
+def _chain_checksum(df):
+    cols = [c for c in FINGERPRINT_COLUMNS if c in df.columns]
+    if df.empty or not cols:
+        return 0
+    return int(pd.util.hash_pandas_object(df[cols], index=False).sum())
+
+
+class ChainSnapshot:
+    """Chain frame + spot + provenance. Cache keys use `fingerprint`, never the frame."""
+
+    __slots__ = ("df", "spot", "source", "asof_ms", "rows", "checksum", "fingerprint")
+
+    def __init__(self, df, spot, source, asof_ms=None):
+        self.df = df
+        self.spot = spot
+        self.source = source
+        self.asof_ms = int(asof_ms if asof_ms is not None else time.time() * 1000)
+        self.rows = int(len(df))
+        self.checksum = _chain_checksum(df)
+        self.fingerprint = f"{source}:{self.asof_ms}:{self.rows}:{self.checksum:016x}"
+
+    def __getstate__(self):
+        # Pickled form (what st.cache_data stores) carries the compact frame; the fingerprint is kept as computed.
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["df"] = compact_chain(self.df)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.df = expand_chain(self.df)
+
+    def __repr__(self):
+        return f"ChainSnapshot({self.fingerprint})"
+
+
+def snapshot_fingerprint(snapshot):
+    return snapshot.fingerprint
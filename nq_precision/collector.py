@@ -0,0 +1,99 @@
+"""Standalone collector: polls providers on their own schedules and writes snapshots the app only reads.
+
+Run next to the app with `python collector.py` (COLLECTOR_DB_PATH in secrets, or --db). The app serves a
+getter from the store while its snapshot is fresh and falls back to fetching itself otherwise.
+"""
+
+import argparse
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nq_precision import full_data as fd
+from nq_precision.snapshot_store import SnapshotStore
+
+
+log = logging.getLogger("nq_precision.collector")
+
+
+def collector_jobs(finnhub_key):
+    """(getter, args, kwargs, interval_s). Args mirror the app's own calls so snapshot keys line up."""
+    return [
+        (fd.get_nq_price_auto, (finnhub_key,), {}, 5),
+        (fd.get_qqq_price_with_source, (finnhub_key,), {}, 5),
+        (fd.get_nq_intraday_data, (), {}, 10),
+        (fd.get_market_overview_yahoo, (), {}, 15),
+        *[(fd.get_futures_price, (symbol,), {}, 10) for symbol in ("ES=F", "NQ=F", "RTY=F", "YM=F")],
+        (fd.get_options_snapshot, ("QQQ",), {}, 60),
+        (fd.get_futures_opening_structure, ("NQ=F",), {}, 20),
+        (fd.get_futures_reference_levels, ("NQ=F", finnhub_key), {}, 30),
+        (fd.get_futures_breadth_internals, (), {}, 45),
+        (fd.get_economic_calendar_window, (finnhub_key,), {"days": 1}, 60),
+        (fd.get_economic_calendar_window, (finnhub_key,), {"days": 2}, 60),
+        (fd.get_event_risk_snapshot, (finnhub_key, 24), {}, 20),
+        (fd.get_rss_news, (finnhub_key,), {}, 30),
+    ]
+
+
+def _usable(getter, value):
+    # Failure values stay out of the store so the app falls back to its own fetch instead of serving them.
+    # Same per-dataset check the app's SWR layer uses to keep a failed refresh from replacing data.
+    return (getattr(getter, "usable", None) or fd.usable_result)(value)
+
+
+def _run_job(store, key, getter, args, kwargs, interval_s):
+    fetch = inspect.unwrap(getter)
+    started = time.perf_counter()
+    try:
+        value = fetch(*args, **kwargs)
+    except Exception:
+        log.exception("collector job %s failed", key)
+        return
+    elapsed = time.perf_counter() - started
+    if _usable(getter, value):
+        # Three missed polls before the app stops trusting a snapshot.
+        store.put(key, value, max_age_s=3 * interval_s, elapsed_s=elapsed)
+    store.put(fd.COLLECTOR_META_KEY, fd.get_meta_snapshot(), max_age_s=3600)
+    log.debug("collector job %s: %.0f ms", key, elapsed * 1000)
+
+
+def run_collector(db_path=None, once=False, workers=8, stop_event=None):
+    db_path = db_path or fd._get_secret("COLLECTOR_DB_PATH", "")
+    if not db_path:
+        raise SystemExit("Set COLLECTOR_DB_PATH in secrets or pass --db.")
+    store = SnapshotStore(db_path)
+    jobs = {}
+    for getter, args, kwargs, interval_s in collector_jobs(fd._get_secret("FINNHUB_KEY", "")):
+        jobs[fd.collector_key(getter, args, kwargs)] = (getter, args, kwargs, interval_s)
+    log.info("collector writing %d jobs to %s", len(jobs), db_path)
+
+    stop_event = stop_event or threading.Event()
+    next_due = {key: 0.0 for key in jobs}
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collector") as pool:
+        while not stop_event.is_set():
+            now = time.monotonic()
+            for key, (getter, args, kwargs, interval_s) in jobs.items():
+                # A slow provider only delays its own next poll, never anyone else's.
+                if now < next_due[key] or (key in running and not running[key].done()):
+                    continue
+                next_due[key] = now + interval_s
+                running[key] = pool.submit(_run_job, store, key, getter, args, kwargs, interval_s)
+            if once:
+                for future in running.values():
+                    future.result()
+                return store
+            stop_event.wait(0.25)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Poll market data into the snapshot store the app reads.")
+    parser.add_argument("--db", default=None, help="SQLite path (defaults to COLLECTOR_DB_PATH).")
+    parser.add_argument("--once", action="store_true", help="Run every job once and exit.")
+    parser.add_argument("--workers", type=int, default=8)
+    opts = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run_collector(db_path=opts.db, once=opts.once, workers=opts.workers)
@@ -0,0 +1,124 @@
+"""Concurrent fetch engine: independent blocking fetches run at once, each under its own deadline."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+class SourceResult:
+    """Outcome of one source: value (or its default), wall time, and why it failed if it did."""
+
+    __slots__ = ("name", "value", "elapsed_s", "error", "timed_out")
+
+    def __init__(self, name, value, elapsed_s, error=None, timed_out=False):
+        self.name = name
+        self.value = value
+        self.elapsed_s = elapsed_s
+        self.error = error
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return self.error is None and not self.timed_out
+
+    def __repr__(self):
+        state = "timeout" if self.timed_out else ("error" if self.error else "ok")
+        return f"SourceResult({self.name}, {state}, {self.elapsed_s * 1000:.0f} ms)"
+
+
+class DataBundle:
+    """Per-rerun market data gathered in one concurrent pass. Missing sources hold their getter's failure value."""
+
+    __slots__ = (
+        "qqq_quote",
+        "nq_quote",
+        "nq_session_open",
+        "options_snapshot",
+        "market_data",
+        "event_risk",
+        "nq_intraday",
+        "results",
+        "elapsed_s",
+    )
+
+    def __init__(self, results, elapsed_s):
+        self.results = results
+        self.elapsed_s = elapsed_s
+        for name in self.__slots__:
+            if name not in ("results", "elapsed_s"):
+                result = results.get(name)
+                setattr(self, name, result.value if result is not None else None)
+
+    def timed_out(self, name):
+        result = self.results.get(name)
+        return result is not None and result.timed_out
+
+    def timings(self):
+        return {
+            name: {
+                "elapsed_s": round(result.elapsed_s, 3),
+                "timed_out": result.timed_out,
+                "error": None if result.error is None else str(result.error),
+            }
+            for name, result in self.results.items()
+        }
+
+    def __repr__(self):
+        return f"DataBundle({len(self.results)} sources, {self.elapsed_s * 1000:.0f} ms)"
+
+
+def _with_script_ctx(ctx, fn, args):
+    # Fresh threads per call: attach the caller's script context so st.cache_data / session_state work.
+    def _run():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    return _run
+
+
+async def gather_sources_async(specs, default_deadline_s=10.0):
+    """Run `specs` ({name: (fn, args, deadline_s, default)}) concurrently; returns {name: SourceResult}.
+
+    A source past its deadline yields its default; its thread is left to finish in the background
+    (so a slow provider still warms its cache for the next rerun) and never holds up the others.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = get_script_run_ctx(suppress_warning=True)
+    executor = ThreadPoolExecutor(max_workers=max(1, len(specs)), thread_name_prefix="fetch")
+
+    async def _one(name, fn, args, deadline_s, default):
+        started = time.perf_counter()
+        future = loop.run_in_executor(executor, _with_script_ctx(ctx, fn, args))
+        try:
+            value = await asyncio.wait_for(future, timeout=deadline_s)
+            return SourceResult(name, value, time.perf_counter() - started)
+        except asyncio.TimeoutError:
+            return SourceResult(name, default, time.perf_counter() - started, timed_out=True)
+        except Exception as e:
+            return SourceResult(name, default, time.perf_counter() - started, error=e)
+
+    try:
+        tasks = []
+        for name, spec in specs.items():
+            fn, args, deadline_s, default = spec
+            deadline_s = default_deadline_s if deadline_s is None else deadline_s
+            tasks.append(_one(name, fn, tuple(args or ()), deadline_s, default))
+        results = await asyncio.gather(*tasks)
+    finally:
+        executor.shutdown(wait=False)
+    return {result.name: result for result in results}
+
+
+def gather_sources(specs, default_deadline_s=10.0):
+    """Blocking entry point for script code (no running event loop)."""
+    return asyncio.run(gather_sources_async(specs, default_deadline_s=default_deadline_s))
+
+
+def gather_bundle(specs, default_deadline_s=10.0):
+    started = time.perf_counter()
+    results = gather_sources(specs, default_deadline_s=default_deadline_s)
+    return DataBundle(results, time.perf_counter() - started)
@@ -1,5 +1,14 @@
+import functools
+import inspect
+import multiprocessing
+import os
+import pickle
 import re
+import tempfile
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone, timedelta, time as dt_time
 import math
 import io
@@ -7,17 +16,52 @@ from zoneinfo import ZoneInfo
 from urllib.parse import parse_qs, unquote, urlparse
 
 import feedparser
-import finnhub
+import numpy as np
 import pandas as pd
-import requests
 import streamlit as st
 import yfinance as yf
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from bs4 import BeautifulSoup
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from nq_precision.bar_store import BarStore
+from nq_precision.chain_snapshot import (
+    ChainSnapshot,
+    compact_level_payload,
+    expand_level_payload,
+    snapshot_fingerprint,
+)
+from nq_precision.fetch_bundle import gather_bundle
+from nq_precision.gamma_profile import contract_arrays, gamma_profile
+from nq_precision.http_pool import finnhub_client, get_http_pool_stats, http_get, http_post, provider_timeout
+from nq_precision.level_engine import (
+    compute_expiration_levels,
+    expiration_books,
+    first_zero_crossing,
+    levels_for_chain,
+    signed_delta,
+    strike_delta_notional,
+    zero_crossings,
+)
+from nq_precision.meta_store import MetaStore
+from nq_precision.provider_health import get_provider_health, guarded_call
+from nq_precision.reference_prices import ReferenceTable
+from nq_precision.resample import RESAMPLE_RULES, ResampleMemo
+from nq_precision.schwab_stream import SchwabStreamer
+from nq_precision.single_flight import get_single_flight_stats, single_flight
+from nq_precision.snapshot_store import SnapshotStore
+from nq_precision.swr_cache import clear_swr_caches, get_swr_stats, swr_cache
+from nq_precision.token_store import TokenStore
+
 
 SCHWAB_TOKEN_URL = "https://api.schwabapi.com/v1/oauth/token"
 SCHWAB_QUOTES_URL = "https://api.schwabapi.com/marketdata/v1/quotes"
 SCHWAB_OPTION_CHAIN_URL = "https://api.schwabapi.com/marketdata/v1/chains"
+OCC_SYMBOL_PATTERN = r"^(?P<root>.+)(?P<exp>\d{6})(?P<cp>[PC])(?P<strike>\d+)$"
 FUTURES_MONTH_CODES = {
     1: "F",
     2: "G",
@@ -56,17 +100,32 @@ def _get_secret(name, default=""):
         return default
 
 
+_META_STORE = None
+_META_STORE_LOCK = threading.Lock()
+
+
+def _meta_store():
+    # Shared by every session, so a cache hit in one session reports the freshness another session fetched.
+    global _META_STORE
+    with _META_STORE_LOCK:
+        if _META_STORE is None:
+            _META_STORE = MetaStore(
+                shm_name=_get_secret("META_STORE_SHM_NAME", "") or None,
+                shm_writer=str(_get_secret("META_STORE_SHM_WRITER", "")).lower() in ("1", "true", "yes"),
+            )
+        return _META_STORE
+
+
 def _set_quote_meta(symbol, source, timestamp_ms=None):
-    if timestamp_ms is None:
-        timestamp_ms = int(time.time() * 1000)
-    st.session_state[f"quote_meta::{symbol}"] = {
-        "source": source,
-        "timestamp_ms": int(timestamp_ms),
-    }
+    _meta_store().record(f"quote:{symbol}", source, timestamp_ms)
+
+
+def get_quote_meta(symbol):
+    return _meta_store().get(f"quote:{symbol}") or {}
 
 
 def get_quote_age_seconds(symbol):
-    meta = st.session_state.get(f"quote_meta::{symbol}", {})
+    meta = get_quote_meta(symbol)
     ts = meta.get("timestamp_ms")
     if not ts:
         return None
@@ -92,19 +151,112 @@ def _utc_iso_from_ms(timestamp_ms):
         return None
 
 
-def _set_dataset_meta(dataset_key, source, timestamp_ms=None, max_age_sec=180):
+def _set_dataset_meta(dataset_key, source, timestamp_ms=None, max_age_sec=180, **extra):
     if timestamp_ms is None:
         timestamp_ms = int(time.time() * 1000)
-    st.session_state[f"dataset_meta::{dataset_key}"] = {
-        "source": source,
-        "timestamp_ms": int(timestamp_ms),
-        "asof_utc": _utc_iso_from_ms(timestamp_ms),
-        "max_age_sec": int(max_age_sec),
-    }
+    _meta_store().record(
+        f"dataset:{dataset_key}",
+        source,
+        timestamp_ms,
+        asof_utc=_utc_iso_from_ms(timestamp_ms),
+        max_age_sec=int(max_age_sec),
+        **extra,
+    )
+
+
+def _record_swr_refresh(name, mode, elapsed_s, max_stale):
+    _set_dataset_meta(f"swr:{name}", mode, max_age_sec=int(max_stale), refresh_ms=round(elapsed_s * 1000, 1))
+
+
+def usable_result(value):
+    """False for a getter's failure value: None, (None | 0, source), or an empty frame/dict/list."""
+    if value is None:
+        return False
+    if isinstance(value, tuple):
+        first = value[0] if value else None
+        return first is not None and not (isinstance(first, (int, float)) and first == 0)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return not value.empty
+    if isinstance(value, (dict, list)):
+        return bool(value)
+    return True
+
+
+def _swr_cached(ttl, max_stale, usable=usable_result):
+    # Serves the last good value past `ttl` while one background refresh runs; blocks only past `max_stale`.
+    return swr_cache(ttl=ttl, max_stale=max_stale, on_refresh=_record_swr_refresh, usable=usable)
+
+
+def get_meta_snapshot():
+    return _meta_store().snapshot()
+
+
+COLLECTOR_META_KEY = "__meta__"
+_COLLECTOR_IGNORED_ARGS = ("finnhub_key", "_finnhub_key")
+_COLLECTOR_STORE = None
+_COLLECTOR_STORE_LOCK = threading.Lock()
+_COLLECTOR_META_ASOF = None
+
+
+def collector_store():
+    """Snapshot store shared with the collector process (COLLECTOR_DB_PATH), or None when not configured."""
+    global _COLLECTOR_STORE
+    with _COLLECTOR_STORE_LOCK:
+        if _COLLECTOR_STORE is None:
+            path = _get_secret("COLLECTOR_DB_PATH", "")
+            _COLLECTOR_STORE = SnapshotStore(path) if path else False
+        return _COLLECTOR_STORE or None
+
+
+@functools.lru_cache(maxsize=None)
+def _getter_signature(fn):
+    return inspect.signature(inspect.unwrap(fn))
+
+
+def collector_key(fn, args=(), kwargs=None):
+    # API keys don't change the data, so the app and collector agree on keys whatever key each holds.
+    bound = _getter_signature(fn).bind(*args, **(kwargs or {}))
+    bound.apply_defaults()
+    parts = [f"{k}={v!r}" for k, v in bound.arguments.items() if k not in _COLLECTOR_IGNORED_ARGS]
+    return f"{fn.__name__}({', '.join(parts)})"
+
+
+# Concurrent misses from different sessions share one fetch; keyed like the collector, so API keys don't split them.
+_coalesced = single_flight(key_fn=collector_key)
+
+
+def _merge_collector_meta(store):
+    global _COLLECTOR_META_ASOF
+    asof = store.asof(COLLECTOR_META_KEY)
+    if asof is None or asof == _COLLECTOR_META_ASOF:
+        return
+    hit = store.get(COLLECTOR_META_KEY, fresh_only=False)
+    if hit is not None:
+        _meta_store().merge(hit[0])
+        _COLLECTOR_META_ASOF = asof
+
+
+def _collected(fn):
+    """Serve the collector's snapshot while it is fresh; fall back to fetching in-process."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        store = collector_store()
+        if store is not None:
+            try:
+                hit = store.get(collector_key(wrapper, args, kwargs))
+                if hit is not None:
+                    _merge_collector_meta(store)
+                    return hit[0]
+            except Exception:
+                pass
+        return fn(*args, **kwargs)
+
+    return wrapper
 
 
 def get_dataset_meta(dataset_key):
-    meta = st.session_state.get(f"dataset_meta::{dataset_key}", {}) or {}
+    meta = _meta_store().get(f"dataset:{dataset_key}") or {}
     ts = meta.get("timestamp_ms")
     age_sec = None
     if ts:
@@ -114,6 +266,7 @@ def get_dataset_meta(dataset_key):
         "asof_utc": meta.get("asof_utc"),
         "timestamp_ms": ts,
         "latency_s": age_sec,
+        "lag_ms": meta.get("lag_ms"),
         "max_age_sec": int(meta.get("max_age_sec", 180)),
     }
 
@@ -222,17 +375,7 @@ def _candidate_schwab_symbols(futures_symbol):
     return deduped
 
 
-def _get_schwab_access_token(force_refresh=False):
-    static_token = _get_secret("SCHWAB_ACCESS_TOKEN")
-    if static_token and not force_refresh:
-        return static_token
-
-    now = time.time()
-    cached_token = st.session_state.get("schwab_access_token")
-    cached_exp = st.session_state.get("schwab_access_expires_at", 0)
-    if cached_token and now < (cached_exp - 30) and not force_refresh:
-        return cached_token
-
+def _refresh_schwab_access_token():
     app_key = _get_secret("SCHWAB_APP_KEY")
     app_secret = _get_secret("SCHWAB_APP_SECRET")
     refresh_token = _get_secret("SCHWAB_REFRESH_TOKEN")
@@ -240,7 +383,8 @@ def _get_schwab_access_token(force_refresh=False):
         return None
 
     try:
-        response = requests.post(
+        response = http_post(
+            "schwab",
             SCHWAB_TOKEN_URL,
             data={"grant_type": "refresh_token", "refresh_token": refresh_token},
             auth=(app_key, app_secret),
@@ -252,14 +396,39 @@ def _get_schwab_access_token(force_refresh=False):
         token = payload.get("access_token")
         if not token:
             return None
-        expires_in = int(payload.get("expires_in", 1800))
-        st.session_state["schwab_access_token"] = token
-        st.session_state["schwab_access_expires_at"] = now + expires_in
-        return token
+        return token, int(payload.get("expires_in", 1800))
     except Exception:
         return None
 
 
+_SCHWAB_TOKENS = None
+_SCHWAB_TOKENS_LOCK = threading.Lock()
+
+
+def _schwab_token_store():
+    # One store per process; SCHWAB_TOKEN_CACHE_PATH shares it with other processes (e.g. a collector).
+    global _SCHWAB_TOKENS
+    with _SCHWAB_TOKENS_LOCK:
+        if _SCHWAB_TOKENS is None:
+            _SCHWAB_TOKENS = TokenStore(
+                _refresh_schwab_access_token,
+                path=_get_secret("SCHWAB_TOKEN_CACHE_PATH", "") or None,
+                renew_before_s=float(_get_secret("SCHWAB_TOKEN_RENEW_BEFORE_SECONDS", 300)),
+            )
+        return _SCHWAB_TOKENS
+
+
+def _get_schwab_access_token(force_refresh=False, rejected=None):
+    static_token = _get_secret("SCHWAB_ACCESS_TOKEN")
+    if static_token and not force_refresh:
+        return static_token
+    return _schwab_token_store().get(force_refresh=force_refresh, rejected=rejected)
+
+
+def get_schwab_token_stats():
+    return _schwab_token_store().stats()
+
+
 def exchange_schwab_auth_code(auth_code, redirect_uri):
     app_key = _get_secret("SCHWAB_APP_KEY")
     app_secret = _get_secret("SCHWAB_APP_SECRET")
@@ -291,7 +460,8 @@ def exchange_schwab_auth_code(auth_code, redirect_uri):
         code_input = code_input.split("&", 1)[0].strip()
 
     try:
-        response = requests.post(
+        response = http_post(
+            "schwab",
             SCHWAB_TOKEN_URL,
             data={
                 "grant_type": "authorization_code",
@@ -408,19 +578,19 @@ def _get_schwab_quotes_with_status(symbols):
     if not token:
         return {}, "token_unavailable"
     try:
-        response = requests.get(
+        response = http_get(
+            "schwab",
             SCHWAB_QUOTES_URL,
             params={"symbols": ",".join(symbols), "fields": "quote"},
             headers={"Authorization": f"Bearer {token}"},
             timeout=10,
         )
         if response.status_code == 401:
-            st.session_state.pop("schwab_access_token", None)
-            st.session_state.pop("schwab_access_expires_at", None)
-            retry_token = _get_schwab_access_token(force_refresh=True)
+            retry_token = _get_schwab_access_token(force_refresh=True, rejected=token)
             if not retry_token:
                 return {}, "auth_401_refresh_failed"
-            response = requests.get(
+            response = http_get(
+                "schwab",
                 SCHWAB_QUOTES_URL,
                 params={"symbols": ",".join(symbols), "fields": "quote"},
                 headers={"Authorization": f"Bearer {retry_token}"},
@@ -440,12 +610,154 @@ def _get_schwab_quotes_with_status(symbols):
         return {}, "request_exception"
 
 
-def _get_schwab_futures_price(futures_symbol):
-    candidates = _candidate_schwab_symbols(futures_symbol)
-    quotes, quote_status = _get_schwab_quotes_with_status(candidates)
-    if not quotes:
-        return None, f"Schwab unavailable ({quote_status})"
+# One /quotes request covers every futures root on the board (all contract candidates) plus QQQ.
+SCHWAB_BOARD_FUTURES = ("NQ=F", "ES=F", "YM=F", "RTY=F", "DX=F", "GC=F", "CL=F")
+SCHWAB_BOARD_EQUITIES = ("QQQ",)
+
+
+def _schwab_board_symbols():
+    symbols = []
+    for futures_symbol in SCHWAB_BOARD_FUTURES:
+        symbols.extend(_candidate_schwab_symbols(futures_symbol))
+    symbols.extend(SCHWAB_BOARD_EQUITIES)
+    return tuple(dict.fromkeys(symbols))
 
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_schwab_board_quotes(symbols):
+    # Raw payload only; validators touch session state, so they run per caller on the shared payload.
+    return _get_schwab_quotes_with_status(list(symbols))
+
+
+SCHWAB_USER_PREFERENCE_URL = "https://api.schwabapi.com/trader/v1/userPreference"
+_SCHWAB_STREAMER = None
+_SCHWAB_STREAMER_LOCK = threading.Lock()
+
+
+def _schwab_streamer_info():
+    # SCHWAB_STREAMER_URL points at a local stand-in (nq_precision.stream_replay) and skips the account lookup.
+    override = _get_secret("SCHWAB_STREAMER_URL", "")
+    if override:
+        return {"streamerSocketUrl": override, "schwabClientCustomerId": "local", "schwabClientCorrelId": "local"}
+    token = _get_schwab_access_token()
+    if not token:
+        return None
+    try:
+        response = http_get(
+            "schwab", SCHWAB_USER_PREFERENCE_URL, headers={"Authorization": f"Bearer {token}"}, timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        info = response.json().get("streamerInfo") or []
+        return info[0] if info else None
+    except Exception:
+        return None
+
+
+def _schwab_stream_token():
+    if _get_secret("SCHWAB_STREAMER_URL", ""):
+        return _get_secret("SCHWAB_ACCESS_TOKEN", "") or "local"
+    return _get_schwab_access_token()
+
+
+def _schwab_stream_subscriptions():
+    # Streamer keys take two-digit contract years; root keys (e.g. /NQ) follow the front month.
+    futures = [s for s in _schwab_board_symbols() if s.startswith("/") and not re.search(r"\d{4}$", s)]
+    return {"LEVELONE_FUTURES": futures, "LEVELONE_EQUITIES": list(SCHWAB_BOARD_EQUITIES)}
+
+
+def schwab_streamer():
+    """Process-wide LEVELONE subscription, or None when streaming is off (SCHWAB_STREAMING / SCHWAB_STREAMER_URL)."""
+    global _SCHWAB_STREAMER
+    enabled = str(_get_secret("SCHWAB_STREAMING", "")).lower() in ("1", "true", "yes")
+    if not (enabled or _get_secret("SCHWAB_STREAMER_URL", "")):
+        return None
+    with _SCHWAB_STREAMER_LOCK:
+        if _SCHWAB_STREAMER is None:
+            _SCHWAB_STREAMER = SchwabStreamer(
+                _schwab_streamer_info, _schwab_stream_token, _schwab_stream_subscriptions()
+            )
+        _SCHWAB_STREAMER.start()
+        return _SCHWAB_STREAMER
+
+
+def _schwab_stream_quotes():
+    # Last ticks in the /quotes payload shape, so the board validators run unchanged.
+    streamer = schwab_streamer()
+    if streamer is None or not streamer.live:
+        return {}
+    quotes = {}
+    for symbol in streamer.table.symbols():
+        row = streamer.table.get(symbol)
+        price = row.get("last") or row.get("mark")
+        if not price:
+            continue
+        quotes[symbol] = {
+            "quote": {
+                "lastPrice": price,
+                "bidPrice": row.get("bid"),
+                "askPrice": row.get("ask"),
+                "quoteTime": row.get("trade_time_ms") or row.get("quote_time_ms") or row.get("recv_ms"),
+            }
+        }
+    return quotes
+
+
+def get_schwab_board_quotes():
+    streamed = _schwab_stream_quotes()
+    if streamed and all(_board_quote_subset(s, streamed) for s in (*SCHWAB_BOARD_FUTURES, *SCHWAB_BOARD_EQUITIES)):
+        return streamed, "stream"
+    quotes, status = _get_schwab_board_quotes(_schwab_board_symbols())
+    if streamed:
+        quotes = {**quotes, **streamed}
+    return quotes, status
+
+
+def get_schwab_stream_pair(futures_symbol="NQ=F", equity="QQQ"):
+    """NQ and QQQ from the stream as of one instant, for the ratio: ((fut_px, fut_src), (eq_px, eq_src), skew_s).
+
+    None when the stream is off, stale, or has no validated pair; callers keep their polled quotes then.
+    """
+    streamer = schwab_streamer()
+    if streamer is None or not streamer.live:
+        return None
+    for key in _candidate_schwab_symbols(futures_symbol):
+        synced = streamer.table.synced(key, equity)
+        if synced is None:
+            continue
+        _asof, (fut_ts, fut_px), (eq_ts, eq_px), skew_ms = synced
+        if not (_validate_price_range(futures_symbol, fut_px) and _validate_stale_quote(fut_ts)):
+            continue
+        if not (_validate_stale_quote(eq_ts) and _validate_jump(futures_symbol, fut_px) and _validate_jump(equity, eq_px)):
+            return None
+        fut_src, eq_src = f"Schwab Stream ({key})", f"Schwab Stream ({equity})"
+        _set_quote_meta(futures_symbol, fut_src, fut_ts)
+        _set_quote_meta(equity, eq_src, eq_ts)
+        return (float(fut_px), fut_src), (float(eq_px), eq_src), skew_ms / 1000.0
+    return None
+
+
+def get_schwab_stream_stats():
+    streamer = schwab_streamer()
+    if streamer is None:
+        return None
+    return {
+        "live": streamer.live,
+        "connects": streamer.connects,
+        "updates": streamer.table.updates,
+        "symbols": len(streamer.table.symbols()),
+        "last_error": streamer.last_error,
+    }
+
+
+def _board_quote_subset(symbol, quotes):
+    if symbol in SCHWAB_BOARD_EQUITIES:
+        return {k: v for k, v in quotes.items() if str(k).lstrip("/") == symbol}
+    root = re.sub(r"[FGHJKMNQUVXZ]\d{2,4}$", "", _map_futures_symbol(symbol)).lstrip("/")
+    return {k: v for k, v in quotes.items() if str(k).lstrip("/").startswith(root)}
+
+
+def _select_schwab_futures_quote(futures_symbol, candidates, quotes):
     lookup_keys = []
     for sym in candidates:
         lookup_keys.extend([sym, sym.lstrip("/")])
@@ -506,26 +818,80 @@ def _get_schwab_futures_price(futures_symbol):
     return None, f"Schwab unavailable ({detail})"
 
 
-def _get_yahoo_chart_price(symbol, min_price=0):
+def get_schwab_futures_board(symbols=SCHWAB_BOARD_FUTURES):
+    """{symbol: (price, source)} for board futures, validated from a single shared quote request."""
+    quotes, quote_status = get_schwab_board_quotes()
+    board = {}
+    for futures_symbol in symbols:
+        subset = _board_quote_subset(futures_symbol, quotes) if quotes else {}
+        if not subset:
+            board[futures_symbol] = (None, f"Schwab unavailable ({quote_status if not quotes else 'symbol_missing'})")
+            continue
+        board[futures_symbol] = _select_schwab_futures_quote(
+            futures_symbol, _candidate_schwab_symbols(futures_symbol), subset
+        )
+    return board
+
+
+def _get_schwab_futures_price(futures_symbol):
+    if futures_symbol in SCHWAB_BOARD_FUTURES:
+        return get_schwab_futures_board((futures_symbol,))[futures_symbol]
+
+    candidates = _candidate_schwab_symbols(futures_symbol)
+    quotes, quote_status = _get_schwab_quotes_with_status(candidates)
+    if not quotes:
+        return None, f"Schwab unavailable ({quote_status})"
+    return _select_schwab_futures_quote(futures_symbol, candidates, quotes)
+
+
+def _yahoo_chart_meta_price(symbol):
     try:
         url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=5)
+        response = http_get("yahoo", url)
         if response.status_code == 200:
-            data = response.json()
-            price = data["chart"]["result"][0]["meta"]["regularMarketPrice"]
-            if price and price > min_price:
-                _set_quote_meta(symbol, "Yahoo Finance")
-                return float(price)
+            price = response.json()["chart"]["result"][0]["meta"]["regularMarketPrice"]
+            return float(price) if price else None
     except Exception:
         pass
     return None
 
 
+def _get_yahoo_chart_price(symbol, min_price=0):
+    price = _yahoo_chart_meta_price(symbol)
+    if price and price > min_price:
+        _set_quote_meta(symbol, "Yahoo Finance")
+        return price
+    return None
+
+
+_REFERENCE_PRICES = None
+_REFERENCE_PRICES_LOCK = threading.Lock()
+
+
+def _reference_prices():
+    # Yahoo prints refreshed off the request path; quote meta is left alone since these never become the quote.
+    global _REFERENCE_PRICES
+    with _REFERENCE_PRICES_LOCK:
+        if _REFERENCE_PRICES is None:
+            _REFERENCE_PRICES = ReferenceTable(
+                _yahoo_chart_meta_price,
+                refresh_s=float(_get_secret("REFERENCE_REFRESH_SECONDS", 15)),
+                max_age_s=float(_get_secret("REFERENCE_MAX_AGE_SECONDS", 60)),
+            )
+        return _REFERENCE_PRICES
+
+
+def get_reference_price_stats():
+    return _reference_prices().stats()
+
+
 def _schwab_cross_source_check(yahoo_symbol, schwab_price):
-    yahoo_price = _get_yahoo_chart_price(yahoo_symbol, min_price=0)
-    if not yahoo_price:
+    # CROSS_SOURCE_REFERENCE = "median" compares against the median of recent prints instead of the latest one.
+    mode = str(_get_secret("CROSS_SOURCE_REFERENCE", "last")).lower()
+    reference = _reference_prices().get(yahoo_symbol, mode=mode)
+    if not reference:
         return True, None, None, None
+    yahoo_price = reference[0]
     allowed_dev_pct = float(_get_secret("MAX_CROSS_SOURCE_DEVIATION_PCT", 3.0))
     deviation = abs(schwab_price - yahoo_price) / yahoo_price * 100
     return deviation <= allowed_dev_pct, float(deviation), float(allowed_dev_pct), float(yahoo_price)
@@ -568,35 +934,55 @@ def get_runtime_health():
             )
     else:
         checks.append(("Schwab NQ quote path", False, str(nq_probe_source)))
+
+    reference = get_reference_price_stats()
+    if reference["symbols"]:
+        ages = ", ".join(f"{symbol} {age:.0f}s" for symbol, age in reference["symbols"].items())
+        max_age = float(_get_secret("REFERENCE_MAX_AGE_SECONDS", 60))
+        fresh = all(age <= max_age for age in reference["symbols"].values())
+        checks.append(("Cross-source reference prices", fresh, f"Yahoo prints aged {ages}"))
+
+    for row in get_provider_health():
+        latency = f"p50 {row['p50_ms']} ms / p95 {row['p95_ms']} ms" if row["p50_ms"] is not None else "no calls"
+        errors = f"{row['error_rate'] * 100:.0f}% errors" if row["error_rate"] is not None else ""
+        if row["state"] == "open":
+            detail = f"Circuit open, retry in {row['retry_in_s']:.0f}s ({errors}, {row['rejected']} calls skipped)"
+        elif row["state"] == "half_open":
+            detail = f"Circuit half-open, probing ({errors})"
+        else:
+            detail = f"OK, {latency}" + (f", {errors}" if row["error_rate"] else "")
+        checks.append((f"Provider {row['provider']}", row["state"] == "closed", detail))
     return checks
 
 
+def _parse_occ_symbols(symbols):
+    """Columnar OCC symbol parse (root + YYMMDD + C/P + strike*1000) -> strike/type/expiration."""
+    parts = symbols.astype(str).str.extract(OCC_SYMBOL_PATTERN)
+    expiration = pd.to_datetime("20" + parts["exp"], format="%Y%m%d", errors="coerce")
+    strike = pd.to_numeric(parts["strike"], errors="coerce") / 1000
+    option_type = parts["cp"].map({"C": "call", "P": "put"})
+    valid = expiration.notna() & strike.notna() & option_type.notna()
+    return pd.DataFrame(
+        {
+            "strike": strike.where(valid, 0.0),
+            "type": option_type.where(valid, "unknown"),
+            "expiration": expiration.where(valid),
+        },
+        index=symbols.index,
+    )
+
+
 def _fetch_cboe_options_raw(ticker="QQQ"):
     try:
         url = f"https://cdn.cboe.com/api/global/delayed_quotes/options/{ticker}.json"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_get("cboe", url)
         if response.status_code != 200:
             return None, None
         data = response.json()
         current_price = data["data"]["current_price"]
         options_raw = data["data"]["options"]
         df = pd.DataFrame(options_raw)
-        pattern = re.compile(r"^(.+)(\d{6})([PC])(\d+)$")
-
-        def parse_option(row):
-            match = pattern.search(row["option"])
-            if match:
-                exp_str = match.group(2)
-                option_type = "call" if match.group(3) == "C" else "put"
-                strike = int(match.group(4)) / 1000
-                exp_date = datetime.strptime("20" + exp_str, "%Y%m%d")
-                return pd.Series(
-                    {"strike": strike, "type": option_type, "expiration": exp_date}
-                )
-            return pd.Series({"strike": 0, "type": "unknown", "expiration": None})
-
-        parsed = df.apply(parse_option, axis=1)
+        parsed = _parse_occ_symbols(df["option"])
         df = pd.concat([df, parsed], axis=1)
         df = df[df["type"] != "unknown"].copy()
         _set_dataset_meta(
@@ -611,11 +997,22 @@ def _fetch_cboe_options_raw(ticker="QQQ"):
         return None, None
 
 
+def _decode_json(response):
+    # Chain payloads run to several MB; orjson decodes them several times faster when installed.
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
 def _parse_chain_expiration(exp_key):
     if not exp_key:
         return None
     try:
         exp_s = str(exp_key).split(":", 1)[0].strip()
+        try:
+            return datetime.fromisoformat(exp_s)
+        except ValueError:
+            pass
         exp_dt = pd.to_datetime(exp_s, errors="coerce")
         if pd.isna(exp_dt):
             return None
@@ -633,6 +1030,106 @@ def _safe_num(value, default=0.0):
         return float(default)
 
 
+# (column, Schwab contract field) in output order after option/strike/type/expiration.
+SCHWAB_CHAIN_FIELDS = (
+    ("open_interest", "openInterest"),
+    ("volume", "totalVolume"),
+    ("iv", "volatility"),
+    ("bid", "bid"),
+    ("ask", "ask"),
+    ("last", "last"),
+    ("mark", "mark"),
+    ("delta", "delta"),
+    ("gamma", "gamma"),
+    ("theta", "theta"),
+    ("vega", "vega"),
+)
+CHAIN_TYPES = np.array(["call", "put"], dtype=object)
+
+
+def _numeric_column(values, default=0.0):
+    """float64 column with `_safe_num` semantics; only falls back to per-value parsing on odd payloads."""
+    try:
+        col = np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        col = np.array([_safe_num(v, np.nan) for v in values], dtype=float)
+    col[np.isnan(col)] = default
+    return col
+
+
+def _parse_schwab_chain(payload, ticker):
+    """Columnar parse of a Schwab chain payload; None when it holds no contracts."""
+    contracts = []
+    type_codes = []
+    exp_codes = []
+    strike_keys = []
+    exp_keys = []
+    exp_values = []
+    maps = [payload.get("callExpDateMap", {}), payload.get("putExpDateMap", {})]
+
+    # One structural walk collects contract refs plus per-contract type/expiration codes.
+    for type_code, exp_map in enumerate(maps):
+        if not isinstance(exp_map, dict):
+            continue
+        for exp_key, strike_map in exp_map.items():
+            if not isinstance(strike_map, dict):
+                continue
+            exp_code = len(exp_values)
+            exp_keys.append(exp_key)
+            exp_values.append(_parse_chain_expiration(exp_key))
+            for strike_key, items in strike_map.items():
+                if isinstance(items, dict):
+                    items = [items]
+                if not isinstance(items, list):
+                    continue
+                items = [c for c in items if isinstance(c, dict)]
+                contracts.extend(items)
+                type_codes.extend([type_code] * len(items))
+                exp_codes.extend([exp_code] * len(items))
+                strike_keys.extend([strike_key] * len(items))
+
+    if not contracts:
+        return None
+
+    type_codes = np.array(type_codes, dtype=np.int8)
+    exp_codes = np.array(exp_codes, dtype=np.int32)
+    strike = _numeric_column([c.get("strikePrice") for c in contracts], np.nan)
+    missing = np.isnan(strike)
+    if missing.any():
+        strike[missing] = _numeric_column([strike_keys[i] for i in np.flatnonzero(missing)], 0.0)
+    keep = np.flatnonzero(strike > 0)
+    if len(keep) == 0:
+        return None
+    if len(keep) < len(contracts):
+        contracts = [contracts[i] for i in keep]
+        strike, type_codes, exp_codes = strike[keep], type_codes[keep], exp_codes[keep]
+
+    option = [c.get("symbol") or c.get("optionDeliverablesList") for c in contracts]
+    for i, symbol in enumerate(option):
+        if not symbol:
+            symbol = f"{ticker}_{exp_keys[exp_codes[i]]}_{CHAIN_TYPES[type_codes[i]]}_{strike[i]}"
+        option[i] = str(symbol)
+
+    exp_table = np.array(
+        [np.datetime64(v, "ns") if v is not None else np.datetime64("NaT", "ns") for v in exp_values]
+    )
+    columns = {
+        "option": np.array(option, dtype=object),
+        "strike": strike,
+        "type": CHAIN_TYPES[type_codes],
+        "expiration": exp_table[exp_codes],
+    }
+    for name, field in SCHWAB_CHAIN_FIELDS:
+        columns[name] = _numeric_column([c.get(field) for c in contracts])
+    iv = columns["iv"]
+    columns["iv"] = np.maximum(0.0, np.where(iv > 3.0, iv / 100.0, iv))
+    columns["source"] = np.full(len(contracts), "Schwab", dtype=object)
+
+    # copy=False keeps each typed array as its own block instead of consolidating.
+    df = pd.DataFrame(columns, copy=False)
+    return df[df["expiration"].notna()]
+
+
 def _fetch_schwab_options_raw(ticker="QQQ"):
     token = _get_schwab_access_token()
     if not token:
@@ -647,19 +1144,18 @@ def _fetch_schwab_options_raw(ticker="QQQ"):
         "strikeCount": 200,
     }
     try:
-        response = requests.get(
+        response = http_get(
+            "schwab",
             SCHWAB_OPTION_CHAIN_URL,
             params=params,
             headers={"Authorization": f"Bearer {token}"},
-            timeout=12,
         )
         if response.status_code == 401:
-            st.session_state.pop("schwab_access_token", None)
-            st.session_state.pop("schwab_access_expires_at", None)
+            _get_schwab_access_token(force_refresh=True, rejected=token)
             return None, None
         if response.status_code != 200:
             return None, None
-        payload = response.json()
+        payload = _decode_json(response)
         if not isinstance(payload, dict):
             return None, None
     except Exception:
@@ -672,71 +1168,9 @@ def _fetch_schwab_options_raw(ticker="QQQ"):
     if current_price <= 0:
         current_price = None
 
-    rows = []
-    maps = [
-        ("call", payload.get("callExpDateMap", {})),
-        ("put", payload.get("putExpDateMap", {})),
-    ]
-
-    for opt_type, exp_map in maps:
-        if not isinstance(exp_map, dict):
-            continue
-        for exp_key, strike_map in exp_map.items():
-            exp_dt = _parse_chain_expiration(exp_key)
-            if not isinstance(strike_map, dict):
-                continue
-            for strike_key, contracts in strike_map.items():
-                if isinstance(contracts, dict):
-                    contracts = [contracts]
-                if not isinstance(contracts, list):
-                    continue
-                for contract in contracts:
-                    if not isinstance(contract, dict):
-                        continue
-                    strike = _safe_num(contract.get("strikePrice"), _safe_num(strike_key, 0.0))
-                    if strike <= 0:
-                        continue
-                    iv = _safe_num(contract.get("volatility"), 0.0)
-                    if iv > 3.0:
-                        iv = iv / 100.0
-                    option_symbol = (
-                        contract.get("symbol")
-                        or contract.get("optionDeliverablesList")
-                        or f"{ticker}_{exp_key}_{opt_type}_{strike}"
-                    )
-                    rows.append(
-                        {
-                            "option": str(option_symbol),
-                            "strike": strike,
-                            "type": opt_type,
-                            "expiration": exp_dt,
-                            "open_interest": _safe_num(contract.get("openInterest"), 0.0),
-                            "volume": _safe_num(contract.get("totalVolume"), 0.0),
-                            "iv": max(0.0, iv),
-                            "bid": _safe_num(contract.get("bid"), 0.0),
-                            "ask": _safe_num(contract.get("ask"), 0.0),
-                            "last": _safe_num(contract.get("last"), 0.0),
-                            "mark": _safe_num(contract.get("mark"), 0.0),
-                            "delta": _safe_num(contract.get("delta"), 0.0),
-                            "gamma": _safe_num(contract.get("gamma"), 0.0),
-                            "theta": _safe_num(contract.get("theta"), 0.0),
-                            "vega": _safe_num(contract.get("vega"), 0.0),
-                            "source": "Schwab",
-                        }
-                    )
-
-    if not rows:
+    df = _parse_schwab_chain(payload, ticker)
+    if df is None:
         return None, None
-
-    df = pd.DataFrame(rows)
-    # Normalize key numeric columns expected by downstream logic.
-    for col in ["strike", "open_interest", "volume", "iv", "bid", "ask", "delta", "gamma"]:
-        if col not in df.columns:
-            df[col] = 0.0
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
-    if "expiration" not in df.columns:
-        return None, current_price
-    df = df[df["expiration"].notna()].copy()
     if df.empty:
         return None, current_price
 
@@ -749,20 +1183,39 @@ def _fetch_schwab_options_raw(ticker="QQQ"):
     return df, current_price
 
 
-def _fetch_options_raw(ticker="QQQ"):
+@_coalesced
+def _fetch_options_snapshot(ticker="QQQ"):
     # Primary: Schwab option chain (realtime for entitled accounts).
     if schwab_is_configured():
         df_s, px_s = _fetch_schwab_options_raw(ticker)
         if df_s is not None and not df_s.empty:
-            return df_s, px_s
+            return ChainSnapshot(df_s, px_s, "Schwab options chain")
 
     # Fallback: CBOE delayed chain.
-    return _fetch_cboe_options_raw(ticker)
+    df_c, px_c = _fetch_cboe_options_raw(ticker)
+    if df_c is None:
+        return None
+    return ChainSnapshot(df_c, px_c, "CBOE")
+
+
+def _fetch_options_raw(ticker="QQQ"):
+    snapshot = _fetch_options_snapshot(ticker)
+    if snapshot is None:
+        return None, None
+    return snapshot.df, snapshot.spot
+
+
+@_collected
+@_swr_cached(ttl=120, max_stale=300)
+def get_options_snapshot(ticker="QQQ"):
+    return _fetch_options_snapshot(ticker)
 
 
-@st.cache_data(ttl=120)
 def get_cboe_options(ticker="QQQ"):
-    return _fetch_options_raw(ticker)
+    snapshot = get_options_snapshot(ticker)
+    if snapshot is None:
+        return None, None
+    return snapshot.df, snapshot.spot
 
 
 @st.cache_data(ttl=15)
@@ -771,7 +1224,9 @@ def get_cboe_options_live(ticker="QQQ"):
     return _fetch_options_raw(ticker)
 
 
-@st.cache_data(ttl=10)
+@_collected
+@_swr_cached(ttl=10, max_stale=30)
+@_coalesced
 def get_nq_price_auto(_finnhub_key):
     schwab_price, schwab_source = _get_schwab_futures_price("NQ=F")
     if schwab_price and schwab_price > 10000:
@@ -794,7 +1249,7 @@ def get_nq_price_auto(_finnhub_key):
 
     try:
         nq = yf.Ticker("NQ=F")
-        data = nq.history(period="1d", interval="1m")
+        data = guarded_call("yfinance", nq.history, period="1d", interval="1m", raise_errors=True)
         if not data.empty:
             _set_quote_meta("NQ=F", "yfinance")
             return float(data["Close"].iloc[-1]), "yfinance"
@@ -803,13 +1258,128 @@ def get_nq_price_auto(_finnhub_key):
     return None, "unavailable"
 
 
-@st.cache_data(ttl=10)
+# Yahoo intraday limits: how many days back each interval is served, and the span one request may cover.
+YAHOO_INTRADAY_LOOKBACK_DAYS = {"1m": 29, "2m": 59, "5m": 59, "15m": 59, "30m": 59, "90m": 59, "60m": 729, "1h": 729}
+YAHOO_INTRADAY_CHUNK_DAYS = {"1m": 7}
+
+
+# A span at least this long always holds futures bars (the longest weekend-plus-holiday close is about 3 days), so
+# an empty answer for it is a provider failure. Shorter spans, e.g. a tail sync over a weekend, may be empty.
+YAHOO_EMPTY_SPAN_IS_FAILURE = pd.Timedelta(days=4)
+
+
+def _yahoo_history_chunk(ticker, interval, start, end):
+    try:
+        part = ticker.history(
+            start=start, end=end, interval=interval, auto_adjust=False, prepost=True, raise_errors=True
+        )
+    except yf.exceptions.YFPricesMissingError:
+        part = None
+    if (part is None or part.empty) and end - start >= YAHOO_EMPTY_SPAN_IS_FAILURE:
+        raise ValueError(f"yfinance returned no {interval} bars for {ticker.ticker} {start} - {end}")
+    return part
+
+
+def _yahoo_bars(symbol, interval, start, end):
+    now = pd.Timestamp.now(tz="UTC")
+    lookback = YAHOO_INTRADAY_LOOKBACK_DAYS.get(interval)
+    if lookback:
+        start = max(start, now - pd.Timedelta(days=lookback))
+    chunk = pd.Timedelta(days=YAHOO_INTRADAY_CHUNK_DAYS.get(interval, 3650))
+    ticker = yf.Ticker(symbol)
+    frames = []
+    failed = []
+    cursor = start
+    while cursor < end:
+        stop = min(end, cursor + chunk)
+        try:
+            # Errors and empty answers count against the yfinance breaker, as on the quote fallbacks.
+            part = guarded_call("yfinance", _yahoo_history_chunk, ticker, interval, cursor, stop)
+            if part is not None and not part.empty:
+                frames.append(part)
+        except Exception:
+            failed.append((cursor, stop))
+        cursor = stop
+    if not frames:
+        return pd.DataFrame(), failed
+    bars = pd.concat(frames)
+    return bars[~bars.index.duplicated(keep="last")].sort_index(), failed
+
+
+_BAR_STORE = None
+_BAR_STORE_LOCK = threading.Lock()
+
+
+def bar_store():
+    """Parquet bar store under BAR_STORE_PATH (default: a temp dir; "off" disables it)."""
+    global _BAR_STORE
+    with _BAR_STORE_LOCK:
+        if _BAR_STORE is None:
+            path = str(_get_secret("BAR_STORE_PATH", os.path.join(tempfile.gettempdir(), "nq_precision_bars")))
+            _BAR_STORE = False
+            if path and path.lower() != "off":
+                try:
+                    os.makedirs(path, exist_ok=True)
+                    _BAR_STORE = BarStore(path, refresh_s=float(_get_secret("BAR_STORE_REFRESH_SECONDS", 10)))
+                except Exception:
+                    _BAR_STORE = False
+        return _BAR_STORE or None
+
+
+def _stored_bars(symbol, interval, days):
+    start = pd.Timestamp.now(tz="America/New_York") - pd.Timedelta(days=days)
+    store = bar_store()
+    if store is not None:
+        try:
+            return store.bars(symbol, interval, start, _yahoo_bars)
+        except Exception:
+            pass
+    bars, _failed = _yahoo_bars(symbol, interval, start.tz_convert("UTC"), pd.Timestamp.now(tz="UTC"))
+    bars = _to_et_index(bars)
+    if bars is None or bars.empty:
+        return pd.DataFrame()
+    return bars[[c for c in ("Open", "High", "Low", "Close", "Volume") if c in bars.columns]]
+
+
+_RESAMPLED_BARS = ResampleMemo()
+
+
+def get_bars(symbol, interval="5m", days=5):
+    """Intraday OHLCV (ET index, raw prices, extended hours) for the last `days` calendar days.
+
+    Served from the bar store, which only fetches bars it does not have yet. 2m-30m bars are resampled from the
+    symbol's 1m series whenever it reaches back far enough, so every interval shares one download.
+    """
+    if interval in RESAMPLE_RULES:
+        base = _stored_bars(symbol, "1m", days)
+        # Weekend/holiday slack: the first 1m bar can trail the window start by a couple of days.
+        start = pd.Timestamp.now(tz="America/New_York") - pd.Timedelta(days=days)
+        if not base.empty and base.index[0] <= start + pd.Timedelta(days=3):
+            return _RESAMPLED_BARS.get((symbol, interval, days), base, interval)
+    return _stored_bars(symbol, interval, days)
+
+
+@_collected
+@_swr_cached(ttl=10, max_stale=60)
 def get_nq_intraday_data():
+    # Last trading session (18:00 ET -> 17:00 ET), like yfinance's period="1d"; the 4-day window reaches back over
+    # weekends, holidays and the daily maintenance halt.
     try:
-        nq = yf.Ticker("NQ=F")
-        data = nq.history(period="1d", interval="5m")
+        data = get_bars("NQ=F", "5m", days=4)
         if not data.empty:
-            return data.tail(50)
+            session = (data.index + pd.Timedelta(hours=6)).date
+            return data[session == session[-1]].tail(50)
+    except Exception:
+        pass
+    return None
+
+
+@st.cache_data(ttl=60)
+def get_nq_session_open():
+    try:
+        data = yf.Ticker("NQ=F").history(period="1d")
+        if not data.empty:
+            return float(data["Open"].iloc[0])
     except Exception:
         pass
     return None
@@ -820,10 +1390,7 @@ def get_intraday_history(symbol="NQ=F", days=45, interval="5m"):
     """Extended intraday history (ET) for reaction/backtest style analytics."""
     days = max(5, min(120, int(days)))
     try:
-        ticker = yf.Ticker(symbol)
-        period = f"{max(20, int(days * 2.2))}d"
-        data = ticker.history(period=period, interval=interval, auto_adjust=False, prepost=True)
-        data = _to_et_index(data)
+        data = get_bars(symbol, interval, days=days)
         if data is None or data.empty:
             return pd.DataFrame()
         data = data.dropna(subset=["Open", "High", "Low", "Close"]).copy()
@@ -837,10 +1404,13 @@ def get_intraday_history(symbol="NQ=F", days=45, interval="5m"):
         return pd.DataFrame()
 
 
-@st.cache_data(ttl=10)
+@_collected
+@_swr_cached(ttl=10, max_stale=30)
+@_coalesced
 def get_qqq_price_with_source(finnhub_key):
     # Prefer Schwab so NQ and QQQ can come from the same venue/timebase.
-    quotes = _get_schwab_quotes(["QQQ"])
+    quotes, _status = get_schwab_board_quotes()
+    quotes = _board_quote_subset("QQQ", quotes) if quotes else {}
     if quotes:
         for key in ("QQQ", "/QQQ"):
             if key in quotes:
@@ -859,7 +1429,7 @@ def get_qqq_price_with_source(finnhub_key):
                     return float(price), f"Schwab ({quote_key})"
 
     try:
-        client = finnhub.Client(api_key=finnhub_key)
+        client = finnhub_client(finnhub_key)
         quote = client.quote("QQQ")
         price = quote.get("c", 0)
         if price > 0:
@@ -881,61 +1451,106 @@ def get_qqq_price(finnhub_key):
     return price
 
 
-@st.cache_data(ttl=30)
-def get_market_overview_yahoo():
-    data = {}
-    symbols = {
-        "vix": "^VIX",
-        "vvix": "^VVIX",
-        "es": "ES=F",
-        "ym": "YM=F",
-        "rty": "RTY=F",
-        "gc": "GC=F",
-        "cl": "CL=F",
-        "iwm": "IWM",
-        "dia": "DIA",
-        "10y": "^TNX",
-        "dxy": "DX=F",
-    }
+def _yahoo_daily_bar(symbol):
+    """(session open, last) from the Yahoo chart API's current daily bar, or None."""
+    try:
+        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+        response = http_get("yahoo", url, params={"range": "1d", "interval": "1d"})
+        if response.status_code != 200:
+            return None
+        result = _decode_json(response)["chart"]["result"][0]
+        quote = (result.get("indicators", {}).get("quote") or [{}])[0]
+        opens = [v for v in (quote.get("open") or []) if v is not None]
+        closes = [v for v in (quote.get("close") or []) if v is not None]
+        current = closes[-1] if closes else result.get("meta", {}).get("regularMarketPrice")
+        if not opens or not current:
+            return None
+        return float(opens[0]), float(current)
+    except Exception:
+        return None
+
+
+MARKET_OVERVIEW_SYMBOLS = {
+    "vix": "^VIX",
+    "vvix": "^VVIX",
+    "es": "ES=F",
+    "ym": "YM=F",
+    "rty": "RTY=F",
+    "gc": "GC=F",
+    "cl": "CL=F",
+    "iwm": "IWM",
+    "dia": "DIA",
+    "10y": "^TNX",
+    "dxy": "DX=F",
+}
+
+
+def _market_overview_symbols():
+    """Base overview symbols plus MARKET_OVERVIEW_EXTRA, as a table or "hyg:HYG, btc:BTC-USD"."""
+    symbols = dict(MARKET_OVERVIEW_SYMBOLS)
+    extra = _get_secret("MARKET_OVERVIEW_EXTRA", "")
+    try:
+        if hasattr(extra, "items"):
+            entries = [(str(key), str(symbol)) for key, symbol in extra.items()]
+        else:
+            entries = []
+            for item in str(extra or "").split(","):
+                parts = [p.strip() for p in item.split(":", 1)]
+                if len(parts) == 2:
+                    entries.append((parts[0], parts[1]))
+    except Exception:
+        entries = []
+    for key, symbol in entries:
+        if key and symbol:
+            symbols[key.lower()] = symbol.upper()
+    return symbols
+
+
+def _overview_usable(data):
+    # The board always has a row per symbol; it failed when no symbol got a price from anywhere.
+    return bool(data) and any(row.get("source") != "unavailable" for row in data.values())
+
+
+@_collected
+@_swr_cached(ttl=30, max_stale=120, usable=_overview_usable)
+def get_market_overview_yahoo():
+    symbols = _market_overview_symbols()
+    unavailable = {"price": 0, "change": 0, "change_pct": 0, "source": "unavailable"}
+    data = {key: dict(unavailable) for key in symbols}
+
+    # Every symbol's chart request in flight at once on the pooled Yahoo session (latency of the slowest, not the sum).
+    workers = max(1, int(_get_secret("MARKET_OVERVIEW_FETCH_WORKERS", 12)))
+    unique_symbols = list(dict.fromkeys(symbols.values()))
+    with _thread_pool(min(workers, len(unique_symbols))) as pool:
+        bars = dict(zip(unique_symbols, pool.map(_yahoo_daily_bar, unique_symbols)))
 
     for key, symbol in symbols.items():
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1d")
-
-            if not hist.empty:
-                current = hist["Close"].iloc[-1]
-                prev_close = hist["Open"].iloc[0]
-                change = current - prev_close
-                change_pct = (change / prev_close) * 100 if prev_close != 0 else 0
-
-                data[key] = {
-                    "price": float(current),
-                    "change": float(change),
-                    "change_pct": float(change_pct),
-                    "source": "Yahoo Finance",
-                }
-                _set_quote_meta(symbol, "Yahoo Finance")
-            else:
-                data[key] = {
-                    "price": 0,
-                    "change": 0,
-                    "change_pct": 0,
-                    "source": "unavailable",
-                }
-        except Exception:
-            data[key] = {"price": 0, "change": 0, "change_pct": 0, "source": "unavailable"}
+        bar = bars.get(symbol)
+        if not bar:
+            continue
+        prev_close, current = bar
+        change = current - prev_close
+        change_pct = (change / prev_close) * 100 if prev_close != 0 else 0
+        data[key] = {
+            "price": float(current),
+            "change": float(change),
+            "change_pct": float(change_pct),
+            "source": "Yahoo Finance",
+        }
+        _set_quote_meta(symbol, "Yahoo Finance")
 
     # Prefer Schwab real-time futures quotes when configured.
-    for key, symbol in {
+    board_keys = {
         "es": "ES=F",
         "ym": "YM=F",
         "rty": "RTY=F",
         "dxy": "DX=F",
         "gc": "GC=F",
         "cl": "CL=F",
-    }.items():
-        schwab_price, source = _get_schwab_futures_price(symbol)
+    }
+    board = get_schwab_futures_board(tuple(board_keys.values()))
+    for key, symbol in board_keys.items():
+        schwab_price, source = board[symbol]
         if schwab_price:
             data[key]["price"] = float(schwab_price)
             data[key]["source"] = source
@@ -1091,7 +1706,7 @@ def _fetch_forexfactory_calendar(start_date, end_date):
     data = None
     for url in urls:
         try:
-            res = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+            res = http_get("forexfactory", url)
             if res.status_code != 200:
                 continue
             payload = res.json()
@@ -1170,7 +1785,8 @@ def _fetch_marketwatch_economic_calendar(start_date, end_date):
     html_text = ""
     for url in urls:
         try:
-            res = requests.get(
+            res = http_get(
+                "marketwatch",
                 url,
                 timeout=12,
                 headers={
@@ -1277,7 +1893,8 @@ def _fetch_finviz_economic_calendar(start_date, end_date):
     et = ZoneInfo("America/New_York")
     url = "https://finviz.com/calendar.ashx"
     try:
-        res = requests.get(
+        res = http_get(
+            "finviz",
             url,
             timeout=12,
             headers={
@@ -1383,7 +2000,7 @@ def _fetch_tradingeconomics_calendar(start_date, end_date):
         f"?c=guest:guest&f=json&d1={start_date.isoformat()}&d2={end_date.isoformat()}"
     )
     try:
-        res = requests.get(url, timeout=12, headers={"User-Agent": "Mozilla/5.0"})
+        res = http_get("tradingeconomics", url)
         if res.status_code != 200:
             return items
         data = res.json()
@@ -1441,7 +2058,7 @@ def _fetch_fmp_economic_calendar(start_date, end_date):
         f"?from={start_date.isoformat()}&to={end_date.isoformat()}&apikey={api_key}"
     )
     try:
-        res = requests.get(url, timeout=12, headers={"User-Agent": "Mozilla/5.0"})
+        res = http_get("fmp", url)
         if res.status_code != 200:
             return items
         data = res.json()
@@ -1490,9 +2107,11 @@ def _fetch_fmp_economic_calendar(start_date, end_date):
     return items
 
 
-@st.cache_data(ttl=30)
+@_collected
+@_swr_cached(ttl=30, max_stale=300)
+@_coalesced
 def get_economic_calendar_window(finnhub_key, days=3):
-    client = finnhub.Client(api_key=finnhub_key)
+    client = finnhub_client(finnhub_key)
     et = ZoneInfo("America/New_York")
     fetch_ms = int(time.time() * 1000)
     fetch_asof_utc = _utc_iso_from_ms(fetch_ms)
@@ -1744,7 +2363,7 @@ def get_economic_calendar_window(finnhub_key, days=3):
 
 @st.cache_data(ttl=600)
 def get_market_news(finnhub_key):
-    client = finnhub.Client(api_key=finnhub_key)
+    client = finnhub_client(finnhub_key)
 
     try:
         news = client.general_news("general", min_id=0)
@@ -1763,7 +2382,7 @@ def get_market_news(finnhub_key):
 def get_fear_greed_index():
     try:
         url = "https://production.dataviz.cnn.io/index/fearandgreed/graphdata"
-        response = requests.get(url, timeout=5)
+        response = http_get("cnn", url)
         if response.status_code == 200:
             data = response.json()
             score = data.get("fear_and_greed", {}).get("score", 50)
@@ -1776,7 +2395,7 @@ def get_fear_greed_index():
 
 @st.cache_data(ttl=900)
 def get_top_movers(finnhub_key):
-    client = finnhub.Client(api_key=finnhub_key)
+    client = finnhub_client(finnhub_key)
     tickers = [
         "AAPL",
         "MSFT",
@@ -1850,12 +2469,13 @@ def _to_et_index(df):
     return out
 
 
-@st.cache_data(ttl=20)
+@_collected
+@_swr_cached(ttl=20, max_stale=120)
 def get_futures_opening_structure(symbol="NQ=F"):
     """Opening structure model for futures: overnight, globex VWAP, IB, and open classification."""
     et = ZoneInfo("America/New_York")
     try:
-        hist = yf.Ticker(symbol).history(period="3d", interval="5m")
+        hist = get_bars(symbol, "5m", days=3)
         if hist.empty:
             return {}
     except Exception:
@@ -2255,20 +2875,172 @@ def _parse_hhmm(raw_value, default_value):
         return default_value
 
 
-def _safe_vwap(frame):
-    if frame is None or frame.empty:
-        return None
-    vol = frame["Volume"].fillna(0).astype(float)
-    if float(vol.sum()) <= 0:
-        try:
-            return float(frame["Close"].astype(float).mean())
-        except Exception:
-            return None
-    tp = ((frame["High"] + frame["Low"] + frame["Close"]) / 3.0).astype(float)
-    try:
-        return float((tp * vol).sum() / vol.sum())
-    except Exception:
-        return None
+def _wall_day_and_time(index):
+    # ET wall-clock session day (naive midnight) and time of day for every bar.
+    index = index.as_unit("ns")
+    wall = index.tz_localize(None) if index.tz is not None else index
+    day = wall.normalize()
+    return day, wall - day
+
+
+def _time_delta(t):
+    return pd.Timedelta(hours=t.hour, minutes=t.minute, seconds=t.second, microseconds=t.microsecond)
+
+
+def _ib_session_frame(hist, rth, session_dates, ib_start_t, ib_end_t, high_impact_dates):
+    """One row per session for the IB backtest. Bars are tagged with their session (and IB / overnight
+    membership) once; every statistic is then a grouped reduce instead of a per-day rescan."""
+    sessions = pd.DatetimeIndex(pd.to_datetime([d.isoformat() for d in session_dates]))
+    day, tod = _wall_day_and_time(rth.index)
+    keep = np.asarray(day.isin(sessions))
+    bars, day, tod = rth[keep], day[keep], tod[keep]
+    if bars.empty:
+        return pd.DataFrame()
+
+    by_day = bars.groupby(day)
+    per_day = pd.DataFrame(
+        {
+            "open": by_day["Open"].first(),
+            "close": by_day["Close"].last(),
+            "session_high": by_day["High"].max(),
+            "session_low": by_day["Low"].min(),
+        }
+    ).reindex(sessions)
+    # Previous session in the window, whether or not that session produced a row.
+    per_day["prev_close"] = per_day["close"].shift(1)
+
+    in_ib = np.asarray((tod >= _time_delta(ib_start_t)) & (tod < _time_delta(ib_end_t)))
+    ib, ib_day = bars[in_ib], day[in_ib]
+    by_ib = ib.groupby(ib_day)
+    per_day = per_day.join(
+        pd.DataFrame(
+            {
+                "ib_high": by_ib["High"].max(),
+                "ib_low": by_ib["Low"].min(),
+                "ib_end_close": by_ib["Close"].last(),
+                "ib_last_ns": pd.Series(ib.index.as_unit("ns").asi8, index=ib_day).groupby(level=0).last(),
+            }
+        ),
+        how="inner",
+    )
+
+    # IB VWAP over 09:30 -> IB end (rth already starts at 09:30); falls back to mean close without volume.
+    in_vwap = np.asarray(tod < _time_delta(ib_end_t))
+    vw = bars[in_vwap]
+    vol = vw["Volume"].fillna(0).astype(float).to_numpy()
+    tp = ((vw["High"] + vw["Low"] + vw["Close"]) / 3.0).astype(float).to_numpy()
+    vwap_parts = pd.DataFrame(
+        {"vol": vol, "tpv": tp * vol, "close": vw["Close"].astype(float).to_numpy()}, index=day[in_vwap]
+    ).groupby(level=0).agg({"vol": "sum", "tpv": "sum", "close": "mean"})
+    per_day["ib_vwap"] = np.where(vwap_parts["vol"] > 0, vwap_parts["tpv"] / vwap_parts["vol"], vwap_parts["close"])[
+        vwap_parts.index.get_indexer(per_day.index)
+    ]
+
+    # Overnight 18:00 (prior calendar day) -> 09:29 belongs to the next session day.
+    h_day, h_tod = _wall_day_and_time(hist.index)
+    h_day_ns = h_day.asi8
+    h_tod_ns = h_tod.to_numpy().astype("int64")
+    one_day_ns = pd.Timedelta(days=1).value
+    on_key = np.where(
+        h_tod_ns >= pd.Timedelta(hours=18).value,
+        h_day_ns + one_day_ns,
+        np.where(h_tod_ns <= pd.Timedelta(hours=9, minutes=29).value, h_day_ns, np.iinfo(np.int64).min),
+    )
+    overnight = pd.DataFrame({"high": hist["High"].to_numpy(), "low": hist["Low"].to_numpy()}, index=on_key)
+    overnight = overnight[overnight.index != np.iinfo(np.int64).min].groupby(level=0).agg({"high": "max", "low": "min"})
+    on_range = overnight.reindex(per_day.index.asi8)
+    per_day["overnight_mid"] = ((on_range["high"] + on_range["low"]) / 2.0).to_numpy()
+
+    per_day["ib_range"] = (per_day["ib_high"] - per_day["ib_low"]).clip(lower=0.0)
+    per_day = per_day[per_day["ib_range"] > 0]
+    if per_day.empty:
+        return pd.DataFrame()
+
+    # After-IB window starts at the last IB bar; breaks and extensions are per-bar comparisons reduced per day.
+    bar_ns = bars.index.as_unit("ns").asi8
+    pos = per_day.index.get_indexer(day)
+    has_ib = pos >= 0
+    ib_last_ns = per_day["ib_last_ns"].to_numpy()
+    after = has_ib & (bar_ns >= np.where(has_ib, ib_last_ns[pos], 0))
+    highs, lows = bars["High"].to_numpy(), bars["Low"].to_numpy()
+    up = after & (highs > np.where(has_ib, per_day["ib_high"].to_numpy()[pos], np.inf))
+    down = after & (lows < np.where(has_ib, per_day["ib_low"].to_numpy()[pos], -np.inf))
+    after_range = pd.DataFrame({"high": highs[after], "low": lows[after]}, index=day[after]).groupby(level=0).agg(
+        {"high": "max", "low": "min"}
+    )
+    broke = up | down
+    first = pd.DataFrame({"ts_ns": bar_ns[broke], "up": up[broke], "down": down[broke]}, index=day[broke])
+    first = first.groupby(level=0).first()
+    first_pos = first.index.get_indexer(per_day.index)
+    has_first = first_pos >= 0
+    first_ns = np.where(has_first, first["ts_ns"].to_numpy()[first_pos], 0)
+    first_up = has_first & first["up"].to_numpy()[first_pos]
+    first_down = has_first & first["down"].to_numpy()[first_pos]
+    first_ts = pd.to_datetime(first_ns, utc=True).tz_convert(bars.index.tz or "UTC")
+    minutes = np.maximum(0, (first_ns - ib_last_ns) // pd.Timedelta(minutes=1).value)
+    minutes = minutes if has_first.all() else np.where(has_first, minutes, np.nan)
+
+    max_after = after_range["high"].reindex(per_day.index)
+    min_after = after_range["low"].reindex(per_day.index)
+    break_up = (max_after > per_day["ib_high"]).to_numpy()
+    break_down = (min_after < per_day["ib_low"]).to_numpy()
+    ib_range = per_day["ib_range"]
+    ib_mid = (per_day["ib_high"] + per_day["ib_low"]) / 2.0
+    ext_up = (max_after - per_day["ib_high"]).clip(lower=0.0)
+    ext_down = (per_day["ib_low"] - min_after).clip(lower=0.0)
+    ext_mult_up = ext_up / ib_range
+    ext_mult_down = ext_down / ib_range
+    gap_pts = per_day["open"] - per_day["prev_close"]
+
+    date_keys = [d.date().isoformat() for d in per_day.index]
+    return pd.DataFrame(
+        {
+            "date": date_keys,
+            "weekday": per_day.index.strftime("%a"),
+            "open": per_day["open"].to_numpy(),
+            "close": per_day["close"].to_numpy(),
+            "ib_high": per_day["ib_high"].to_numpy(),
+            "ib_low": per_day["ib_low"].to_numpy(),
+            "ib_mid": ib_mid.to_numpy(),
+            "ib_range": ib_range.to_numpy(),
+            "ib_range_pct": (ib_range / ib_mid.clip(lower=1e-9) * 100.0).to_numpy(),
+            "gap_pts": gap_pts.to_numpy(),
+            "gap_dir": np.select(
+                [gap_pts.isna(), gap_pts.abs() < 0.25, gap_pts > 0], ["unknown", "flat", "up"], default="down"
+            ),
+            "overnight_mid": per_day["overnight_mid"].to_numpy(),
+            "open_vs_overnight_mid": np.select(
+                [per_day["overnight_mid"].isna(), per_day["open"] >= per_day["overnight_mid"]],
+                ["unknown", "above"],
+                default="below",
+            ),
+            "ib_vwap": per_day["ib_vwap"].to_numpy(),
+            "ib_end_vs_vwap": np.where(per_day["ib_end_close"] >= per_day["ib_vwap"], "above", "below"),
+            "break_up": break_up,
+            "break_down": break_down,
+            "both_break": break_up & break_down,
+            "single_side_break": break_up ^ break_down,
+            "no_break": ~break_up & ~break_down,
+            "first_break": np.select(
+                [first_up & first_down, first_up, first_down], ["both", "up", "down"], default="none"
+            ),
+            "first_break_time_et": [ts.strftime("%H:%M") if hit else None for ts, hit in zip(first_ts, has_first)],
+            "minutes_to_first_break": minutes,
+            "ext_up": ext_up.to_numpy(),
+            "ext_down": ext_down.to_numpy(),
+            "ext_mult_up": ext_mult_up.to_numpy(),
+            "ext_mult_down": ext_mult_down.to_numpy(),
+            "session_high": per_day["session_high"].to_numpy(),
+            "session_low": per_day["session_low"].to_numpy(),
+            "session_range": (per_day["session_high"] - per_day["session_low"]).clip(lower=0.0).to_numpy(),
+            "close_in_ib_pos": ((per_day["close"] - per_day["ib_low"]) / ib_range).to_numpy(),
+            "close_above_ib_mid": (per_day["close"] >= ib_mid).to_numpy(),
+            "hit_025_any": ((ext_mult_up >= 0.25) | (ext_mult_down >= 0.25)).to_numpy(),
+            "hit_050_any": ((ext_mult_up >= 0.50) | (ext_mult_down >= 0.50)).to_numpy(),
+            "hit_100_any": ((ext_mult_up >= 1.00) | (ext_mult_down >= 1.00)).to_numpy(),
+            "high_impact_day": np.array([key in high_impact_dates for key in date_keys], dtype=bool),
+        }
+    )
 
 
 @st.cache_data(ttl=180)
@@ -2291,19 +3063,12 @@ def get_initial_balance_backtest(
 
     # Request extra bars so we still have enough sessions after filtering.
     period_days = max(30, int(days * 4))
-    period = f"{period_days}d"
 
     hist = None
     used_interval = interval
     for candidate in [interval, "5m", "15m", "30m"]:
         try:
-            raw = yf.Ticker(symbol).history(
-                period=period,
-                interval=candidate,
-                auto_adjust=False,
-                prepost=True,
-            )
-            raw = _to_et_index(raw)
+            raw = get_bars(symbol, candidate, days=period_days)
             if raw is not None and not raw.empty:
                 hist = raw.copy()
                 used_interval = candidate
@@ -2393,162 +3158,7 @@ def get_initial_balance_backtest(
     except Exception:
         high_impact_dates = set()
 
-    rows = []
-    for i, day in enumerate(session_dates):
-        day_rth = rth[rth.index.date == day].copy()
-        if day_rth.empty:
-            continue
-
-        ib_slice = day_rth[
-            (day_rth.index.time >= ib_start_t) & (day_rth.index.time < ib_end_t)
-        ].copy()
-        if ib_slice.empty:
-            continue
-
-        ib_high = float(ib_slice["High"].max())
-        ib_low = float(ib_slice["Low"].min())
-        ib_mid = (ib_high + ib_low) / 2.0
-        ib_range = float(max(0.0, ib_high - ib_low))
-        if ib_range <= 0:
-            continue
-        ib_range_pct = float((ib_range / max(1e-9, ib_mid)) * 100.0)
-
-        day_open = float(day_rth["Open"].iloc[0])
-        day_close = float(day_rth["Close"].iloc[-1])
-
-        prev_close = None
-        if i > 0:
-            prev_day = session_dates[i - 1]
-            prev_rth = rth[rth.index.date == prev_day]
-            if not prev_rth.empty:
-                prev_close = float(prev_rth["Close"].iloc[-1])
-        gap_pts = (day_open - prev_close) if prev_close is not None else None
-        if gap_pts is None:
-            gap_dir = "unknown"
-        elif abs(gap_pts) < 0.25:
-            gap_dir = "flat"
-        elif gap_pts > 0:
-            gap_dir = "up"
-        else:
-            gap_dir = "down"
-
-        prev_day_for_overnight = day - timedelta(days=1)
-        overnight_start = datetime.combine(prev_day_for_overnight, dt_time(18, 0), tzinfo=et)
-        overnight_end = datetime.combine(day, dt_time(9, 29), tzinfo=et)
-        overnight = hist[(hist.index >= overnight_start) & (hist.index <= overnight_end)].copy()
-        overnight_mid = None
-        open_vs_overnight_mid = "unknown"
-        if not overnight.empty:
-            on_high = float(overnight["High"].max())
-            on_low = float(overnight["Low"].min())
-            overnight_mid = (on_high + on_low) / 2.0
-            if day_open >= overnight_mid:
-                open_vs_overnight_mid = "above"
-            else:
-                open_vs_overnight_mid = "below"
-
-        ib_end_frame = day_rth[
-            (day_rth.index.time >= dt_time(9, 30)) & (day_rth.index.time < ib_end_t)
-        ].copy()
-        ib_vwap = _safe_vwap(ib_end_frame)
-        ib_end_close = float(ib_slice["Close"].iloc[-1])
-        ib_end_vs_vwap = "unknown"
-        if ib_vwap is not None:
-            ib_end_vs_vwap = "above" if ib_end_close >= float(ib_vwap) else "below"
-
-        after_ib = day_rth[day_rth.index >= ib_slice.index[-1]].copy()
-        break_up = False
-        break_down = False
-        first_break = "none"
-        first_break_time_et = None
-        minutes_to_first_break = None
-        ext_up = 0.0
-        ext_down = 0.0
-        if not after_ib.empty:
-            max_after = float(after_ib["High"].max())
-            min_after = float(after_ib["Low"].min())
-            break_up = max_after > ib_high
-            break_down = min_after < ib_low
-            ext_up = max(0.0, max_after - ib_high)
-            ext_down = max(0.0, ib_low - min_after)
-
-            for ts, bar in after_ib.iterrows():
-                up_now = float(bar["High"]) > ib_high
-                down_now = float(bar["Low"]) < ib_low
-                if up_now and down_now:
-                    first_break = "both"
-                    first_break_time_et = ts
-                    break
-                if up_now:
-                    first_break = "up"
-                    first_break_time_et = ts
-                    break
-                if down_now:
-                    first_break = "down"
-                    first_break_time_et = ts
-                    break
-
-            if first_break_time_et is not None:
-                try:
-                    minutes_to_first_break = int(
-                        max(0, (first_break_time_et - ib_slice.index[-1]).total_seconds() // 60)
-                    )
-                except Exception:
-                    minutes_to_first_break = None
-
-        both_break = bool(break_up and break_down)
-        no_break = bool((not break_up) and (not break_down))
-        single_side_break = bool((break_up and not break_down) or (break_down and not break_up))
-        ext_mult_up = float(ext_up / ib_range) if ib_range > 0 else 0.0
-        ext_mult_down = float(ext_down / ib_range) if ib_range > 0 else 0.0
-        session_high = float(day_rth["High"].max())
-        session_low = float(day_rth["Low"].min())
-        session_range = float(max(0.0, session_high - session_low))
-        close_in_ib_pos = float((day_close - ib_low) / ib_range) if ib_range > 0 else None
-
-        day_key = day.isoformat()
-        rows.append(
-            {
-                "date": day_key,
-                "weekday": datetime.combine(day, dt_time(0, 0)).strftime("%a"),
-                "open": day_open,
-                "close": day_close,
-                "ib_high": ib_high,
-                "ib_low": ib_low,
-                "ib_mid": ib_mid,
-                "ib_range": ib_range,
-                "ib_range_pct": ib_range_pct,
-                "gap_pts": gap_pts,
-                "gap_dir": gap_dir,
-                "overnight_mid": overnight_mid,
-                "open_vs_overnight_mid": open_vs_overnight_mid,
-                "ib_vwap": ib_vwap,
-                "ib_end_vs_vwap": ib_end_vs_vwap,
-                "break_up": bool(break_up),
-                "break_down": bool(break_down),
-                "both_break": both_break,
-                "single_side_break": single_side_break,
-                "no_break": no_break,
-                "first_break": first_break,
-                "first_break_time_et": first_break_time_et.strftime("%H:%M") if first_break_time_et is not None else None,
-                "minutes_to_first_break": minutes_to_first_break,
-                "ext_up": ext_up,
-                "ext_down": ext_down,
-                "ext_mult_up": ext_mult_up,
-                "ext_mult_down": ext_mult_down,
-                "session_high": session_high,
-                "session_low": session_low,
-                "session_range": session_range,
-                "close_in_ib_pos": close_in_ib_pos,
-                "close_above_ib_mid": bool(day_close >= ib_mid),
-                "hit_025_any": bool((ext_mult_up >= 0.25) or (ext_mult_down >= 0.25)),
-                "hit_050_any": bool((ext_mult_up >= 0.50) or (ext_mult_down >= 0.50)),
-                "hit_100_any": bool((ext_mult_up >= 1.00) or (ext_mult_down >= 1.00)),
-                "high_impact_day": bool(day_key in high_impact_dates),
-            }
-        )
-
-    sessions_df = pd.DataFrame(rows)
+    sessions_df = _ib_session_frame(hist, rth, session_dates, ib_start_t, ib_end_t, high_impact_dates)
     if sessions_df.empty:
         summary = {}
     else:
@@ -2602,15 +3212,16 @@ def get_initial_balance_backtest(
     }
 
 
-@st.cache_data(ttl=30)
+@_collected
+@_swr_cached(ttl=30, max_stale=180)
+@_coalesced
 def get_futures_reference_levels(symbol="NQ=F", finnhub_key=""):
     et = ZoneInfo("America/New_York")
     now_et = datetime.now(et)
     try:
-        hist = yf.Ticker(symbol).history(period="12d", interval="5m")
+        hist = get_bars(symbol, "5m", days=12)
     except Exception:
         return {}
-    hist = _to_et_index(hist)
     if hist is None or hist.empty:
         return {}
     hist = hist[hist.index <= now_et].copy()
@@ -2717,7 +3328,12 @@ def get_futures_reference_levels(symbol="NQ=F", finnhub_key=""):
     return out
 
 
-@st.cache_data(ttl=45)
+def _breadth_usable(data):
+    return bool(data) and bool(data.get("NQ") or data.get("ES") or data.get("sectors"))
+
+
+@_collected
+@_swr_cached(ttl=45, max_stale=180, usable=_breadth_usable)
 def get_futures_breadth_internals():
     nq_snapshot = _calc_breadth_snapshot(NASDAQ_100_CORE, "NQ Breadth (NQ100 proxy)")
     es_snapshot = _calc_breadth_snapshot(SP500_BREADTH_PROXY, "ES Breadth (SPX proxy)")
@@ -2782,7 +3398,7 @@ def get_cot_dealer_positioning():
     source_url = None
     for url in urls:
         try:
-            resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
+            resp = http_get("cftc", url)
             if resp.status_code != 200 or not resp.text or len(resp.text) < 200:
                 continue
             raw_text = resp.text
@@ -2983,7 +3599,9 @@ def _earnings_to_event_dt_et(date_val, time_bucket):
     return datetime.combine(date_val, tt, tzinfo=et)
 
 
-@st.cache_data(ttl=20)
+@_collected
+@_swr_cached(ttl=20, max_stale=120)
+@_coalesced
 def get_event_risk_snapshot(finnhub_key, hours_ahead=24):
     et = ZoneInfo("America/New_York")
     now_et = datetime.now(et)
@@ -3082,6 +3700,52 @@ def get_event_risk_snapshot(finnhub_key, hours_ahead=24):
     return out
 
 
+# yfinance's own per-request timeout (it does not go through http_pool).
+YFINANCE_TIMEOUT_S = 10.0
+
+# Sequential hops behind each bundle source when every provider is slow. A leading "schwab" is the token refresh
+# that can precede the first Schwab call; concurrent fan-outs (the overview board) count once.
+BUNDLE_FALLBACK_CHAINS = {
+    "qqq_quote": ("schwab", "schwab", "finnhub", "yahoo"),
+    "nq_quote": ("schwab", "schwab", "yahoo", "yahoo", "yfinance"),
+    "nq_session_open": ("yfinance",),
+    "options_snapshot": ("schwab", "schwab", "cboe"),
+    "market_data": ("yahoo", "schwab", "schwab"),
+    "event_risk": (
+        "finnhub", "forexfactory", "forexfactory", "tradingeconomics", "fmp",
+        "marketwatch", "marketwatch", "finviz", "finnhub", "finnhub",
+    ),
+    "nq_intraday": ("yfinance",) * 4,
+}
+
+
+def _fallback_chain_s(hops, slack_s=1.0):
+    return slack_s + sum(YFINANCE_TIMEOUT_S if hop == "yfinance" else provider_timeout(hop) for hop in hops)
+
+
+# Deadlines cover each chain's worst case, so a provider that is slow but answers is waited for (as a direct call
+# would be) rather than cut off; the bundle still takes only as long as its slowest source actually runs.
+BUNDLE_DEADLINES = {name: _fallback_chain_s(hops) for name, hops in BUNDLE_FALLBACK_CHAINS.items()}
+
+
+def get_rerun_bundle(finnhub_key, include_nq=True, deadlines=None):
+    """Quotes, chain, overview, event risk and NQ bars fetched concurrently; bounded by the slowest deadline."""
+    deadlines = {**BUNDLE_DEADLINES, **(deadlines or {})}
+    specs = {
+        "qqq_quote": (get_qqq_price_with_source, (finnhub_key,), deadlines["qqq_quote"], (None, "timeout")),
+        "options_snapshot": (get_options_snapshot, ("QQQ",), deadlines["options_snapshot"], None),
+        "market_data": (get_market_overview_yahoo, (), deadlines["market_data"], {}),
+        "event_risk": (get_event_risk_snapshot, (finnhub_key, 24), deadlines["event_risk"], None),
+        "nq_intraday": (get_nq_intraday_data, (), deadlines["nq_intraday"], None),
+        "nq_session_open": (get_nq_session_open, (), deadlines["nq_session_open"], None),
+    }
+    if include_nq:
+        specs["nq_quote"] = (get_nq_price_auto, (finnhub_key,), deadlines["nq_quote"], (None, "timeout"))
+    bundle = gather_bundle(specs)
+    st.session_state["diag::RERUN_BUNDLE"] = bundle.timings()
+    return bundle
+
+
 @st.cache_data(ttl=3600)
 def _get_market_caps(symbols):
     market_caps = {}
@@ -3230,53 +3894,26 @@ def get_expirations_by_type(df):
     return dte_0, weekly, monthly
 
 
-def calculate_delta_neutral(df, qqq_price):
-    df_calc = df.copy()
-    if "delta" not in df_calc.columns:
-        df_calc["delta"] = 0.0
-    # Normalize delta sign by option type so math is consistent across feeds.
-    # Some sources may emit put deltas as positive magnitudes.
-    df_calc["delta"] = pd.to_numeric(df_calc["delta"], errors="coerce").fillna(0.0)
-    call_mask = df_calc["type"].astype(str).str.lower().eq("call")
-    put_mask = df_calc["type"].astype(str).str.lower().eq("put")
-    df_calc.loc[call_mask, "delta"] = df_calc.loc[call_mask, "delta"].abs()
-    df_calc.loc[put_mask, "delta"] = -df_calc.loc[put_mask, "delta"].abs()
-    df_calc["delta"] = df_calc["delta"].clip(lower=-1.0, upper=1.0)
-
-    calls = df_calc[df_calc["type"] == "call"].copy()
-    calls["delta_notional"] = calls["open_interest"] * calls["delta"] * 100 * qqq_price
-
-    puts = df_calc[df_calc["type"] == "put"].copy()
-    puts["delta_notional"] = puts["open_interest"] * puts["delta"] * 100 * qqq_price
-
-    all_delta = pd.concat([calls, puts])
-    strike_delta = all_delta.groupby("strike")["delta_notional"].sum().reset_index()
-    strike_delta = strike_delta.sort_values("strike")
-    strike_delta["cumulative_delta"] = strike_delta["delta_notional"].cumsum()
-    dn_strike = None
-    for i in range(1, len(strike_delta)):
-        prev_val = float(strike_delta.iloc[i - 1]["cumulative_delta"])
-        curr_val = float(strike_delta.iloc[i]["cumulative_delta"])
-        if prev_val == 0:
-            dn_strike = float(strike_delta.iloc[i - 1]["strike"])
-            break
-        if curr_val == 0:
-            dn_strike = float(strike_delta.iloc[i]["strike"])
-            break
-        if prev_val * curr_val < 0:
-            x0 = float(strike_delta.iloc[i - 1]["strike"])
-            x1 = float(strike_delta.iloc[i]["strike"])
-            if curr_val != prev_val:
-                dn_strike = x0 + (0 - prev_val) * (x1 - x0) / (curr_val - prev_val)
-            else:
-                dn_strike = x0
-            break
-    if dn_strike is None:
-        min_idx = strike_delta["cumulative_delta"].abs().idxmin()
-        dn_strike = float(strike_delta.loc[min_idx, "strike"])
+def calculate_delta_neutral(df, qqq_price, return_crossings=False):
+    """Delta-neutral strike where cumulative per-strike delta notional crosses zero.
+
+    With `return_crossings=True` every crossing is returned as a fourth value (chains can flip more than once).
+    """
+    # Delta sign normalized by option type, since some feeds emit put deltas as positive magnitudes.
+    delta = signed_delta(df)
+    delta_exposure = df["open_interest"].to_numpy(dtype=float) * delta * 100
+    df_calc = df.assign(delta=delta, delta_exposure=delta_exposure)
 
-    df_calc["delta_exposure"] = df_calc["open_interest"] * df_calc["delta"] * 100
+    sd_strikes, sd_notional, sd_cumulative = strike_delta_notional(
+        df["strike"].to_numpy(dtype=float), df["type"].to_numpy(), delta_exposure, qqq_price
+    )
+    strike_delta = pd.DataFrame(
+        {"strike": sd_strikes, "delta_notional": sd_notional, "cumulative_delta": sd_cumulative}
+    )
+    dn_strike = first_zero_crossing(sd_strikes, sd_cumulative)
 
+    if return_crossings:
+        return dn_strike, strike_delta, df_calc, [float(x) for x in zero_crossings(sd_strikes, sd_cumulative)]
     return dn_strike, strike_delta, df_calc
 
 
@@ -3316,7 +3953,8 @@ def calculate_sentiment_score(data_0dte, nq_now, vix_level, fg_score):
     return max(0, min(100, score))
 
 
-@st.cache_data(ttl=10)
+@_collected
+@_swr_cached(ttl=10, max_stale=30)
 def get_futures_price(symbol):
     schwab_price, schwab_source = _get_schwab_futures_price(symbol)
     if schwab_price and schwab_price > 100 and _schwab_cross_source_ok(symbol, schwab_price):
@@ -3328,7 +3966,7 @@ def get_futures_price(symbol):
 
     try:
         ticker = yf.Ticker(symbol)
-        data = ticker.history(period="1d", interval="1m")
+        data = guarded_call("yfinance", ticker.history, period="1d", interval="1m", raise_errors=True)
         if not data.empty:
             _set_quote_meta(symbol, "yfinance")
             return float(data["Close"].iloc[-1]), "yfinance"
@@ -3337,62 +3975,217 @@ def get_futures_price(symbol):
     return None, "unavailable"
 
 
-@st.cache_data(ttl=90)
-def process_multi_asset():
-    assets_config = {
-        "SPY": {"ticker": "SPY", "futures": "ES=F", "name": "S&P 500"},
-        "QQQ": {"ticker": "QQQ", "futures": "NQ=F", "name": "Nasdaq"},
-        "IWM": {"ticker": "IWM", "futures": "RTY=F", "name": "Russell 2000"},
-        "DIA": {"ticker": "DIA", "futures": "YM=F", "name": "Dow Jones"},
-    }
+MULTI_ASSET_BASE = {
+    "SPY": {"ticker": "SPY", "futures": "ES=F", "name": "S&P 500"},
+    "QQQ": {"ticker": "QQQ", "futures": "NQ=F", "name": "Nasdaq"},
+    "IWM": {"ticker": "IWM", "futures": "RTY=F", "name": "Russell 2000"},
+    "DIA": {"ticker": "DIA", "futures": "YM=F", "name": "Dow Jones"},
+}
 
-    results = {}
 
-    for asset_name, config in assets_config.items():
-        try:
-            df_raw, etf_price = get_cboe_options(config["ticker"])
-            if df_raw is None or etf_price is None:
-                continue
+def _multi_asset_config():
+    """Base assets plus MULTI_ASSET_EXTRA, as a table or "SMH:NQ=F:Semis, XLK:NQ=F:Tech"."""
+    assets = {name: dict(cfg) for name, cfg in MULTI_ASSET_BASE.items()}
+    extra = _get_secret("MULTI_ASSET_EXTRA", "")
+    try:
+        if hasattr(extra, "items"):
+            entries = [
+                (str(name), str(cfg.get("futures", "")), str(cfg.get("name", name)))
+                for name, cfg in extra.items()
+            ]
+        else:
+            entries = []
+            for item in str(extra or "").split(","):
+                parts = [p.strip() for p in item.split(":")]
+                if len(parts) >= 2:
+                    entries.append((parts[0], parts[1], parts[2] if len(parts) > 2 else parts[0]))
+    except Exception:
+        entries = []
+    for ticker, futures, name in entries:
+        if ticker and futures:
+            assets[ticker.upper()] = {"ticker": ticker.upper(), "futures": futures.upper(), "name": name}
+    return assets
 
-            futures_price, source = get_futures_price(config["futures"])
-            if futures_price is None:
-                continue
 
-            ratio = futures_price / etf_price if etf_price > 0 else 0
-            exp_0dte, exp_weekly, _exp_monthly = get_expirations_by_type(df_raw)
+_COMPUTE_POOL = None
+_COMPUTE_POOL_READY = None
+_COMPUTE_POOL_LOCK = threading.Lock()
 
-            data_0dte = None
-            if exp_0dte:
-                data_0dte = process_expiration(
-                    df_raw, exp_0dte, etf_price, ratio, futures_price, options_ticker=config["ticker"]
-                )
 
-            data_weekly = None
-            if exp_weekly and exp_weekly != exp_0dte:
-                data_weekly = process_expiration(
-                    df_raw, exp_weekly, etf_price, ratio, futures_price, options_ticker=config["ticker"]
-                )
+def _compute_pool():
+    # Spawned (not forked) so workers never inherit the server's threads; kept until a worker dies.
+    global _COMPUTE_POOL, _COMPUTE_POOL_READY
+    workers = int(_get_secret("MULTI_ASSET_COMPUTE_PROCESSES", 2))
+    if workers <= 0:
+        return None
+    with _COMPUTE_POOL_LOCK:
+        if _COMPUTE_POOL is not None and any(f.done() and f.exception() is not None for f in _COMPUTE_POOL_READY):
+            _COMPUTE_POOL.shutdown(wait=False, cancel_futures=True)
+            _COMPUTE_POOL = None
+        if _COMPUTE_POOL is None:
+            _COMPUTE_POOL = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            # A spawned worker imports the whole app package first; compute inline until all have answered.
+            _COMPUTE_POOL_READY = [_COMPUTE_POOL.submit(_warm_compute_worker) for _ in range(workers)]
+        ready = all(f.done() and f.exception() is None for f in _COMPUTE_POOL_READY)
+        return _COMPUTE_POOL if ready else None
 
-            results[asset_name] = {
-                "name": config["name"],
-                "ticker": config["ticker"],
-                "futures_symbol": config["futures"],
-                "etf_price": etf_price,
-                "futures_price": futures_price,
-                "ratio": ratio,
-                "source": source,
-                "data_0dte": data_0dte,
-                "data_weekly": data_weekly,
-            }
 
-        except Exception as e:
-            st.warning(f"Could not process {asset_name}: {e}")
+def _reset_compute_pool(pool):
+    # A dead worker breaks the whole executor; drop it so the next call spawns a fresh one.
+    global _COMPUTE_POOL, _COMPUTE_POOL_READY
+    with _COMPUTE_POOL_LOCK:
+        if _COMPUTE_POOL is pool:
+            _COMPUTE_POOL = None
+            _COMPUTE_POOL_READY = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _warm_compute_worker():
+    # Touch the snapshot unpickle path (Arrow strings, categoricals) so the first real job is not the slow one.
+    probe = pd.DataFrame({"option": ["QQQ"], "type": ["call"], "expiration": [pd.Timestamp("2026-01-02")]})
+    return len(pickle.loads(pickle.dumps(ChainSnapshot(probe, 1.0, "warmup"))).df)
+
+
+def _timed_levels_for_chain(*args):
+    started = time.perf_counter()
+    payloads = levels_for_chain(*args)
+    return payloads, time.perf_counter() - started
+
+
+def _thread_pool(max_workers):
+    # Worker threads share the caller's script context so st.cache_data / session_state keep working.
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def _attach():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=_attach)
+
+
+def _timed_call(fn, *args):
+    started = time.perf_counter()
+    try:
+        return fn(*args), time.perf_counter() - started, None
+    except Exception as e:
+        return None, time.perf_counter() - started, e
+
+
+@st.cache_data(ttl=90)
+def process_multi_asset():
+    assets_config = _multi_asset_config()
+    started = time.perf_counter()
+    fetch_workers = max(1, int(_get_secret("MULTI_ASSET_FETCH_WORKERS", 8)))
+    errors = {}
+
+    # Network: every chain and futures quote in flight at once on a bounded pool.
+    with _thread_pool(min(fetch_workers, 2 * len(assets_config))) as pool:
+        fetches = {
+            name: (
+                pool.submit(_timed_call, get_options_snapshot, cfg["ticker"]),
+                pool.submit(_timed_call, get_futures_price, cfg["futures"]),
+            )
+            for name, cfg in assets_config.items()
+        }
+        fetched = {name: (f_chain.result(), f_fut.result()) for name, (f_chain, f_fut) in fetches.items()}
+
+    # CPU: level computation in worker processes, falling back to inline compute.
+    jobs = {}
+    for asset_name, config in assets_config.items():
+        (snapshot, chain_s, chain_err), (fut, fut_s, fut_err) = fetched[asset_name]
+        if chain_err or fut_err:
+            errors[asset_name] = chain_err or fut_err
+            continue
+        if snapshot is None or snapshot.spot is None:
             continue
+        futures_price, source = fut
+        if futures_price is None:
+            continue
+        etf_price = snapshot.spot
+        ratio = futures_price / etf_price if etf_price > 0 else 0
+        exp_0dte, exp_weekly, _exp_monthly = get_expirations_by_type(snapshot.df)
+        target_exps = tuple(exp for exp in (exp_0dte, exp_weekly) if exp)
+        options_health = get_dataset_freshness(
+            f"options:{str(config['ticker']).upper()}",
+            max_age_sec=int(_get_secret("OPTIONS_MAX_STALE_SECONDS", 180)),
+        )
+        jobs[asset_name] = {
+            "args": (snapshot, target_exps, etf_price, ratio, futures_price, options_health),
+            "exps": (exp_0dte, exp_weekly),
+            "quote": (etf_price, futures_price, ratio, source),
+            "fetch_s": max(chain_s, fut_s),
+        }
+
+    pool = compute_pool = _compute_pool() if len(jobs) > 1 else None
+    pending = {}
+    for asset_name, job in jobs.items():
+        if pool is None:
+            break
+        try:
+            pending[asset_name] = pool.submit(_timed_levels_for_chain, *job["args"])
+        except BrokenProcessPool:
+            _reset_compute_pool(pool)
+            pool = None
+        except Exception:
+            pool = None
+
+    results = {}
+    for asset_name, job in jobs.items():
+        payloads = None
+        compute_mode = "process"
+        if asset_name in pending:
+            try:
+                payloads, compute_s = pending[asset_name].result()
+            except BrokenProcessPool:
+                _reset_compute_pool(compute_pool)
+                payloads = None
+            except Exception:
+                payloads = None
+        if payloads is None:
+            compute_mode = "inline"
+            try:
+                payloads, compute_s = _timed_levels_for_chain(*job["args"])
+            except Exception as e:
+                errors[asset_name] = e
+                continue
+
+        exp_0dte, exp_weekly = job["exps"]
+        data_0dte = payloads.get(exp_0dte) if exp_0dte else None
+        data_weekly = None
+        if exp_weekly and exp_weekly != exp_0dte:
+            data_weekly = payloads.get(exp_weekly)
+
+        etf_price, futures_price, ratio, source = job["quote"]
+        config = assets_config[asset_name]
+        results[asset_name] = {
+            "name": config["name"],
+            "ticker": config["ticker"],
+            "futures_symbol": config["futures"],
+            "etf_price": etf_price,
+            "futures_price": futures_price,
+            "ratio": ratio,
+            "source": source,
+            "data_0dte": data_0dte,
+            "data_weekly": data_weekly,
+            "timing": {
+                "fetch_s": round(job["fetch_s"], 3),
+                "compute_s": round(compute_s, 3),
+                "total_s": round(time.perf_counter() - started, 3),
+                "compute_mode": compute_mode,
+            },
+        }
+
+    for asset_name, e in errors.items():
+        st.warning(f"Could not process {asset_name}: {e}")
 
     return results
 
 
-@st.cache_data(ttl=15)
+@_collected
+@_swr_cached(ttl=15, max_stale=120)
+@_coalesced
 def get_rss_news(finnhub_key=""):
     def _parse_news_dt_et(raw_value):
         if raw_value is None:
@@ -3464,7 +4257,7 @@ def get_rss_news(finnhub_key=""):
             return []
         out = []
         try:
-            client = finnhub.Client(api_key=api_key)
+            client = finnhub_client(api_key)
             news = client.general_news("general", min_id=0)
             if not isinstance(news, list):
                 return out
@@ -3496,11 +4289,10 @@ def get_rss_news(finnhub_key=""):
             "limit": 80,
         }
         try:
-            res = requests.get(
+            res = http_get(
+                "marketaux",
                 "https://api.marketaux.com/v1/news/all",
                 params=params,
-                timeout=10,
-                headers={"User-Agent": "Mozilla/5.0"},
             )
             if res.status_code != 200:
                 return out
@@ -3541,11 +4333,10 @@ def get_rss_news(finnhub_key=""):
             "limit": 80,
         }
         try:
-            res = requests.get(
+            res = http_get(
+                "thenewsapi",
                 "https://api.thenewsapi.com/v1/news/top",
                 params=params,
-                timeout=10,
-                headers={"User-Agent": "Mozilla/5.0"},
             )
             if res.status_code != 200:
                 return out
@@ -3575,11 +4366,11 @@ def get_rss_news(finnhub_key=""):
             return []
         out = []
         try:
-            res = requests.get(
+            res = http_get(
+                "fmp",
                 "https://financialmodelingprep.com/api/v3/stock_news",
                 params={"limit": 100, "apikey": api_key},
                 timeout=10,
-                headers={"User-Agent": "Mozilla/5.0"},
             )
             if res.status_code == 200:
                 payload = res.json()
@@ -3613,7 +4404,7 @@ def get_rss_news(finnhub_key=""):
         }
         for source_name, feed_url in feeds.items():
             try:
-                feed = feedparser.parse(feed_url)
+                feed = feedparser.parse(http_get("rss", feed_url).content)
                 for entry in feed.entries[:15]:
                     item = _build_item(
                         headline=entry.get("title", "No title"),
@@ -3688,7 +4479,7 @@ def _extract_earnings_whispers_calendar():
     url = "https://www.earningswhispers.com/calendar"
     rows = []
     try:
-        res = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+        res = http_get("earnings", url)
         if res.status_code != 200:
             return rows
         soup = BeautifulSoup(res.text, "html.parser")
@@ -3725,7 +4516,7 @@ def _extract_earnings_hub_calendar():
     rows = []
     for url in candidates:
         try:
-            res = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
+            res = http_get("earnings", url)
             if res.status_code != 200:
                 continue
             soup = BeautifulSoup(res.text, "html.parser")
@@ -3765,7 +4556,7 @@ def get_earnings_calendar_multi(finnhub_key, days=5, major_only=True):
 
     # Source 1: Finnhub earnings calendar
     try:
-        client = finnhub.Client(api_key=finnhub_key)
+        client = finnhub_client(finnhub_key)
         cal = client.earnings_calendar(_from=str(start_date), to=str(end_date), symbol="", international=False)
         for e in cal.get("earningsCalendar", []):
             sym = (e.get("symbol") or "").upper().strip()
@@ -3917,7 +4708,7 @@ def get_earnings_detail(symbol, finnhub_key):
     sym = detail["symbol"]
 
     try:
-        client = finnhub.Client(api_key=finnhub_key)
+        client = finnhub_client(finnhub_key)
         q = client.quote(sym)
         detail["price"] = q.get("c")
         detail["change"] = q.get("d")
@@ -3926,7 +4717,7 @@ def get_earnings_detail(symbol, finnhub_key):
         pass
 
     try:
-        client = finnhub.Client(api_key=finnhub_key)
+        client = finnhub_client(finnhub_key)
         p = client.company_profile2(symbol=sym)
         detail["name"] = p.get("name") or detail["name"]
         detail["market_cap"] = p.get("marketCapitalization")
@@ -3963,748 +4754,94 @@ def get_earnings_detail(symbol, finnhub_key):
     return detail
 
 
-@st.cache_data(ttl=90)
-def process_expiration(df_raw, target_exp, qqq_price, ratio, nq_now, options_ticker="QQQ"):
-    try:
-        exp_date = target_exp.date() if hasattr(target_exp, "date") else target_exp
-        dte_days = max(0, int((exp_date - datetime.now().date()).days))
-    except Exception:
-        dte_days = 0
-
-    df_exp = df_raw[df_raw["expiration"] == target_exp].copy()
-    df_exp = df_exp[df_exp["open_interest"] > 0].copy()
-    df_exp = df_exp[df_exp["iv"] > 0].copy()
-    if len(df_exp) == 0:
-        return None
+@st.cache_resource(ttl=180, max_entries=16, hash_funcs={ChainSnapshot: snapshot_fingerprint})
+def _snapshot_expiration_books(snapshot, target_exps):
+    # Shared (not copied) across sessions: books are read-only apart from their own locked memo.
+    return expiration_books(snapshot.df, target_exps)
 
-    df_exp["volume"] = df_exp["volume"].fillna(0)
-    liq_vol_weight = 0.55 if dte_days == 0 else 0.45 if dte_days <= 7 else 0.35
-    df_exp["liquidity"] = df_exp["open_interest"] + (liq_vol_weight * df_exp["volume"])
-
-    # Expected move first, then make strike window adaptive to current regime.
-    atm_strike = df_exp.iloc[(df_exp["strike"] - qqq_price).abs().argsort()[:1]]["strike"].values[0]
-    atm_opts = df_exp[(df_exp["strike"] >= qqq_price * 0.995) & (df_exp["strike"] <= qqq_price * 1.005)].copy()
-    if atm_opts.empty:
-        atm_opts = df_exp[df_exp["strike"] == atm_strike]
-    atm_call = atm_opts[atm_opts["type"] == "call"]
-    atm_put = atm_opts[atm_opts["type"] == "put"]
-
-    if len(atm_call) > 0 and len(atm_put) > 0:
-        call_mid = ((atm_call["bid"] + atm_call["ask"]) / 2).replace([float("inf"), -float("inf")], pd.NA).dropna().median()
-        put_mid = ((atm_put["bid"] + atm_put["ask"]) / 2).replace([float("inf"), -float("inf")], pd.NA).dropna().median()
-        call_mid = float(call_mid) if pd.notna(call_mid) else 0.0
-        put_mid = float(put_mid) if pd.notna(put_mid) else 0.0
-        straddle = call_mid + put_mid
-    else:
-        straddle = qqq_price * 0.012
-
-    nq_em_full = (straddle * 1.25 if straddle > 0 else qqq_price * 0.012) * ratio
-    nq_em_050 = nq_em_full * 0.50
-    nq_em_025 = nq_em_full * 0.25
-
-    etf_em_full = abs(float(nq_em_full / ratio)) if ratio not in (None, 0) else qqq_price * 0.012
-    em_pct = max(0.0025, float(etf_em_full / max(1.0, qqq_price)))
-    base_window_pct = max(0.025, min(0.12, (em_pct * 3.2) + 0.006))
-    if dte_days == 0:
-        strike_window_pct = max(0.02, min(0.07, base_window_pct))
-        liq_q = 0.40
-    elif dte_days <= 7:
-        strike_window_pct = max(0.03, min(0.095, base_window_pct))
-        liq_q = 0.35
-    else:
-        strike_window_pct = max(0.04, min(0.12, base_window_pct))
-        liq_q = 0.30
 
-    df = df_exp[
-        (df_exp["strike"] > qqq_price * (1.0 - strike_window_pct))
-        & (df_exp["strike"] < qqq_price * (1.0 + strike_window_pct))
-    ].copy()
-    if len(df) < 20:
-        widen_pct = min(0.14, strike_window_pct * 1.35)
-        df = df_exp[
-            (df_exp["strike"] > qqq_price * (1.0 - widen_pct))
-            & (df_exp["strike"] < qqq_price * (1.0 + widen_pct))
-        ].copy()
-        strike_window_pct = widen_pct
-    liq_cut = df["liquidity"].quantile(liq_q) if len(df) > 8 else 0
-    df = df[df["liquidity"] >= liq_cut].copy()
-
-    if len(df) == 0:
-        df = df_exp.sort_values("liquidity", ascending=False).head(120).copy()
-    if len(df) == 0:
-        return None
+def _levels_for_books(books, qqq_price, ratio, nq_now, options_ticker="QQQ"):
+    # Freshness penalty so stale options chains cannot present high confidence.
+    options_health = get_dataset_freshness(
+        f"options:{str(options_ticker).upper()}",
+        max_age_sec=int(_get_secret("OPTIONS_MAX_STALE_SECONDS", 180)),
+    )
+    return {
+        exp: compute_expiration_levels(book, qqq_price, ratio, nq_now, options_health)
+        for exp, book in books.items()
+    }
 
-    dn_strike, strike_delta, df = calculate_delta_neutral(df, qqq_price)
-    dn_nq = dn_strike * ratio
 
-    total_call_delta = df[df["type"] == "call"]["delta_exposure"].sum()
-    total_put_delta = df[df["type"] == "put"]["delta_exposure"].sum()
-    net_delta = total_call_delta + total_put_delta
+# Process-wide so every session sees the same level-cache hit/miss picture.
+_LEVEL_CACHE_LOCK = threading.Lock()
+_LEVEL_CACHE_STATS = {"lookups": 0, "misses": 0}
 
-    df["GEX"] = df.apply(
-        lambda x: x["open_interest"]
-        * x["gamma"]
-        * (qqq_price**2)
-        * 0.01
-        * (1 if x["type"] == "call" else -1),
-        axis=1,
-    )
 
-    calls = df[df["type"] == "call"].copy()
-    puts = df[df["type"] == "put"].copy()
-    call_strikes = (
-        calls.groupby("strike", as_index=False)
-        .agg(GEX=("GEX", "sum"), OI=("open_interest", "sum"), VOL=("volume", "sum"), LIQ=("liquidity", "sum"))
-    )
-    put_strikes = (
-        puts.groupby("strike", as_index=False)
-        .agg(GEX=("GEX", "sum"), OI=("open_interest", "sum"), VOL=("volume", "sum"), LIQ=("liquidity", "sum"))
-    )
-    calls = calls.sort_values("GEX", ascending=False)
-    puts = puts.sort_values("GEX", ascending=True)
+def _count_level_cache(event):
+    with _LEVEL_CACHE_LOCK:
+        _LEVEL_CACHE_STATS[event] += 1
 
-    dist_cap_pct = max(
-        0.02,
-        min(0.12, strike_window_pct * (1.10 if dte_days == 0 else 1.25)),
-    )
-    # Keep primary walls inside a practical intraday range around spot.
-    # This prevents far OI clusters from overpowering near-spot structure.
-    if dte_days == 0:
-        side_cap_pct = min(0.0090, max(0.0045, (em_pct * 0.70)))
-    elif dte_days <= 7:
-        side_cap_pct = min(0.0140, max(0.0060, (em_pct * 0.95)))
-    else:
-        side_cap_pct = min(0.0200, max(0.0085, (em_pct * 1.10)))
-    side_cap_abs = qqq_price * side_cap_pct
-
-    dist_decay = max(0.003, min(0.03, dist_cap_pct * 0.55))
-    uniq_strikes = sorted(df["strike"].dropna().unique().tolist())
-    if len(uniq_strikes) >= 2:
-        diffs = [b - a for a, b in zip(uniq_strikes[:-1], uniq_strikes[1:]) if (b - a) > 0]
-        strike_step = float(pd.Series(diffs).median()) if diffs else 0.5
-    else:
-        strike_step = 0.5
-    min_separation = max(strike_step, qqq_price * 0.0012)
 
-    def _prepare_strike_scores(frame, side):
-        if frame is None or frame.empty:
-            return pd.DataFrame(
-                columns=[
-                    "strike",
-                    "GEX",
-                    "OI",
-                    "VOL",
-                    "LIQ",
-                    "score",
-                    "confidence_score",
-                    "zone_confidence_score",
-                ]
-            )
-        out = frame.copy().sort_values("strike")
-        out["gex_abs"] = out["GEX"].abs()
-        out["dist_pct"] = (out["strike"] - qqq_price).abs() / max(1.0, qqq_price)
-        out["distance_score"] = out["dist_pct"].map(lambda d: math.exp(-float(d) / dist_decay))
-        out["prev_gex_abs"] = out["gex_abs"].shift(1).fillna(0.0)
-        out["next_gex_abs"] = out["gex_abs"].shift(-1).fillna(0.0)
-        out["cluster_gex_abs"] = out["gex_abs"] + (0.35 * out["prev_gex_abs"]) + (0.35 * out["next_gex_abs"])
-        out["zone_gex_abs"] = out["gex_abs"].rolling(window=5, min_periods=1, center=True).sum()
-        out["zone_liq"] = out["LIQ"].rolling(window=5, min_periods=1, center=True).sum()
-        out["zone_oi"] = out["OI"].rolling(window=5, min_periods=1, center=True).sum()
-        out["zone_signed_gex"] = out["GEX"].rolling(window=5, min_periods=1, center=True).sum()
-
-        max_gex = max(1.0, float(out["gex_abs"].max()))
-        max_cluster = max(1.0, float(out["cluster_gex_abs"].max()))
-        max_oi = max(1.0, float(out["OI"].max()))
-        max_vol = max(1.0, float(out["VOL"].max()))
-        max_liq = max(1.0, float(out["LIQ"].max()))
-        max_zone_gex = max(1.0, float(out["zone_gex_abs"].max()))
-        max_zone_oi = max(1.0, float(out["zone_oi"].max()))
-        max_zone_liq = max(1.0, float(out["zone_liq"].max()))
-
-        out["gex_strength"] = out["gex_abs"] / max_gex
-        out["cluster_strength"] = out["cluster_gex_abs"] / max_cluster
-        out["oi_strength"] = out["OI"] / max_oi
-        out["vol_strength"] = out["VOL"] / max_vol
-        out["liq_strength"] = out["LIQ"] / max_liq
-        out["zone_gex_strength"] = out["zone_gex_abs"] / max_zone_gex
-        out["zone_oi_strength"] = out["zone_oi"] / max_zone_oi
-        out["zone_liq_strength"] = out["zone_liq"] / max_zone_liq
-
-        if side == "call":
-            out["dir_factor"] = out["GEX"].map(lambda x: 1.0 if float(x) > 0 else 0.50)
-            out["zone_dir_factor"] = out["zone_signed_gex"].map(lambda x: 1.0 if float(x) > 0 else 0.50)
-        else:
-            out["dir_factor"] = out["GEX"].map(lambda x: 1.0 if float(x) < 0 else 0.50)
-            out["zone_dir_factor"] = out["zone_signed_gex"].map(lambda x: 1.0 if float(x) < 0 else 0.50)
-
-        base = (
-            (0.30 * out["gex_strength"])
-            + (0.24 * out["cluster_strength"])
-            + (0.22 * out["liq_strength"])
-            + (0.16 * out["oi_strength"])
-            + (0.08 * out["vol_strength"])
-        )
-        out["raw_score"] = 100.0 * base * out["dir_factor"]
-        out["zone_score"] = 100.0 * (
-            (0.46 * out["zone_gex_strength"])
-            + (0.34 * out["zone_liq_strength"])
-            + (0.20 * out["zone_oi_strength"])
-        ) * out["zone_dir_factor"]
-        out["score"] = ((0.58 * out["raw_score"]) + (0.42 * out["zone_score"])) * (
-            0.78 + (0.22 * out["distance_score"])
-        )
-        out["score"] = out["score"].fillna(0.0)
-        out["raw_confidence_score"] = (
-            100.0
-            * (
-                (0.28 * out["gex_strength"])
-                + (0.24 * out["cluster_strength"])
-                + (0.20 * out["liq_strength"])
-                + (0.18 * out["distance_score"])
-                + (0.10 * out["oi_strength"])
-            )
-            * out["dir_factor"]
-        )
-        out["zone_confidence_score"] = (
-            (0.55 * out["raw_confidence_score"]) + (0.45 * out["zone_score"])
-        )
-        out["confidence_score"] = (
-            (0.60 * out["raw_confidence_score"]) + (0.40 * out["zone_score"])
-        )
-        out["zone_confidence_score"] = out["zone_confidence_score"].fillna(0.0).clip(lower=0.0, upper=100.0)
-        out["confidence_score"] = out["confidence_score"].fillna(0.0).clip(lower=0.0, upper=100.0)
-        return (
-            out.sort_values(
-                ["zone_confidence_score", "confidence_score", "score", "dist_pct"],
-                ascending=[False, False, False, True],
-            )
-            .reset_index(drop=True)
-        )
+def get_level_cache_stats():
+    with _LEVEL_CACHE_LOCK:
+        lookups = int(_LEVEL_CACHE_STATS["lookups"])
+        misses = int(_LEVEL_CACHE_STATS["misses"])
+    hits = max(0, lookups - misses)
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": (hits / lookups) if lookups else None,
+    }
 
-    call_scored = _prepare_strike_scores(call_strikes, "call")
-    put_scored = _prepare_strike_scores(put_strikes, "put")
 
-    def _pick_primary(frame, prefer_above):
-        if frame is None or frame.empty:
-            return None
-        primary_pool = frame[frame["dist_pct"] <= dist_cap_pct]
-        directional = (
-            primary_pool[primary_pool["strike"] > qqq_price]
-            if prefer_above
-            else primary_pool[primary_pool["strike"] < qqq_price]
-        )
-        if directional.empty:
-            directional = (
-                frame[frame["strike"] > qqq_price]
-                if prefer_above
-                else frame[frame["strike"] < qqq_price]
-            )
-        if directional.empty:
-            directional = frame
-        directional = directional.sort_values(
-            ["zone_confidence_score", "confidence_score", "score", "dist_pct"],
-            ascending=[False, False, False, True],
-        )
-        top = directional.head(3).copy()
-        if len(top) >= 2:
-            gap = float(top.iloc[0]["zone_confidence_score"] - top.iloc[1]["zone_confidence_score"])
-            if gap < 2.5:
-                top = top.sort_values(
-                    ["dist_pct", "zone_confidence_score", "confidence_score"],
-                    ascending=[True, False, False],
-                )
-                return float(top.iloc[0]["strike"])
-        return float(top.iloc[0]["strike"])
-
-    def _pick_secondary(frame, primary_strike, direction):
-        if frame is None or frame.empty or primary_strike is None:
-            return primary_strike
-        if direction == "up":
-            pool = frame[
-                (frame["strike"] > (primary_strike + min_separation))
-                & (frame["dist_pct"] <= (dist_cap_pct * 1.35))
-            ]
-            if pool.empty:
-                pool = frame[frame["strike"] > (primary_strike + min_separation)]
-        else:
-            pool = frame[
-                (frame["strike"] < (primary_strike - min_separation))
-                & (frame["dist_pct"] <= (dist_cap_pct * 1.35))
-            ]
-            if pool.empty:
-                pool = frame[frame["strike"] < (primary_strike - min_separation)]
-        if pool.empty:
-            return primary_strike
-        pool = pool.sort_values(
-            ["zone_confidence_score", "confidence_score", "score", "dist_pct"],
-            ascending=[False, False, False, True],
-        )
-        return float(pool.iloc[0]["strike"])
-
-    def _score_for_strike(frame, strike_val, field="zone_confidence_score"):
-        if frame is None or frame.empty or strike_val is None:
-            return 0.0
-        idx = (frame["strike"] - float(strike_val)).abs().idxmin()
-        if field not in frame.columns:
-            field = "confidence_score"
-        try:
-            return float(frame.loc[idx, field])
-        except Exception:
-            return 0.0
-
-    p_wall_strike = _pick_primary(call_scored, prefer_above=True)
-    p_floor_strike = _pick_primary(put_scored, prefer_above=False)
-    if p_wall_strike is None:
-        p_wall_strike = qqq_price * 1.01
-    if p_floor_strike is None:
-        p_floor_strike = qqq_price * 0.99
-
-    # Cap primary wall/floor distance from spot to avoid over-wide ranges.
-    upper_cap = qqq_price + side_cap_abs
-    lower_cap = qqq_price - side_cap_abs
-    if p_wall_strike > upper_cap:
-        cap_pool = call_scored[
-            (call_scored["strike"] > qqq_price) & (call_scored["strike"] <= upper_cap)
-        ].copy()
-        if not cap_pool.empty:
-            cap_pool = cap_pool.sort_values(
-                ["zone_confidence_score", "confidence_score", "score", "dist_pct"],
-                ascending=[False, False, False, True],
-            )
-            p_wall_strike = float(cap_pool.iloc[0]["strike"])
-        else:
-            above = sorted(
-                [float(s) for s in calls["strike"].dropna().unique().tolist() if float(s) > qqq_price]
-            )
-            if above:
-                p_wall_strike = float(min(above, key=lambda s: abs(s - upper_cap)))
-    if p_floor_strike < lower_cap:
-        cap_pool = put_scored[
-            (put_scored["strike"] < qqq_price) & (put_scored["strike"] >= lower_cap)
-        ].copy()
-        if not cap_pool.empty:
-            cap_pool = cap_pool.sort_values(
-                ["zone_confidence_score", "confidence_score", "score", "dist_pct"],
-                ascending=[False, False, False, True],
-            )
-            p_floor_strike = float(cap_pool.iloc[0]["strike"])
-        else:
-            below = sorted(
-                [float(s) for s in puts["strike"].dropna().unique().tolist() if float(s) < qqq_price]
-            )
-            if below:
-                p_floor_strike = float(min(below, key=lambda s: abs(s - lower_cap)))
+@st.cache_data(ttl=90, hash_funcs={ChainSnapshot: snapshot_fingerprint})
+def _cached_expiration_levels(snapshot, target_exps, qqq_price, ratio, nq_now, options_ticker):
+    # Body only runs on a cache miss; lookups are counted by the public wrappers.
+    _count_level_cache("misses")
+    books = _snapshot_expiration_books(snapshot, target_exps)
+    payloads = _levels_for_books(books, qqq_price, ratio, nq_now, options_ticker)
+    # Stored compact: one cache entry per spot print adds up quickly.
+    return {exp: compact_level_payload(payload) for exp, payload in payloads.items()}
 
-    # Anchor primaries to strongest directional gamma walls/floors near spot.
-    def _pick_gamma_anchor(strike_frame, side, scored_frame=None):
-        if strike_frame is None or strike_frame.empty:
-            return None
-        frame = strike_frame.copy()
-        frame["gex_abs"] = frame["GEX"].abs()
-        frame["dist_pct"] = (frame["strike"] - qqq_price).abs() / max(1.0, qqq_price)
-        if side == "call":
-            frame = frame[
-                (frame["strike"] > qqq_price)
-                & (frame["strike"] <= upper_cap)
-                & (frame["GEX"] > 0)
-            ]
-        else:
-            frame = frame[
-                (frame["strike"] < qqq_price)
-                & (frame["strike"] >= lower_cap)
-                & (frame["GEX"] < 0)
-            ]
-        if frame.empty:
-            return None
-        gex_max = max(1.0, float(frame["gex_abs"].max()))
-        frame["gex_norm"] = frame["gex_abs"] / gex_max
-
-        struct_lookup = {}
-        if scored_frame is not None and not scored_frame.empty:
-            sf = scored_frame.copy()
-            sf["strike"] = pd.to_numeric(sf["strike"], errors="coerce")
-            sf = sf[sf["strike"].notna()].copy()
-            sf = sf.sort_values("strike")
-            for _, row in sf.iterrows():
-                struct_lookup[float(row["strike"])] = float(
-                    row.get("zone_confidence_score", row.get("confidence_score", row.get("score", 0.0)))
-                )
-        struct_max = max(1.0, max(struct_lookup.values())) if struct_lookup else 1.0
-
-        def _nearest_struct_norm(strike_val):
-            if not struct_lookup:
-                return 0.0
-            near = min(struct_lookup.keys(), key=lambda s: abs(float(s) - float(strike_val)))
-            return float(struct_lookup.get(near, 0.0)) / struct_max
-
-        frame["struct_norm"] = frame["strike"].map(_nearest_struct_norm)
-        # Balanced mode: 70% gamma anchor, 30% strike-structure confidence.
-        frame["blend_score"] = (0.70 * frame["gex_norm"]) + (0.30 * frame["struct_norm"])
-        frame = frame.sort_values(
-            ["blend_score", "gex_abs", "LIQ", "OI", "VOL"],
-            ascending=[False, False, False, False, False],
-        )
-        top = frame.head(3).copy()
-        if len(top) >= 2:
-            lead = float(top.iloc[0]["blend_score"])
-            nxt = float(top.iloc[1]["blend_score"])
-            if lead > 0 and ((lead - nxt) / lead) < 0.08:
-                top = top.sort_values(
-                    ["dist_pct", "blend_score", "gex_abs", "LIQ"],
-                    ascending=[True, False, False, False],
-                )
-        return float(top.iloc[0]["strike"])
-
-    gamma_wall_strike = _pick_gamma_anchor(call_strikes, side="call", scored_frame=call_scored)
-    gamma_floor_strike = _pick_gamma_anchor(put_strikes, side="put", scored_frame=put_scored)
-    if gamma_wall_strike is not None:
-        p_wall_strike = float(gamma_wall_strike)
-    if gamma_floor_strike is not None:
-        p_floor_strike = float(gamma_floor_strike)
-
-    # Guardrail: keep floor below wall; if violated, force directional picks.
-    if p_floor_strike >= p_wall_strike:
-        alt_wall = call_scored[call_scored["strike"] > qqq_price]
-        alt_floor = put_scored[put_scored["strike"] < qqq_price]
-        if not alt_wall.empty:
-            p_wall_strike = float(alt_wall.iloc[0]["strike"])
-        if not alt_floor.empty:
-            p_floor_strike = float(alt_floor.iloc[0]["strike"])
-        if p_floor_strike >= p_wall_strike:
-            below = sorted([float(s) for s in puts["strike"].dropna().unique().tolist() if float(s) < qqq_price])
-            above = sorted([float(s) for s in calls["strike"].dropna().unique().tolist() if float(s) > qqq_price])
-            p_floor_strike = (below[-1] if below else (qqq_price * 0.995))
-            p_wall_strike = (above[0] if above else (qqq_price * 1.005))
-
-    # Keep primary wall/floor span inside an expected-move-consistent band.
-    # This avoids both over-compression and over-expansion.
-    if dte_days == 0:
-        base_span_nq = max(float(nq_em_full) * 0.75, float(nq_now) * 0.0042)
-        min_span_nq = max(base_span_nq * 0.72, float(nq_now) * 0.0038)
-        max_span_nq = min(base_span_nq * 1.28, float(nq_now) * 0.0082)
-    elif dte_days <= 7:
-        base_span_nq = max(float(nq_em_full) * 0.82, float(nq_now) * 0.0052)
-        min_span_nq = max(base_span_nq * 0.74, float(nq_now) * 0.0046)
-        max_span_nq = min(base_span_nq * 1.34, float(nq_now) * 0.0108)
-    else:
-        base_span_nq = max(float(nq_em_full) * 0.90, float(nq_now) * 0.0062)
-        min_span_nq = max(base_span_nq * 0.76, float(nq_now) * 0.0054)
-        max_span_nq = min(base_span_nq * 1.38, float(nq_now) * 0.0138)
 
-    max_span_nq = max(float(max_span_nq), float(min_span_nq) + (float(nq_now) * 0.0012))
+def process_expirations(snapshot, target_exps, qqq_price, ratio, nq_now, options_ticker="QQQ"):
+    """Level payloads for several expirations from one pass over the chain, keyed by expiration.
 
-    min_span_strike = max(min_separation * 2.0, float(min_span_nq / max(1e-6, ratio)))
-    max_span_strike = max(min_span_strike + min_separation, float(max_span_nq / max(1e-6, ratio)))
-    current_span_strike = float(p_wall_strike - p_floor_strike)
+    Cached on the snapshot fingerprint, so a lookup never hashes the chain frame. Per-expiration
+    books live for the snapshot's lifetime, so a new spot/ratio/NQ print skips the chain scan and
+    the per-strike aggregation and only reruns distance-dependent scoring and the NQ mapping.
+    """
+    target_exps = tuple(exp for exp in target_exps if exp is not None)
+    _count_level_cache("lookups")
+    payloads = _cached_expiration_levels(snapshot, target_exps, qqq_price, ratio, nq_now, options_ticker)
+    return {exp: expand_level_payload(payload) for exp, payload in payloads.items()}
 
-    def _recenter_candidate(frame, current_strike, target_strike, mode):
-        if frame is None or frame.empty:
-            return current_strike
-        if mode == "widen_up":
-            pool = frame[frame["strike"] > current_strike].copy()
-        elif mode == "widen_down":
-            pool = frame[frame["strike"] < current_strike].copy()
-        elif mode == "tighten_down":
-            pool = frame[frame["strike"] < current_strike].copy()
-        else:  # tighten_up
-            pool = frame[frame["strike"] > current_strike].copy()
-        if pool.empty:
-            return current_strike
-        pool["score_core"] = pool.get(
-            "zone_confidence_score",
-            pool.get("confidence_score", pool.get("score", 0.0)),
-        )
-        max_core = max(1.0, float(pool["score_core"].max()))
-        pool["core_norm"] = pool["score_core"] / max_core
-        pool["target_dist"] = (pool["strike"] - float(target_strike)).abs()
-        # Prefer high-quality levels nearest the target widening point.
-        pool = pool.sort_values(
-            ["target_dist", "core_norm", "score", "dist_pct"],
-            ascending=[True, False, False, True],
-        )
-        near = pool.head(6).copy()
-        if near.empty:
-            return current_strike
-        near = near.sort_values(
-            ["core_norm", "score", "target_dist"],
-            ascending=[False, False, True],
-        )
-        return float(near.iloc[0]["strike"])
-
-    if current_span_strike < min_span_strike:
-        target_half = min_span_strike * 0.5
-        target_wall = float(qqq_price + target_half)
-        target_floor = float(qqq_price - target_half)
-        widened_wall = _recenter_candidate(call_scored, p_wall_strike, target_wall, "widen_up")
-        widened_floor = _recenter_candidate(put_scored, p_floor_strike, target_floor, "widen_down")
-        if widened_floor < widened_wall:
-            p_wall_strike = float(widened_wall)
-            p_floor_strike = float(widened_floor)
-    elif current_span_strike > max_span_strike:
-        target_half = max_span_strike * 0.5
-        target_wall = float(qqq_price + target_half)
-        target_floor = float(qqq_price - target_half)
-        tightened_wall = _recenter_candidate(call_scored, p_wall_strike, target_wall, "tighten_down")
-        tightened_floor = _recenter_candidate(put_scored, p_floor_strike, target_floor, "tighten_up")
-        # Keep directional validity after tightening.
-        if tightened_wall <= qqq_price:
-            candidates = call_scored[call_scored["strike"] > qqq_price].copy()
-            if not candidates.empty:
-                candidates = candidates.sort_values(
-                    ["dist_pct", "zone_confidence_score", "confidence_score", "score"],
-                    ascending=[True, False, False, False],
-                )
-                tightened_wall = float(candidates.iloc[0]["strike"])
-        if tightened_floor >= qqq_price:
-            candidates = put_scored[put_scored["strike"] < qqq_price].copy()
-            if not candidates.empty:
-                candidates = candidates.sort_values(
-                    ["dist_pct", "zone_confidence_score", "confidence_score", "score"],
-                    ascending=[True, False, False, False],
-                )
-                tightened_floor = float(candidates.iloc[0]["strike"])
-        if tightened_floor < tightened_wall:
-            p_wall_strike = float(tightened_wall)
-            p_floor_strike = float(tightened_floor)
-
-    current_span_nq = float((p_wall_strike - p_floor_strike) * ratio)
-
-    s_wall_strike = _pick_secondary(call_scored, p_wall_strike, direction="up")
-    s_floor_strike = _pick_secondary(put_scored, p_floor_strike, direction="down")
-
-    if s_floor_strike >= s_wall_strike:
-        s_floor_strike = p_floor_strike * 0.995
-        s_wall_strike = p_wall_strike * 1.005
-
-    primary_wall_conf_sel = _score_for_strike(call_scored, p_wall_strike)
-    secondary_wall_conf_sel = _score_for_strike(call_scored, s_wall_strike)
-    primary_floor_conf_sel = _score_for_strike(put_scored, p_floor_strike)
-    secondary_floor_conf_sel = _score_for_strike(put_scored, s_floor_strike)
-    min_primary_gap = 4.0 if dte_days == 0 else 3.0
-    wall_structure_compressed = (primary_wall_conf_sel - secondary_wall_conf_sel) < min_primary_gap
-    floor_structure_compressed = (primary_floor_conf_sel - secondary_floor_conf_sel) < min_primary_gap
-
-    gex_by_strike = df.groupby("strike", as_index=False)["GEX"].sum().sort_values("strike")
-    g_flip_strike = None
-    for i in range(1, len(gex_by_strike)):
-        prev_val = float(gex_by_strike.iloc[i - 1]["GEX"])
-        curr_val = float(gex_by_strike.iloc[i]["GEX"])
-        if prev_val == 0:
-            g_flip_strike = float(gex_by_strike.iloc[i - 1]["strike"])
-            break
-        if curr_val == 0:
-            g_flip_strike = float(gex_by_strike.iloc[i]["strike"])
-            break
-        if prev_val * curr_val < 0:
-            x0 = float(gex_by_strike.iloc[i - 1]["strike"])
-            x1 = float(gex_by_strike.iloc[i]["strike"])
-            if curr_val != prev_val:
-                g_flip_strike = x0 + (0 - prev_val) * (x1 - x0) / (curr_val - prev_val)
-            else:
-                g_flip_strike = x0
-            break
-    if g_flip_strike is None:
-        min_idx = gex_by_strike["GEX"].abs().idxmin()
-        g_flip_strike = float(gex_by_strike.loc[min_idx, "strike"])
-
-    # Confidence scoring for actionable levels based on nearby liquidity, gamma strength, and strike-structure score.
-    structure_score_by_strike = {}
-    for scored in (call_scored, put_scored):
-        if scored is None or scored.empty:
-            continue
-        for _, row in scored.iterrows():
-            strike_key = float(row["strike"])
-            prev = structure_score_by_strike.get(strike_key, 0.0)
-            structure_score_by_strike[strike_key] = max(prev, float(row.get("confidence_score", row.get("score", 0.0))))
-    max_structure_score = max(1.0, max(structure_score_by_strike.values())) if structure_score_by_strike else 1.0
-
-    strike_liq = df.groupby("strike")["liquidity"].sum()
-    strike_oi = df.groupby("strike")["open_interest"].sum()
-    max_liq = max(1.0, float(strike_liq.max())) if not strike_liq.empty else 1.0
-    max_oi = max(1.0, float(strike_oi.max())) if not strike_oi.empty else 1.0
-    max_abs_gex = max(1.0, float(gex_by_strike["GEX"].abs().max())) if not gex_by_strike.empty else 1.0
-
-    def _nearest_idx(values, x):
-        if len(values) == 0:
-            return None
-        return min(range(len(values)), key=lambda i: abs(values[i] - x))
-
-    def _nearest_structure_strength(strike_val):
-        if not structure_score_by_strike:
-            return 0.0
-        nearest = min(structure_score_by_strike.keys(), key=lambda s: abs(float(s) - float(strike_val)))
-        return float(structure_score_by_strike.get(nearest, 0.0)) / max_structure_score
-
-    gex_strikes = gex_by_strike["strike"].tolist()
-    gex_values = gex_by_strike["GEX"].tolist()
-    liq_strikes = strike_liq.index.tolist()
-    oi_strikes = strike_oi.index.tolist()
-
-    def _level_confidence(strike_val):
-        g_i = _nearest_idx(gex_strikes, strike_val)
-        l_i = _nearest_idx(liq_strikes, strike_val)
-        o_i = _nearest_idx(oi_strikes, strike_val)
-        if g_i is None or l_i is None or o_i is None:
-            return {
-                "score": 0,
-                "label": "Low",
-                "components": {
-                    "liq_strength": 0.0,
-                    "gex_strength": 0.0,
-                    "oi_strength": 0.0,
-                    "structure_strength": 0.0,
-                },
-            }
 
-        gex_strength = abs(float(gex_values[g_i])) / max_abs_gex
-        liq_strength = float(strike_liq.iloc[l_i]) / max_liq
-        oi_strength = float(strike_oi.iloc[o_i]) / max_oi
-        structure_strength = _nearest_structure_strength(strike_val)
-
-        score = int(
-            round(
-                100
-                * (
-                    (0.35 * liq_strength)
-                    + (0.25 * gex_strength)
-                    + (0.20 * oi_strength)
-                    + (0.20 * structure_strength)
-                )
-            )
-        )
-        score = max(0, min(100, score))
-        label = "High" if score >= 70 else "Medium" if score >= 45 else "Low"
-        return {
-            "score": score,
-            "label": label,
-            "components": {
-                "liq_strength": round(float(liq_strength), 4),
-                "gex_strength": round(float(gex_strength), 4),
-                "oi_strength": round(float(oi_strength), 4),
-                "structure_strength": round(float(structure_strength), 4),
-            },
-        }
+def process_expiration(snapshot, target_exp, qqq_price, ratio, nq_now, options_ticker="QQQ"):
+    payloads = process_expirations(snapshot, [target_exp], qqq_price, ratio, nq_now, options_ticker)
+    return payloads.get(target_exp)
 
-    level_confidence = {
-        "Delta Neutral": _level_confidence(dn_strike),
-        "Primary Wall": _level_confidence(p_wall_strike),
-        "Primary Floor": _level_confidence(p_floor_strike),
-        "Secondary Wall": _level_confidence(s_wall_strike),
-        "Secondary Floor": _level_confidence(s_floor_strike),
-        "Gamma Flip": _level_confidence(g_flip_strike),
-    }
-    level_confidence["Target Resistance"] = dict(level_confidence["Primary Wall"])
-    level_confidence["Target Support"] = dict(level_confidence["Primary Floor"])
-    level_confidence["Upper 0.50σ"] = {"score": 40, "label": "Low"}
-    level_confidence["Upper 0.25σ"] = {"score": 45, "label": "Medium"}
-    level_confidence["Lower 0.25σ"] = {"score": 45, "label": "Medium"}
-    level_confidence["Lower 0.50σ"] = {"score": 40, "label": "Low"}
-
-    # Blend in direct strike-selection confidence and enforce primary > secondary.
-    level_confidence["Primary Wall"]["score"] = int(
-        round((0.60 * level_confidence["Primary Wall"]["score"]) + (0.40 * primary_wall_conf_sel))
-    )
-    level_confidence["Secondary Wall"]["score"] = int(
-        round((0.60 * level_confidence["Secondary Wall"]["score"]) + (0.40 * secondary_wall_conf_sel))
-    )
-    level_confidence["Primary Floor"]["score"] = int(
-        round((0.60 * level_confidence["Primary Floor"]["score"]) + (0.40 * primary_floor_conf_sel))
-    )
-    level_confidence["Secondary Floor"]["score"] = int(
-        round((0.60 * level_confidence["Secondary Floor"]["score"]) + (0.40 * secondary_floor_conf_sel))
-    )
 
-    margin = int(max(3, round(min_primary_gap)))
-    if level_confidence["Primary Wall"]["score"] <= level_confidence["Secondary Wall"]["score"]:
-        level_confidence["Primary Wall"]["score"] = min(
-            100, level_confidence["Secondary Wall"]["score"] + margin
-        )
-    if level_confidence["Primary Floor"]["score"] <= level_confidence["Secondary Floor"]["score"]:
-        level_confidence["Primary Floor"]["score"] = min(
-            100, level_confidence["Secondary Floor"]["score"] + margin
+@st.cache_data(ttl=90, hash_funcs={ChainSnapshot: snapshot_fingerprint})
+def get_gamma_profile(snapshot, spot, ratio=None, grid_pct=0.06, points=200):
+    """Spot-sweep dealer gamma profile for the whole chain, with the zero-gamma level mapped to NQ."""
+    if snapshot is None or spot in (None, 0):
+        return None
+    try:
+        contracts = contract_arrays(snapshot.df)
+        profile = gamma_profile(contracts, float(spot), grid_pct=grid_pct, points=points)
+    except Exception:
+        return None
+    if profile is None:
+        return None
+    profile["source"] = snapshot.source
+    if ratio:
+        profile["nq_grid"] = profile["spot_grid"] * ratio
+        profile["zero_gamma_nq"] = (
+            profile["zero_gamma"] * ratio if profile["zero_gamma"] is not None else None
         )
-    if wall_structure_compressed:
-        level_confidence["Primary Wall"]["score"] = min(level_confidence["Primary Wall"]["score"], 68)
-        level_confidence["Secondary Wall"]["score"] = min(level_confidence["Secondary Wall"]["score"], 66)
-    if floor_structure_compressed:
-        level_confidence["Primary Floor"]["score"] = min(level_confidence["Primary Floor"]["score"], 68)
-        level_confidence["Secondary Floor"]["score"] = min(level_confidence["Secondary Floor"]["score"], 66)
-
-    for key in ["Primary Wall", "Secondary Wall", "Primary Floor", "Secondary Floor"]:
-        score_i = int(max(0, min(100, level_confidence[key]["score"])))
-        level_confidence[key]["score"] = score_i
-        level_confidence[key]["label"] = "High" if score_i >= 70 else "Medium" if score_i >= 45 else "Low"
-
-    # Freshness penalty so stale options chains cannot present high confidence.
-    options_health = get_dataset_freshness(
-        f"options:{str(options_ticker).upper()}",
-        max_age_sec=int(_get_secret("OPTIONS_MAX_STALE_SECONDS", 180)),
-    )
-    conf_mult = float(options_health.get("confidence_multiplier", 1.0))
-    for key, val in level_confidence.items():
-        base_score = int(val.get("score", 0))
-        adj_score = int(round(base_score * conf_mult))
-        adj_score = max(0, min(100, adj_score))
-        if adj_score >= 70:
-            adj_label = "High"
-        elif adj_score >= 45:
-            adj_label = "Medium"
-        else:
-            adj_label = "Low"
-        val["score_base"] = base_score
-        val["score"] = adj_score
-        val["label"] = adj_label
-
-    results = [
-        ("Target Resistance", (p_wall_strike * ratio) + 35, 3.0, "🎯"),
-        ("Primary Wall", p_wall_strike * ratio, 5.0, "🔴"),
-        ("Primary Floor", p_floor_strike * ratio, 5.0, "🟢"),
-        ("Target Support", (p_floor_strike * ratio) - 35, 3.0, "🎯"),
-        ("Secondary Wall", s_wall_strike * ratio, 3.0, "🟠"),
-        ("Secondary Floor", s_floor_strike * ratio, 3.0, "🟡"),
-        ("Gamma Flip", g_flip_strike * ratio, 10.0, "⚡"),
-        ("Delta Neutral", dn_nq, 5.0, "⚖️"),
-        ("Upper 0.50σ", nq_now + nq_em_050, 5.0, "📊"),
-        ("Upper 0.25σ", nq_now + nq_em_025, 3.0, "📊"),
-        ("Lower 0.25σ", nq_now - nq_em_025, 3.0, "📊"),
-        ("Lower 0.50σ", nq_now - nq_em_050, 5.0, "📊"),
-    ]
-
-    return {
-        "df": df,
-        "dn_strike": dn_strike,
-        "dn_nq": dn_nq,
-        "g_flip_strike": g_flip_strike,
-        "g_flip_nq": g_flip_strike * ratio,
-        "net_delta": net_delta,
-        "p_wall": p_wall_strike * ratio,
-        "p_floor": p_floor_strike * ratio,
-        "s_wall": s_wall_strike * ratio,
-        "s_floor": s_floor_strike * ratio,
-        "calls": calls,
-        "puts": puts,
-        "strike_delta": strike_delta,
-        "results": results,
-        "level_confidence": level_confidence,
-        "data_meta": {
-            "options_source": options_health.get("source", "CBOE"),
-            "options_asof_utc": options_health.get("asof_utc"),
-            "options_latency_s": options_health.get("latency_s"),
-            "options_freshness": options_health.get("status", "unknown"),
-            "confidence_multiplier": conf_mult,
-            "wall_model": "zone_v4_gamma_structure_blend",
-            "strike_window_pct": round(float(strike_window_pct), 4),
-            "primary_side_cap_pct": round(float(side_cap_pct), 4),
-            "min_primary_span_nq": round(float(min_span_nq), 2),
-            "max_primary_span_nq": round(float(max_span_nq), 2),
-            "current_primary_span_nq": round(float(current_span_nq), 2),
-            "liq_quantile": float(liq_q),
-            "structure_compressed": bool(wall_structure_compressed or floor_structure_compressed),
-        },
-        "straddle": straddle,
-        "nq_em_full": nq_em_full,
-        "atm_strike": atm_strike,
-    }
+    return profile
 
 
 @st.cache_data(ttl=14400)
@@ -10,20 +10,19 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 import streamlit.components.v1 as components
-import yfinance as yf
 
+from nq_precision.chain_snapshot import compact_level_payload, expand_level_payload
 from nq_precision.full_data import (
     calculate_sentiment_score,
+    clear_swr_caches,
     exchange_schwab_auth_code,
     generate_daily_bread,
-    get_cboe_options,
     get_cboe_options_live,
     get_dataset_freshness,
     get_earnings_calendar_multi,
     get_earnings_detail,
     get_economic_calendar,
     get_economic_calendar_window,
-    get_event_risk_snapshot,
     get_expirations_by_type,
     get_fear_greed_index,
     get_futures_breadth_internals,
@@ -31,25 +30,34 @@ from nq_precision.full_data import (
     get_initial_balance_backtest,
     get_futures_reference_levels,
     get_futures_opening_structure,
-    get_market_overview_yahoo,
     get_nasdaq_heatmap_data,
-    get_intraday_history,
-    get_nq_intraday_data,
     get_nq_price_auto,
+    get_intraday_history,
+    get_level_cache_stats,
+    get_gamma_profile,
+    get_options_snapshot,
+    get_http_pool_stats,
     get_quote_age_seconds,
+    get_quote_meta,
     get_quote_age_label,
     get_qqq_price_with_source,
+    get_rerun_bundle,
     get_runtime_health,
     get_rss_news,
+    get_schwab_stream_pair,
+    get_schwab_stream_stats,
+    get_schwab_token_stats,
+    get_single_flight_stats,
+    get_swr_stats,
     get_top_movers,
-    process_expiration,
+    process_expirations,
     process_multi_asset,
     schwab_is_configured,
 )
 
 
 def _quote_timestamp_ms(symbol):
-    meta = st.session_state.get(f"quote_meta::{symbol}", {}) or {}
+    meta = get_quote_meta(symbol)
     ts = meta.get("timestamp_ms")
     try:
         return int(ts) if ts else None
@@ -1985,6 +1993,49 @@ def _render_data_health_strip(nq_source, qqq_source, ratio_meta, data_0dte, mark
                     unsafe_allow_html=True,
                 )
 
+    level_cache = get_level_cache_stats()
+    hit_rate = level_cache.get("hit_rate")
+    st.caption(
+        f"Level engine cache: {level_cache.get('hits', 0)} hits • {level_cache.get('misses', 0)} misses • "
+        f"hit rate {f'{hit_rate:.0%}' if hit_rate is not None else 'n/a'}"
+    )
+    swr_stats = get_swr_stats().values()
+    swr_stale = sum(row["stale"] for row in swr_stats)
+    if swr_stale:
+        st.caption(
+            f"Background refresh: {swr_stale} stale serves • "
+            f"{sum(row['refreshes'] for row in swr_stats)} refreshes • "
+            f"{sum(row['errors'] for row in swr_stats)} errors • "
+            f"{sum(row['kept'] for row in swr_stats)} failed refreshes kept the last good value"
+        )
+    flight_stats = get_single_flight_stats()
+    coalesced = sum(row["coalesced"] for row in flight_stats.values())
+    if coalesced:
+        with st.expander(f"Request coalescing: {coalesced} calls shared an in-flight fetch", expanded=False):
+            st.dataframe(
+                pd.DataFrame([{"function": name, **row} for name, row in flight_stats.items()]),
+                width="stretch",
+                hide_index=True,
+            )
+    token_stats = get_schwab_token_stats()
+    if token_stats.get("refreshes") or token_stats.get("failures"):
+        st.caption(
+            f"Schwab token: {token_stats['refreshes']} refreshes • {token_stats['failures']} failures • "
+            f"{token_stats['coalesced']} coalesced • avg {token_stats['avg_refresh_ms']} ms • "
+            f"expires in {token_stats['expires_in_s']}s"
+        )
+    stream_stats = get_schwab_stream_stats()
+    if stream_stats:
+        st.caption(
+            f"Schwab stream: {'live' if stream_stats['live'] else 'down'} • {stream_stats['symbols']} symbols • "
+            f"{stream_stats['updates']} updates • {stream_stats['connects']} connects"
+            + (f" • last error: {stream_stats['last_error']}" if stream_stats["last_error"] else "")
+        )
+    http_rows = get_http_pool_stats()
+    if http_rows:
+        with st.expander("HTTP connection pool", expanded=False):
+            st.dataframe(pd.DataFrame(http_rows), width="stretch", hide_index=True)
+
 
 def _render_trade_plan_panel(playbook, data_0dte, nq_now, event_risk):
     st.markdown(
@@ -3733,6 +3784,7 @@ def _render_clean_dashboard(
     data_0dte,
     market_data,
     event_risk,
+    gamma_profile=None,
 ):
     st.markdown(
         '<div class="terminal-shell"><div class="terminal-header"><div class="terminal-title">🛰 Asset Command Strip</div></div><div class="terminal-body">',
@@ -3861,6 +3913,52 @@ def _render_clean_dashboard(
             st.info("QQQ gamma map unavailable.")
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+        st.markdown(
+            '<div class="terminal-shell"><div class="terminal-header"><div class="terminal-title">📈 Gamma Profile (Spot Sweep)</div></div><div class="terminal-body">',
+            unsafe_allow_html=True,
+        )
+        if gamma_profile and qqq_spot and qqq_spot > 0:
+            net_gex = gamma_profile["net_gex"]
+            fig_profile = go.Figure(
+                data=[
+                    go.Scatter(
+                        x=gamma_profile["spot_grid"],
+                        y=net_gex,
+                        mode="lines",
+                        line=dict(color="#8fb8ff", width=2),
+                        fill="tozeroy",
+                        fillcolor="rgba(143,184,255,0.12)",
+                        name="Net GEX",
+                    )
+                ]
+            )
+            fig_profile.add_hline(y=0, line_color="#7e90ab", line_dash="dot")
+            fig_profile.add_vline(
+                x=float(qqq_spot),
+                line_color="#38d7ff",
+                line_dash="dash",
+                annotation_text=f"QQQ Spot {float(qqq_spot):.2f}",
+            )
+            zero_gamma = _safe_float(gamma_profile.get("zero_gamma"), None)
+            if zero_gamma:
+                fig_profile.add_vline(
+                    x=zero_gamma, line_color="#ffd37f", line_dash="dot", annotation_text="Zero Gamma"
+                )
+            fig_profile.update_xaxes(title_text="Hypothetical QQQ Spot", tickformat=".2f")
+            fig_profile.update_yaxes(title_text="Net GEX")
+            _style_dashboard_figure(fig_profile, height=300, margin=dict(l=14, r=10, t=24, b=14))
+            st.plotly_chart(fig_profile, use_container_width=True)
+            zero_gamma_nq = _safe_float(gamma_profile.get("zero_gamma_nq"), None)
+            st.caption(
+                f"{gamma_profile.get('contracts', 0):,} contracts re-priced (Black-Scholes) • "
+                f"Zero gamma: {f'{zero_gamma:.2f} QQQ' if zero_gamma else 'outside grid'}"
+                f"{f' / {zero_gamma_nq:,.2f} NQ' if zero_gamma_nq else ''} • "
+                f"{len(gamma_profile.get('crossings') or [])} crossing(s) in range"
+            )
+        else:
+            st.info("Gamma profile unavailable.")
+        st.markdown("</div></div>", unsafe_allow_html=True)
+
     with side_col:
         st.markdown(
             '<div class="terminal-shell"><div class="terminal-header"><div class="terminal-title">🏦 Rates & Macro</div></div><div class="terminal-body">',
@@ -4921,7 +5019,11 @@ def run_full_app():
     feed_status = None
 
     with st.spinner("🔄 Loading multi-timeframe data..."):
-        qqq_price, qqq_source = get_qqq_price_with_source(finnhub_key)
+        bundle = get_rerun_bundle(finnhub_key, include_nq=not manual_override)
+        qqq_price, qqq_source = bundle.qqq_quote
+        if not qqq_price and bundle.timed_out("qqq_quote"):
+            # Past its deadline the fetch keeps running; wait on it (the call joins it) instead of failing the page.
+            qqq_price, qqq_source = get_qqq_price_with_source(finnhub_key)
         if not qqq_price:
             st.error("Could not fetch QQQ price")
             st.stop()
@@ -4937,7 +5039,9 @@ def run_full_app():
             )
             nq_source = "Manual"
         else:
-            nq_now, nq_source = get_nq_price_auto(finnhub_key)
+            nq_now, nq_source = bundle.nq_quote
+            if not nq_now and bundle.timed_out("nq_quote"):
+                nq_now, nq_source = get_nq_price_auto(finnhub_key)
             if not nq_now:
                 nq_now = st.sidebar.number_input(
                     "NQ Price (auto-fetch failed)",
@@ -4949,6 +5053,13 @@ def run_full_app():
                 )
                 nq_source = "Manual Fallback"
 
+        # Streamed ticks, when live, replace the polled pair with NQ and QQQ read as of the same instant.
+        stream_pair = get_schwab_stream_pair("NQ=F", "QQQ")
+        if stream_pair:
+            (stream_nq, stream_nq_source), (qqq_price, qqq_source), _skew_s = stream_pair
+            if not manual_override:
+                nq_now, nq_source = stream_nq, stream_nq_source
+
         feed_status_pre = _feed_runtime_status(
             nq_source=nq_source,
             qqq_source=qqq_source,
@@ -4964,20 +5075,17 @@ def run_full_app():
         )
         ratio = float(ratio_meta.get("ratio", 0.0) or 0.0)
         nq_day_change_pct = 0.0
-        try:
-            nq_hist = yf.Ticker("NQ=F").history(period="1d")
-            if not nq_hist.empty:
-                nq_prev_close = nq_hist["Open"].iloc[0]
-                nq_day_change_pct = (
-                    (nq_now - nq_prev_close) / nq_prev_close * 100 if nq_prev_close != 0 else 0
-                )
-        except Exception:
-            nq_day_change_pct = 0.0
-
-        df_raw, cboe_price = get_cboe_options("QQQ")
-        if df_raw is None:
+        nq_prev_close = bundle.nq_session_open
+        if nq_prev_close:
+            nq_day_change_pct = (nq_now - nq_prev_close) / nq_prev_close * 100
+
+        options_snapshot = bundle.options_snapshot
+        if options_snapshot is None and bundle.timed_out("options_snapshot"):
+            options_snapshot = get_options_snapshot("QQQ")
+        if options_snapshot is None:
             st.error("Failed to fetch options")
             st.stop()
+        df_raw, cboe_price = options_snapshot.df, options_snapshot.spot
 
         if qqq_price == 0:
             qqq_price = cboe_price
@@ -5009,11 +5117,12 @@ def run_full_app():
         data_0dte = None
         data_weekly = None
         data_monthly = None
+        gamma_profile = None
 
         if freeze_levels and cached_levels:
-            data_0dte = cached_levels.get("data_0dte")
-            data_weekly = cached_levels.get("data_weekly")
-            data_monthly = cached_levels.get("data_monthly")
+            data_0dte = expand_level_payload(cached_levels.get("data_0dte"))
+            data_weekly = expand_level_payload(cached_levels.get("data_weekly"))
+            data_monthly = expand_level_payload(cached_levels.get("data_monthly"))
             ratio = float(cached_levels.get("ratio", ratio) or ratio)
             ratio_meta = dict(ratio_meta or {})
             ratio_meta["ratio"] = ratio
@@ -5023,36 +5132,42 @@ def run_full_app():
         else:
             exp_0dte, exp_weekly, exp_monthly = get_expirations_by_type(df_raw)
 
+            level_payloads = process_expirations(
+                options_snapshot,
+                [exp_0dte, exp_weekly, exp_monthly],
+                qqq_price_levels,
+                ratio,
+                nq_now,
+                options_ticker="QQQ",
+            )
+
             if exp_0dte:
-                data_0dte = process_expiration(
-                    df_raw, exp_0dte, qqq_price_levels, ratio, nq_now, options_ticker="QQQ"
-                )
+                data_0dte = level_payloads.get(exp_0dte)
 
             if exp_weekly and exp_weekly != exp_0dte:
-                data_weekly = process_expiration(
-                    df_raw, exp_weekly, qqq_price_levels, ratio, nq_now, options_ticker="QQQ"
-                )
+                data_weekly = level_payloads.get(exp_weekly)
 
             if exp_monthly and exp_monthly not in [exp_0dte, exp_weekly]:
-                data_monthly = process_expiration(
-                    df_raw, exp_monthly, qqq_price_levels, ratio, nq_now, options_ticker="QQQ"
-                )
+                data_monthly = level_payloads.get(exp_monthly)
+
+            gamma_profile = get_gamma_profile(options_snapshot, qqq_price_levels, ratio)
 
             if data_0dte and not freeze_levels:
+                # Kept per browser session, so hold the compact schema.
                 st.session_state[levels_cache_key] = {
-                    "data_0dte": data_0dte,
-                    "data_weekly": data_weekly,
-                    "data_monthly": data_monthly,
+                    "data_0dte": compact_level_payload(data_0dte),
+                    "data_weekly": compact_level_payload(data_weekly),
+                    "data_monthly": compact_level_payload(data_monthly),
                     "ratio": float(ratio),
                     "saved_at": datetime.now().isoformat(),
                 }
 
-        market_data = get_market_overview_yahoo()
-        event_risk = get_event_risk_snapshot(finnhub_key, hours_ahead=24)
+        market_data = bundle.market_data
+        event_risk = bundle.event_risk
 
     nq_data = None
     if data_0dte:
-        nq_data = get_nq_intraday_data()
+        nq_data = bundle.nq_intraday
 
     nav_sections = {
         "Workspace": [("🏠 Dashboard", "🏠 Dashboard")],
@@ -5092,6 +5207,7 @@ def run_full_app():
                 data_0dte=data_0dte,
                 market_data=market_data,
                 event_risk=event_risk,
+                gamma_profile=gamma_profile,
             )
         elif active_view == "📊 NQ Level Builder":
             _render_nq_level_builder_panel(
@@ -5193,4 +5309,5 @@ def run_full_app():
     if st.sidebar.button("🔄 Refresh Now", use_container_width=True):
         st.session_state.last_refresh = time.time()
         st.cache_data.clear()
+        clear_swr_caches()
         st.rerun()
@@ -0,0 +1,130 @@
+"""Spot-sweep gamma profile: Black-Scholes gamma re-priced for every contract across a spot grid."""
+
+import math
+from datetime import datetime, time as dt_time
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+
+_ET = ZoneInfo("America/New_York")
+_YEAR_SECONDS = 365.0 * 24 * 3600
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+def contract_arrays(df, now=None, min_minutes=30.0):
+    """Profile inputs from a chain frame (OI>0 / IV>0 rows); expiries settle 16:00 ET.
+
+    `min_minutes` floors time to expiry so 0DTE gamma stays finite into the close.
+    """
+    if df is None or df.empty:
+        return None
+    live = df[(df["open_interest"] > 0) & (df["iv"] > 0) & df["type"].isin(["call", "put"])]
+    live = live[live["strike"] > 0]
+    if live.empty:
+        return None
+
+    now = now or datetime.now(_ET)
+    exp_days = pd.to_datetime(live["expiration"]).dt.normalize()
+    uniq_days, codes = np.unique(exp_days.to_numpy(), return_inverse=True)
+    settle = [
+        datetime.combine(pd.Timestamp(day).date(), dt_time(16, 0), tzinfo=_ET) for day in uniq_days
+    ]
+    t_uniq = np.array([(s - now).total_seconds() for s in settle]) / _YEAR_SECONDS
+    t_years = np.maximum(t_uniq, (min_minutes * 60.0) / _YEAR_SECONDS)[codes.ravel()]
+
+    iv = live["iv"].to_numpy(dtype=float)
+    return {
+        "strike": live["strike"].to_numpy(dtype=float),
+        "iv": iv,
+        "t_years": t_years,
+        "oi": live["open_interest"].to_numpy(dtype=float),
+        "sign": np.where(live["type"].to_numpy() == "call", 1.0, -1.0),
+    }
+
+
+def _profile_terms(contracts, rate):
+    # gamma * S^2 = S * exp(-d1^2 / 2) / (sqrt(2pi) * sigma * sqrt(T)); keep the per-contract parts.
+    vol = contracts["iv"] * np.sqrt(contracts["t_years"])
+    shift = (rate + 0.5 * contracts["iv"] ** 2) * contracts["t_years"] - np.log(contracts["strike"])
+    weight = contracts["oi"] * 0.01 * _INV_SQRT_2PI / vol
+    return vol, shift, weight
+
+
+def _net_gex_at(spot, vol, shift, signed_weight):
+    d1 = (math.log(spot) + shift) / vol
+    return spot * float(signed_weight @ np.exp(-0.5 * d1 * d1))
+
+
+def solve_zero_gamma(contracts, lo, hi, rate=0.0, tol=1e-6, max_iter=80):
+    """Spot where net dealer gamma exposure is zero inside [lo, hi] (bisection on the exact sum)."""
+    vol, shift, weight = _profile_terms(contracts, rate)
+    signed_weight = weight * contracts["sign"]
+    f_lo = _net_gex_at(lo, vol, shift, signed_weight)
+    f_hi = _net_gex_at(hi, vol, shift, signed_weight)
+    if f_lo == 0:
+        return float(lo)
+    if f_hi == 0:
+        return float(hi)
+    if f_lo * f_hi > 0:
+        return None
+    for _ in range(max_iter):
+        mid = 0.5 * (lo + hi)
+        f_mid = _net_gex_at(mid, vol, shift, signed_weight)
+        if f_mid == 0 or (hi - lo) <= tol * mid:
+            return float(mid)
+        if f_lo * f_mid < 0:
+            hi = mid
+        else:
+            lo, f_lo = mid, f_mid
+    return float(0.5 * (lo + hi))
+
+
+def gamma_profile(contracts, spot, grid_pct=0.06, points=200, rate=0.0, chunk_rows=4096):
+    """Call/put/net GEX over a spot grid (contracts x grid matrix, chunked), plus zero-gamma crossings.
+
+    GEX units match the level engine: OI * gamma * S^2 * 0.01, calls positive, puts negative.
+    """
+    if not contracts or len(contracts["strike"]) == 0 or not spot or spot <= 0:
+        return None
+
+    grid = np.linspace(spot * (1.0 - grid_pct), spot * (1.0 + grid_pct), int(points))
+    log_grid = np.log(grid)
+    vol, shift, weight = _profile_terms(contracts, rate)
+    is_call = contracts["sign"] > 0
+
+    call_gex = np.zeros(len(grid))
+    put_gex = np.zeros(len(grid))
+    for start in range(0, len(vol), chunk_rows):
+        part = slice(start, start + chunk_rows)
+        d1 = (log_grid[None, :] + shift[part, None]) / vol[part, None]
+        density = np.exp(-0.5 * d1 * d1)
+        w = weight[part]
+        c = is_call[part]
+        call_gex += np.where(c, w, 0.0) @ density
+        put_gex -= np.where(c, 0.0, w) @ density
+    call_gex *= grid
+    put_gex *= grid
+    net_gex = call_gex + put_gex
+
+    # Grid brackets the sign changes; each bracket is then solved on the exact (un-gridded) sum.
+    sign = np.sign(net_gex)
+    crossings = [float(x) for x in grid[sign == 0]]
+    for i in np.flatnonzero(sign[:-1] * sign[1:] < 0):
+        root = solve_zero_gamma(contracts, float(grid[i]), float(grid[i + 1]), rate=rate)
+        if root is not None:
+            crossings.append(root)
+    crossings.sort()
+    zero_gamma = min(crossings, key=lambda x: abs(x - spot)) if crossings else None
+
+    return {
+        "spot_grid": grid,
+        "call_gex": call_gex,
+        "put_gex": put_gex,
+        "net_gex": net_gex,
+        "net_gex_at_spot": _net_gex_at(spot, vol, shift, weight * contracts["sign"]),
+        "zero_gamma": zero_gamma,
+        "crossings": crossings,
+        "contracts": int(len(vol)),
+    }
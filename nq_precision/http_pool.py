@@ -0,0 +1,214 @@
+"""Process-shared pooled HTTP sessions: one keep-alive session per provider, with connection-reuse stats."""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import finnhub
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from nq_precision.provider_health import CircuitOpenError, provider_health
+
+
+BROWSER_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Per-provider defaults; call sites only pass what differs. pool_maxsize is connections kept per host.
+# breaker_per_host gives each host its own circuit (independent feeds behind one provider name).
+PROVIDERS = {
+    "schwab": {"timeout": 12, "headers": {}, "pool_maxsize": 16},
+    "yahoo": {"timeout": 5, "headers": BROWSER_HEADERS, "pool_maxsize": 16},
+    "cboe": {"timeout": 10, "headers": BROWSER_HEADERS, "pool_maxsize": 8},
+    "cnn": {"timeout": 5, "headers": {}},
+    "cftc": {"timeout": 15, "headers": BROWSER_HEADERS},
+    "forexfactory": {"timeout": 10, "headers": BROWSER_HEADERS},
+    "marketwatch": {"timeout": 12, "headers": {}},
+    "finviz": {"timeout": 12, "headers": {}},
+    "tradingeconomics": {"timeout": 12, "headers": BROWSER_HEADERS},
+    "fmp": {"timeout": 12, "headers": BROWSER_HEADERS},
+    "marketaux": {"timeout": 10, "headers": BROWSER_HEADERS},
+    "thenewsapi": {"timeout": 10, "headers": BROWSER_HEADERS},
+    "earnings": {"timeout": 10, "headers": BROWSER_HEADERS},
+    "rss": {"timeout": 8, "headers": BROWSER_HEADERS, "pool_connections": 16, "breaker_per_host": True},
+    "finnhub": {"timeout": 10, "headers": {"Accept": "application/json", "User-Agent": "finnhub/python"}},
+}
+DEFAULT_PROVIDER = {"timeout": 10, "headers": {}}
+
+_LOCK = threading.Lock()
+_SESSIONS = {}
+_STATS = {}
+# Connections opened by the current thread; a request that moved it opened a new one rather than reusing.
+_OPENED = threading.local()
+
+
+def _count_new_connection():
+    _OPENED.count = getattr(_OPENED, "count", 0) + 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count the connections they open (on the requesting thread)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def _provider(name):
+    return PROVIDERS.get(name, DEFAULT_PROVIDER)
+
+
+def provider_timeout(provider):
+    return float(_provider(provider)["timeout"])
+
+
+def get_session(provider, key=None):
+    """Shared session for a provider (and optional sub-key, e.g. an API token baked into the session)."""
+    slot = (provider, key)
+    with _LOCK:
+        session = _SESSIONS.get(slot)
+        if session is None:
+            cfg = _provider(provider)
+            session = requests.Session()
+            adapter = _CountingAdapter(
+                pool_connections=int(cfg.get("pool_connections", 4)),
+                pool_maxsize=int(cfg.get("pool_maxsize", 4)),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(cfg.get("headers") or {})
+            _SESSIONS[slot] = session
+        return session
+
+
+def _record(provider, elapsed, new_connection, failed):
+    with _LOCK:
+        row = _STATS.setdefault(
+            provider,
+            {"requests": 0, "errors": 0, "new": 0, "reused": 0, "new_s": 0.0, "reused_s": 0.0},
+        )
+        row["requests"] += 1
+        if failed:
+            row["errors"] += 1
+        elif new_connection:
+            row["new"] += 1
+            row["new_s"] += elapsed
+        else:
+            row["reused"] += 1
+            row["reused_s"] += elapsed
+
+
+def _health(provider, url):
+    cfg = _provider(provider)
+    name = provider
+    if cfg.get("breaker_per_host"):
+        name = f"{provider}:{urlparse(url).hostname}"
+    return provider_health(name, **cfg.get("breaker", {}))
+
+
+def http_request(provider, method, url, session=None, **kwargs):
+    """Pooled request under the provider's circuit breaker: raises CircuitOpenError at once while it is open."""
+    health = _health(provider, url)
+    admitted = health.allow()
+    if not admitted:
+        raise CircuitOpenError(f"{health.name} circuit open")
+    probe = admitted == "probe"
+    session = session or get_session(provider)
+    kwargs.setdefault("timeout", _provider(provider)["timeout"])
+    before = getattr(_OPENED, "count", 0)
+    started = time.perf_counter()
+    try:
+        response = session.request(method, url, **kwargs)
+    except BaseException:
+        # BaseException too: a Streamlit rerun/stop mid-probe must still hand the probe slot back.
+        elapsed = time.perf_counter() - started
+        health.record(elapsed, False, probe=probe)
+        _record(provider, elapsed, True, True)
+        raise
+    elapsed = time.perf_counter() - started
+    # 5xx and throttling count against the provider; other statuses mean it answered.
+    health.record(elapsed, response.status_code < 500 and response.status_code != 429, probe=probe)
+    new_connection = getattr(_OPENED, "count", 0) > before
+    _record(provider, elapsed, new_connection, False)
+    return response
+
+
+def http_get(provider, url, **kwargs):
+    return http_request(provider, "GET", url, **kwargs)
+
+
+def http_post(provider, url, **kwargs):
+    return http_request(provider, "POST", url, **kwargs)
+
+
+class _CountingSession:
+    """Session facade that routes through `http_request` (for clients that own their session object)."""
+
+    def __init__(self, provider, session):
+        self._provider = provider
+        self._session = session
+
+    def request(self, method, url, **kwargs):
+        return http_request(self._provider, method, url, session=self._session, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        # Shared session: clients closing it must not drop the pool for everyone else.
+        pass
+
+
+def finnhub_client(api_key):
+    """finnhub.Client riding the shared pool instead of its own per-client session."""
+    client = finnhub.Client(api_key=api_key)
+    session = get_session("finnhub", key=api_key)
+    session.params["token"] = api_key
+    client._session = _CountingSession("finnhub", session)
+    return client
+
+
+def get_http_pool_stats():
+    """Per-provider request counts, connection reuse, and estimated handshake time saved by reuse."""
+    with _LOCK:
+        stats = {name: dict(row) for name, row in _STATS.items()}
+    rows = []
+    for name, row in sorted(stats.items()):
+        avg_new = row["new_s"] / row["new"] if row["new"] else None
+        avg_reused = row["reused_s"] / row["reused"] if row["reused"] else None
+        saved_s = 0.0
+        if avg_new is not None and avg_reused is not None:
+            saved_s = max(0.0, avg_new - avg_reused) * row["reused"]
+        ok = row["new"] + row["reused"]
+        rows.append(
+            {
+                "provider": name,
+                "requests": row["requests"],
+                "errors": row["errors"],
+                "new_connections": row["new"],
+                "reused": row["reused"],
+                "reuse_rate": (row["reused"] / ok) if ok else None,
+                "avg_new_ms": round(avg_new * 1000, 1) if avg_new is not None else None,
+                "avg_reused_ms": round(avg_reused * 1000, 1) if avg_reused is not None else None,
+                "est_saved_s": round(saved_s, 2),
+            }
+        )
+    return rows
@@ -0,0 +1,902 @@
+"""NumPy level engine behind `process_expiration`: GEX, strike scoring, wall/floor picks."""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+RANK_KEYS = (
+    ("zone_confidence_score", False),
+    ("confidence_score", False),
+    ("score", False),
+    ("dist_pct", True),
+)
+
+
+def _order(table, keys, idx=None):
+    """Stable multi-key sort (same tie handling as DataFrame.sort_values with several keys)."""
+    if idx is None:
+        idx = np.arange(len(table["strike"]))
+    if len(idx) == 0:
+        return idx
+    cols = []
+    for name, ascending in reversed(keys):
+        vals = table[name][idx]
+        cols.append(vals if ascending else -vals)
+    return idx[np.lexsort(cols)]
+
+
+def _strike_groups(strikes):
+    return np.unique(strikes, return_inverse=True)
+
+
+def _sum_by_strike(groups, *values):
+    uniq, codes = groups
+    return [np.bincount(codes, weights=np.nan_to_num(v, nan=0.0), minlength=len(uniq)) for v in values]
+
+
+def _group_by_strike(strikes, *values):
+    groups = _strike_groups(strikes)
+    return groups[0], _sum_by_strike(groups, *values)
+
+
+def _centered_sum(values, window=5):
+    half = window // 2
+    padded = np.concatenate([np.zeros(half), values, np.zeros(half)])
+    out = np.zeros(len(values))
+    for offset in range(window):
+        out = out + padded[offset : offset + len(values)]
+    return out
+
+
+def _nearest(keys, x):
+    if len(keys) == 0:
+        return None
+    return int(np.argmin(np.abs(keys - float(x))))
+
+
+def zero_crossings(x, y):
+    """Every zero / sign change of y along x (linear interpolation), in x order."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2:
+        return np.empty(0)
+    sign = np.sign(y)
+    hits = np.flatnonzero(((np.diff(sign) != 0) | (sign[:-1] == 0)) & ~np.isnan(y[:-1] + y[1:]))
+    if len(hits) == 0:
+        return np.empty(0)
+    p, c = y[hits], y[hits + 1]
+    x0, x1 = x[hits], x[hits + 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        interp = np.where(c != p, x0 + (0 - p) * (x1 - x0) / (c - p), x0)
+    out = np.where(p == 0, x0, np.where(c == 0, x1, interp))
+    # A zero sitting on a grid point is reported by both of its neighbouring pairs.
+    return out[np.concatenate([[True], out[1:] != out[:-1]])]
+
+
+def first_zero_crossing(x, y):
+    """First zero / sign change of y along x (linear interpolation), else x at min |y|."""
+    if len(x) == 0:
+        return None
+    crossings = zero_crossings(x, y)
+    if len(crossings):
+        return float(crossings[0])
+    return float(x[int(np.argmin(np.abs(y)))])
+
+
+def score_strikes(strikes, gex, oi, vol, liq, spot, dist_decay, side):
+    """Per-strike wall/floor scores. Inputs are strike-sorted arrays; output rows are ranked."""
+    gex_abs = np.abs(gex)
+    dist_pct = np.abs(strikes - spot) / max(1.0, spot)
+    distance_score = np.exp(-dist_pct / dist_decay)
+    prev_gex_abs = np.concatenate([[0.0], gex_abs[:-1]]) if len(gex_abs) else gex_abs
+    next_gex_abs = np.concatenate([gex_abs[1:], [0.0]]) if len(gex_abs) else gex_abs
+    cluster_gex_abs = gex_abs + (0.35 * prev_gex_abs) + (0.35 * next_gex_abs)
+    zone_gex_abs = _centered_sum(gex_abs)
+    zone_liq = _centered_sum(liq)
+    zone_oi = _centered_sum(oi)
+    zone_signed_gex = _centered_sum(gex)
+
+    def _strength(values):
+        if len(values) == 0:
+            return values
+        return values / max(1.0, float(values.max()))
+
+    gex_strength = _strength(gex_abs)
+    cluster_strength = _strength(cluster_gex_abs)
+    oi_strength = _strength(oi)
+    vol_strength = _strength(vol)
+    liq_strength = _strength(liq)
+    zone_gex_strength = _strength(zone_gex_abs)
+    zone_oi_strength = _strength(zone_oi)
+    zone_liq_strength = _strength(zone_liq)
+
+    if side == "call":
+        dir_factor = np.where(gex > 0, 1.0, 0.50)
+        zone_dir_factor = np.where(zone_signed_gex > 0, 1.0, 0.50)
+    else:
+        dir_factor = np.where(gex < 0, 1.0, 0.50)
+        zone_dir_factor = np.where(zone_signed_gex < 0, 1.0, 0.50)
+
+    base = (
+        (0.30 * gex_strength)
+        + (0.24 * cluster_strength)
+        + (0.22 * liq_strength)
+        + (0.16 * oi_strength)
+        + (0.08 * vol_strength)
+    )
+    raw_score = 100.0 * base * dir_factor
+    zone_score = 100.0 * (
+        (0.46 * zone_gex_strength)
+        + (0.34 * zone_liq_strength)
+        + (0.20 * zone_oi_strength)
+    ) * zone_dir_factor
+    score = ((0.58 * raw_score) + (0.42 * zone_score)) * (0.78 + (0.22 * distance_score))
+    score = np.nan_to_num(score, nan=0.0)
+    raw_confidence_score = (
+        100.0
+        * (
+            (0.28 * gex_strength)
+            + (0.24 * cluster_strength)
+            + (0.20 * liq_strength)
+            + (0.18 * distance_score)
+            + (0.10 * oi_strength)
+        )
+        * dir_factor
+    )
+    zone_confidence_score = (0.55 * raw_confidence_score) + (0.45 * zone_score)
+    confidence_score = (0.60 * raw_confidence_score) + (0.40 * zone_score)
+    zone_confidence_score = np.clip(np.nan_to_num(zone_confidence_score, nan=0.0), 0.0, 100.0)
+    confidence_score = np.clip(np.nan_to_num(confidence_score, nan=0.0), 0.0, 100.0)
+
+    table = {
+        "strike": strikes,
+        "GEX": gex,
+        "OI": oi,
+        "VOL": vol,
+        "LIQ": liq,
+        "dist_pct": dist_pct,
+        "score": score,
+        "confidence_score": confidence_score,
+        "zone_confidence_score": zone_confidence_score,
+    }
+    ranked = _order(table, RANK_KEYS)
+    return {k: v[ranked] for k, v in table.items()}
+
+
+def _pick_primary(scored, spot, dist_cap_pct, prefer_above):
+    strikes = scored["strike"]
+    if len(strikes) == 0:
+        return None
+    side_mask = strikes > spot if prefer_above else strikes < spot
+    idx = np.flatnonzero((scored["dist_pct"] <= dist_cap_pct) & side_mask)
+    if len(idx) == 0:
+        idx = np.flatnonzero(side_mask)
+    if len(idx) == 0:
+        idx = np.arange(len(strikes))
+    top = idx[:3]
+    if len(top) >= 2:
+        gap = float(scored["zone_confidence_score"][top[0]] - scored["zone_confidence_score"][top[1]])
+        if gap < 2.5:
+            top = _order(
+                scored,
+                (("dist_pct", True), ("zone_confidence_score", False), ("confidence_score", False)),
+                top,
+            )
+    return float(strikes[top[0]])
+
+
+def _pick_secondary(scored, primary_strike, direction, dist_cap_pct, min_separation):
+    strikes = scored["strike"]
+    if len(strikes) == 0 or primary_strike is None:
+        return primary_strike
+    if direction == "up":
+        side_mask = strikes > (primary_strike + min_separation)
+    else:
+        side_mask = strikes < (primary_strike - min_separation)
+    idx = np.flatnonzero(side_mask & (scored["dist_pct"] <= (dist_cap_pct * 1.35)))
+    if len(idx) == 0:
+        idx = np.flatnonzero(side_mask)
+    if len(idx) == 0:
+        return primary_strike
+    return float(strikes[idx[0]])
+
+
+def _score_for_strike(scored, strike_val):
+    if len(scored["strike"]) == 0 or strike_val is None:
+        return 0.0
+    return float(scored["zone_confidence_score"][_nearest(scored["strike"], strike_val)])
+
+
+def _pick_gamma_anchor(strikes, gex, oi, vol, liq, scored, side, spot, upper_cap, lower_cap):
+    if len(strikes) == 0:
+        return None
+    if side == "call":
+        mask = (strikes > spot) & (strikes <= upper_cap) & (gex > 0)
+    else:
+        mask = (strikes < spot) & (strikes >= lower_cap) & (gex < 0)
+    if not mask.any():
+        return None
+    gex_abs = np.abs(gex[mask])
+    frame = {
+        "strike": strikes[mask],
+        "gex_abs": gex_abs,
+        "dist_pct": np.abs(strikes[mask] - spot) / max(1.0, spot),
+        "LIQ": liq[mask],
+        "OI": oi[mask],
+        "VOL": vol[mask],
+    }
+    gex_norm = gex_abs / max(1.0, float(gex_abs.max()))
+
+    struct_norm = np.zeros(len(gex_abs))
+    if len(scored["strike"]):
+        by_strike = np.argsort(scored["strike"], kind="stable")
+        struct_keys = scored["strike"][by_strike]
+        struct_vals = scored["zone_confidence_score"][by_strike]
+        struct_max = max(1.0, float(struct_vals.max()))
+        near = np.argmin(np.abs(frame["strike"][:, None] - struct_keys[None, :]), axis=1)
+        struct_norm = struct_vals[near] / struct_max
+
+    # Balanced mode: 70% gamma anchor, 30% strike-structure confidence.
+    frame["blend_score"] = (0.70 * gex_norm) + (0.30 * struct_norm)
+    top = _order(
+        frame,
+        (("blend_score", False), ("gex_abs", False), ("LIQ", False), ("OI", False), ("VOL", False)),
+    )[:3]
+    if len(top) >= 2:
+        lead = float(frame["blend_score"][top[0]])
+        nxt = float(frame["blend_score"][top[1]])
+        if lead > 0 and ((lead - nxt) / lead) < 0.08:
+            top = _order(
+                frame,
+                (("dist_pct", True), ("blend_score", False), ("gex_abs", False), ("LIQ", False)),
+                top,
+            )
+    return float(frame["strike"][top[0]])
+
+
+def _recenter_candidate(scored, current_strike, target_strike, mode):
+    strikes = scored["strike"]
+    if len(strikes) == 0:
+        return current_strike
+    if mode in ("widen_up", "tighten_up"):
+        idx = np.flatnonzero(strikes > current_strike)
+    else:
+        idx = np.flatnonzero(strikes < current_strike)
+    if len(idx) == 0:
+        return current_strike
+    core = scored["zone_confidence_score"][idx]
+    pool = {
+        "strike": strikes[idx],
+        "core_norm": core / max(1.0, float(core.max())),
+        "target_dist": np.abs(strikes[idx] - float(target_strike)),
+        "score": scored["score"][idx],
+        "dist_pct": scored["dist_pct"][idx],
+    }
+    # Prefer high-quality levels nearest the target widening point.
+    near = _order(
+        pool,
+        (("target_dist", True), ("core_norm", False), ("score", False), ("dist_pct", True)),
+    )[:6]
+    near = _order(pool, (("core_norm", False), ("score", False), ("target_dist", True)), near)
+    return float(pool["strike"][near[0]])
+
+
+def _nearest_directional(scored, spot, above):
+    strikes = scored["strike"]
+    idx = np.flatnonzero(strikes > spot if above else strikes < spot)
+    if len(idx) == 0:
+        return None
+    idx = _order(
+        scored,
+        (("dist_pct", True), ("zone_confidence_score", False), ("confidence_score", False), ("score", False)),
+        idx,
+    )
+    return float(strikes[idx[0]])
+
+
+def _first_ranked(scored, mask):
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return None
+    return float(scored["strike"][idx[0]])
+
+
+def _closest_strike(strikes, target, above):
+    pool = np.unique(strikes[strikes > target[0]] if above else strikes[strikes < target[0]])
+    if len(pool) == 0:
+        return None
+    return float(pool[int(np.argmin(np.abs(pool - target[1])))])
+
+
+def _select_expiration_rows(strike, liquidity, qqq_price, dte_days, em_pct):
+    """Adaptive strike window plus liquidity quantile cut; returns row positions and window stats."""
+    base_window_pct = max(0.025, min(0.12, (em_pct * 3.2) + 0.006))
+    if dte_days == 0:
+        strike_window_pct = max(0.02, min(0.07, base_window_pct))
+        liq_q = 0.40
+    elif dte_days <= 7:
+        strike_window_pct = max(0.03, min(0.095, base_window_pct))
+        liq_q = 0.35
+    else:
+        strike_window_pct = max(0.04, min(0.12, base_window_pct))
+        liq_q = 0.30
+
+    rows = np.flatnonzero(
+        (strike > qqq_price * (1.0 - strike_window_pct)) & (strike < qqq_price * (1.0 + strike_window_pct))
+    )
+    if len(rows) < 20:
+        widen_pct = min(0.14, strike_window_pct * 1.35)
+        rows = np.flatnonzero((strike > qqq_price * (1.0 - widen_pct)) & (strike < qqq_price * (1.0 + widen_pct)))
+        strike_window_pct = widen_pct
+    liq_cut = float(np.quantile(liquidity[rows], liq_q)) if len(rows) > 8 else 0
+    rows = rows[liquidity[rows] >= liq_cut]
+    return rows, strike_window_pct, liq_q
+
+
+def signed_delta(df):
+    delta = df["delta"] if "delta" in df.columns else pd.Series(0.0, index=df.index)
+    delta = pd.to_numeric(delta, errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    # Normalize delta sign by option type so math is consistent across feeds.
+    type_l = df["type"].astype(str).str.lower()
+    delta = np.where(type_l.eq("call").to_numpy(), np.abs(delta), delta)
+    delta = np.where(type_l.eq("put").to_numpy(), -np.abs(delta), delta)
+    return np.clip(delta, -1.0, 1.0)
+
+
+def strike_delta_notional(strike, option_type, delta_exposure, spot):
+    """Strike-sorted per-strike delta notional (calls, then puts) and its running sum."""
+    valid = ~np.isnan(strike)
+    side_rows = np.concatenate(
+        [np.flatnonzero((option_type == "call") & valid), np.flatnonzero((option_type == "put") & valid)]
+    )
+    sd_strikes, (sd_notional,) = _group_by_strike(strike[side_rows], delta_exposure[side_rows] * spot)
+    return sd_strikes, sd_notional, np.cumsum(sd_notional)
+
+
+def chain_columns(df):
+    """Engine input arrays for a chain frame; extract once and slice per expiration."""
+    return {
+        "strike": df["strike"].to_numpy(dtype=float),
+        "open_interest": df["open_interest"].to_numpy(dtype=float),
+        "volume": df["volume"].fillna(0).to_numpy(dtype=float),
+        "type": df["type"].to_numpy(),
+        "bid": df["bid"].to_numpy(dtype=float),
+        "ask": df["ask"].to_numpy(dtype=float),
+        "gamma": df["gamma"].to_numpy(dtype=float),
+        "delta": signed_delta(df),
+    }
+
+
+def slice_columns(columns, positions):
+    return {k: v[positions] for k, v in columns.items()}
+
+
+class ExpirationBook:
+    """Spot-independent state for one expiration of one chain snapshot.
+
+    Holds the engine arrays plus the per-strike aggregates for each row selection seen so far,
+    so a spot/ratio update only reruns the distance-dependent scoring and the NQ mapping.
+    """
+
+    __slots__ = ("df_exp", "columns", "dte_days", "liquidity", "_aggregates", "_lock")
+
+    max_selections = 8
+
+    def __init__(self, df_exp, dte_days, columns=None):
+        self.df_exp = df_exp
+        self.columns = columns if columns is not None else chain_columns(df_exp)
+        self.dte_days = int(dte_days)
+        liq_vol_weight = 0.55 if dte_days == 0 else 0.45 if dte_days <= 7 else 0.35
+        self.liquidity = self.columns["open_interest"] + (liq_vol_weight * self.columns["volume"])
+        self._aggregates = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df_exp)
+
+    def aggregates(self, rows):
+        """Per-strike aggregates for a row selection; built once, then shared by every spot."""
+        key = rows.tobytes()
+        with self._lock:
+            agg = self._aggregates.get(key)
+        if agg is not None:
+            return agg
+        agg = _strike_aggregates(self, rows)
+        with self._lock:
+            if len(self._aggregates) >= self.max_selections:
+                self._aggregates.pop(next(iter(self._aggregates)))
+            self._aggregates[key] = agg
+        return agg
+
+
+def _strike_aggregates(book, rows):
+    columns = book.columns
+    strike = columns["strike"][rows]
+    oi = columns["open_interest"][rows]
+    vol = columns["volume"][rows]
+    liquidity = book.liquidity[rows]
+    type_sel = columns["type"][rows]
+    is_call = type_sel == "call"
+    is_put = type_sel == "put"
+    delta = columns["delta"][rows]
+    delta_exposure = oi * delta * 100
+
+    df = book.df_exp.iloc[rows].copy()
+    df["volume"] = df["volume"].fillna(0)
+    df["liquidity"] = liquidity
+    df["delta"] = delta
+    df["delta_exposure"] = delta_exposure
+
+    side_rows = np.concatenate([np.flatnonzero(is_call), np.flatnonzero(is_put)])
+    call_groups = _strike_groups(strike[is_call])
+    put_groups = _strike_groups(strike[is_put])
+    all_groups = _strike_groups(strike)
+    c_oi, c_vol, c_liq = _sum_by_strike(call_groups, oi[is_call], vol[is_call], liquidity[is_call])
+    p_oi, p_vol, p_liq = _sum_by_strike(put_groups, oi[is_put], vol[is_put], liquidity[is_put])
+    strike_liq, strike_oi = _sum_by_strike(all_groups, liquidity, oi)
+
+    uniq_strikes = np.unique(strike[~np.isnan(strike)])
+    diffs = np.diff(uniq_strikes)
+    diffs = diffs[diffs > 0]
+
+    return {
+        "df": df,
+        "strike": strike,
+        "is_call": is_call,
+        "is_put": is_put,
+        "side": np.where(is_call, 1, -1),
+        "oi_gamma": oi * columns["gamma"][rows],
+        "delta_exposure": delta_exposure,
+        "net_delta": delta_exposure[is_call].sum() + delta_exposure[is_put].sum(),
+        "side_rows": side_rows,
+        "side_groups": _strike_groups(strike[side_rows]),
+        "call_groups": call_groups,
+        "put_groups": put_groups,
+        "all_groups": all_groups,
+        "calls": (c_oi, c_vol, c_liq),
+        "puts": (p_oi, p_vol, p_liq),
+        "strike_liq": strike_liq,
+        "strike_oi": strike_oi,
+        "strike_step": float(np.median(diffs)) if len(diffs) else 0.5,
+    }
+
+
+def compute_expiration_levels(book, qqq_price, ratio, nq_now, options_health):
+    """Level payload for one `ExpirationBook` (rows already OI>0 / IV>0 filtered) at the given spot."""
+    if book is None or len(book) == 0:
+        return None
+
+    columns = book.columns
+    dte_days = book.dte_days
+    strike_all = columns["strike"]
+    liquidity_all = book.liquidity
+    type_all = columns["type"]
+
+    # Expected move first, then make strike window adaptive to current regime.
+    atm_strike = strike_all[np.argsort(np.abs(strike_all - qqq_price))[0]]
+    atm_mask = (strike_all >= qqq_price * 0.995) & (strike_all <= qqq_price * 1.005)
+    if not atm_mask.any():
+        atm_mask = strike_all == atm_strike
+    atm_call = atm_mask & (type_all == "call")
+    atm_put = atm_mask & (type_all == "put")
+
+    if atm_call.any() and atm_put.any():
+        mid_all = (columns["bid"] + columns["ask"]) / 2
+
+        def _median_mid(mask):
+            vals = mid_all[mask]
+            vals = vals[np.isfinite(vals)]
+            return float(np.median(vals)) if len(vals) else 0.0
+
+        straddle = _median_mid(atm_call) + _median_mid(atm_put)
+    else:
+        straddle = qqq_price * 0.012
+
+    nq_em_full = (straddle * 1.25 if straddle > 0 else qqq_price * 0.012) * ratio
+    nq_em_050 = nq_em_full * 0.50
+    nq_em_025 = nq_em_full * 0.25
+
+    etf_em_full = abs(float(nq_em_full / ratio)) if ratio not in (None, 0) else qqq_price * 0.012
+    em_pct = max(0.0025, float(etf_em_full / max(1.0, qqq_price)))
+
+    rows, strike_window_pct, liq_q = _select_expiration_rows(
+        strike_all, liquidity_all, qqq_price, dte_days, em_pct
+    )
+    if len(rows) == 0:
+        by_liquidity = pd.Series(liquidity_all).sort_values(ascending=False)
+        rows = by_liquidity.index.to_numpy()[:120]
+    if len(rows) == 0:
+        return None
+
+    # Everything above the selection is spot-cheap; aggregates below are shared per selection.
+    agg = book.aggregates(rows)
+    strike = agg["strike"]
+    is_call = agg["is_call"]
+    is_put = agg["is_put"]
+
+    delta_notional = agg["delta_exposure"] * qqq_price
+    side_rows = agg["side_rows"]
+    sd_strikes = agg["side_groups"][0]
+    (sd_notional,) = _sum_by_strike(agg["side_groups"], delta_notional[side_rows])
+    sd_cumulative = np.cumsum(sd_notional)
+    dn_strike = first_zero_crossing(sd_strikes, sd_cumulative)
+    strike_delta = pd.DataFrame(
+        {"strike": sd_strikes, "delta_notional": sd_notional, "cumulative_delta": sd_cumulative}
+    )
+    dn_nq = dn_strike * ratio
+    net_delta = agg["net_delta"]
+
+    gex = agg["oi_gamma"] * (qqq_price**2) * 0.01 * agg["side"]
+    df = agg["df"].copy()
+    df["GEX"] = gex
+
+    c_strikes = agg["call_groups"][0]
+    p_strikes = agg["put_groups"][0]
+    (c_gex,) = _sum_by_strike(agg["call_groups"], gex[is_call])
+    (p_gex,) = _sum_by_strike(agg["put_groups"], gex[is_put])
+    c_oi, c_vol, c_liq = agg["calls"]
+    p_oi, p_vol, p_liq = agg["puts"]
+    calls = df[is_call].sort_values("GEX", ascending=False)
+    puts = df[is_put].sort_values("GEX", ascending=True)
+
+    dist_cap_pct = max(
+        0.02,
+        min(0.12, strike_window_pct * (1.10 if dte_days == 0 else 1.25)),
+    )
+    # Keep primary walls inside a practical intraday range around spot.
+    # This prevents far OI clusters from overpowering near-spot structure.
+    if dte_days == 0:
+        side_cap_pct = min(0.0090, max(0.0045, (em_pct * 0.70)))
+    elif dte_days <= 7:
+        side_cap_pct = min(0.0140, max(0.0060, (em_pct * 0.95)))
+    else:
+        side_cap_pct = min(0.0200, max(0.0085, (em_pct * 1.10)))
+    side_cap_abs = qqq_price * side_cap_pct
+
+    dist_decay = max(0.003, min(0.03, dist_cap_pct * 0.55))
+    min_separation = max(agg["strike_step"], qqq_price * 0.0012)
+
+    call_scored = score_strikes(c_strikes, c_gex, c_oi, c_vol, c_liq, qqq_price, dist_decay, "call")
+    put_scored = score_strikes(p_strikes, p_gex, p_oi, p_vol, p_liq, qqq_price, dist_decay, "put")
+
+    p_wall_strike = _pick_primary(call_scored, qqq_price, dist_cap_pct, prefer_above=True)
+    p_floor_strike = _pick_primary(put_scored, qqq_price, dist_cap_pct, prefer_above=False)
+    if p_wall_strike is None:
+        p_wall_strike = qqq_price * 1.01
+    if p_floor_strike is None:
+        p_floor_strike = qqq_price * 0.99
+
+    # Cap primary wall/floor distance from spot to avoid over-wide ranges.
+    upper_cap = qqq_price + side_cap_abs
+    lower_cap = qqq_price - side_cap_abs
+    if p_wall_strike > upper_cap:
+        capped = _first_ranked(
+            call_scored, (call_scored["strike"] > qqq_price) & (call_scored["strike"] <= upper_cap)
+        )
+        if capped is None:
+            capped = _closest_strike(strike[is_call], (qqq_price, upper_cap), above=True)
+        if capped is not None:
+            p_wall_strike = capped
+    if p_floor_strike < lower_cap:
+        capped = _first_ranked(
+            put_scored, (put_scored["strike"] < qqq_price) & (put_scored["strike"] >= lower_cap)
+        )
+        if capped is None:
+            capped = _closest_strike(strike[is_put], (qqq_price, lower_cap), above=False)
+        if capped is not None:
+            p_floor_strike = capped
+
+    # Anchor primaries to strongest directional gamma walls/floors near spot.
+    gamma_wall_strike = _pick_gamma_anchor(
+        c_strikes, c_gex, c_oi, c_vol, c_liq, call_scored, "call", qqq_price, upper_cap, lower_cap
+    )
+    gamma_floor_strike = _pick_gamma_anchor(
+        p_strikes, p_gex, p_oi, p_vol, p_liq, put_scored, "put", qqq_price, upper_cap, lower_cap
+    )
+    if gamma_wall_strike is not None:
+        p_wall_strike = float(gamma_wall_strike)
+    if gamma_floor_strike is not None:
+        p_floor_strike = float(gamma_floor_strike)
+
+    # Guardrail: keep floor below wall; if violated, force directional picks.
+    if p_floor_strike >= p_wall_strike:
+        alt_wall = _first_ranked(call_scored, call_scored["strike"] > qqq_price)
+        alt_floor = _first_ranked(put_scored, put_scored["strike"] < qqq_price)
+        if alt_wall is not None:
+            p_wall_strike = alt_wall
+        if alt_floor is not None:
+            p_floor_strike = alt_floor
+        if p_floor_strike >= p_wall_strike:
+            below = np.unique(strike[is_put][strike[is_put] < qqq_price])
+            above = np.unique(strike[is_call][strike[is_call] > qqq_price])
+            p_floor_strike = float(below[-1]) if len(below) else (qqq_price * 0.995)
+            p_wall_strike = float(above[0]) if len(above) else (qqq_price * 1.005)
+
+    # Keep primary wall/floor span inside an expected-move-consistent band.
+    # This avoids both over-compression and over-expansion.
+    if dte_days == 0:
+        base_span_nq = max(float(nq_em_full) * 0.75, float(nq_now) * 0.0042)
+        min_span_nq = max(base_span_nq * 0.72, float(nq_now) * 0.0038)
+        max_span_nq = min(base_span_nq * 1.28, float(nq_now) * 0.0082)
+    elif dte_days <= 7:
+        base_span_nq = max(float(nq_em_full) * 0.82, float(nq_now) * 0.0052)
+        min_span_nq = max(base_span_nq * 0.74, float(nq_now) * 0.0046)
+        max_span_nq = min(base_span_nq * 1.34, float(nq_now) * 0.0108)
+    else:
+        base_span_nq = max(float(nq_em_full) * 0.90, float(nq_now) * 0.0062)
+        min_span_nq = max(base_span_nq * 0.76, float(nq_now) * 0.0054)
+        max_span_nq = min(base_span_nq * 1.38, float(nq_now) * 0.0138)
+
+    max_span_nq = max(float(max_span_nq), float(min_span_nq) + (float(nq_now) * 0.0012))
+
+    min_span_strike = max(min_separation * 2.0, float(min_span_nq / max(1e-6, ratio)))
+    max_span_strike = max(min_span_strike + min_separation, float(max_span_nq / max(1e-6, ratio)))
+    current_span_strike = float(p_wall_strike - p_floor_strike)
+
+    if current_span_strike < min_span_strike:
+        target_half = min_span_strike * 0.5
+        widened_wall = _recenter_candidate(call_scored, p_wall_strike, float(qqq_price + target_half), "widen_up")
+        widened_floor = _recenter_candidate(put_scored, p_floor_strike, float(qqq_price - target_half), "widen_down")
+        if widened_floor < widened_wall:
+            p_wall_strike = float(widened_wall)
+            p_floor_strike = float(widened_floor)
+    elif current_span_strike > max_span_strike:
+        target_half = max_span_strike * 0.5
+        tightened_wall = _recenter_candidate(
+            call_scored, p_wall_strike, float(qqq_price + target_half), "tighten_down"
+        )
+        tightened_floor = _recenter_candidate(
+            put_scored, p_floor_strike, float(qqq_price - target_half), "tighten_up"
+        )
+        # Keep directional validity after tightening.
+        if tightened_wall <= qqq_price:
+            nearest = _nearest_directional(call_scored, qqq_price, above=True)
+            if nearest is not None:
+                tightened_wall = nearest
+        if tightened_floor >= qqq_price:
+            nearest = _nearest_directional(put_scored, qqq_price, above=False)
+            if nearest is not None:
+                tightened_floor = nearest
+        if tightened_floor < tightened_wall:
+            p_wall_strike = float(tightened_wall)
+            p_floor_strike = float(tightened_floor)
+
+    current_span_nq = float((p_wall_strike - p_floor_strike) * ratio)
+
+    s_wall_strike = _pick_secondary(call_scored, p_wall_strike, "up", dist_cap_pct, min_separation)
+    s_floor_strike = _pick_secondary(put_scored, p_floor_strike, "down", dist_cap_pct, min_separation)
+
+    if s_floor_strike >= s_wall_strike:
+        s_floor_strike = p_floor_strike * 0.995
+        s_wall_strike = p_wall_strike * 1.005
+
+    primary_wall_conf_sel = _score_for_strike(call_scored, p_wall_strike)
+    secondary_wall_conf_sel = _score_for_strike(call_scored, s_wall_strike)
+    primary_floor_conf_sel = _score_for_strike(put_scored, p_floor_strike)
+    secondary_floor_conf_sel = _score_for_strike(put_scored, s_floor_strike)
+    min_primary_gap = 4.0 if dte_days == 0 else 3.0
+    wall_structure_compressed = (primary_wall_conf_sel - secondary_wall_conf_sel) < min_primary_gap
+    floor_structure_compressed = (primary_floor_conf_sel - secondary_floor_conf_sel) < min_primary_gap
+
+    all_strikes = agg["all_groups"][0]
+    (strike_gex,) = _sum_by_strike(agg["all_groups"], gex)
+    strike_liq, strike_oi = agg["strike_liq"], agg["strike_oi"]
+    g_flip_strike = first_zero_crossing(all_strikes, strike_gex)
+
+    # Confidence scoring for actionable levels based on nearby liquidity, gamma strength, and strike-structure score.
+    struct_strikes = np.concatenate([call_scored["strike"], put_scored["strike"]])
+    struct_scores = np.concatenate([call_scored["confidence_score"], put_scored["confidence_score"]])
+    struct_keys, first_seen, codes = np.unique(struct_strikes, return_index=True, return_inverse=True)
+    struct_best = np.zeros(len(struct_keys))
+    np.maximum.at(struct_best, codes, struct_scores)
+    seen_order = np.argsort(first_seen)
+    struct_keys = struct_keys[seen_order]
+    struct_best = struct_best[seen_order]
+    max_structure_score = max(1.0, float(struct_best.max())) if len(struct_best) else 1.0
+
+    max_liq = max(1.0, float(strike_liq.max())) if len(strike_liq) else 1.0
+    max_oi = max(1.0, float(strike_oi.max())) if len(strike_oi) else 1.0
+    max_abs_gex = max(1.0, float(np.abs(strike_gex).max())) if len(strike_gex) else 1.0
+
+    def _level_confidence(strike_val):
+        i = _nearest(all_strikes, strike_val)
+        if i is None:
+            return {
+                "score": 0,
+                "label": "Low",
+                "components": {
+                    "liq_strength": 0.0,
+                    "gex_strength": 0.0,
+                    "oi_strength": 0.0,
+                    "structure_strength": 0.0,
+                },
+            }
+
+        gex_strength = abs(float(strike_gex[i])) / max_abs_gex
+        liq_strength = float(strike_liq[i]) / max_liq
+        oi_strength = float(strike_oi[i]) / max_oi
+        s_i = _nearest(struct_keys, strike_val)
+        structure_strength = 0.0 if s_i is None else float(struct_best[s_i]) / max_structure_score
+
+        score = int(
+            round(
+                100
+                * (
+                    (0.35 * liq_strength)
+                    + (0.25 * gex_strength)
+                    + (0.20 * oi_strength)
+                    + (0.20 * structure_strength)
+                )
+            )
+        )
+        score = max(0, min(100, score))
+        label = "High" if score >= 70 else "Medium" if score >= 45 else "Low"
+        return {
+            "score": score,
+            "label": label,
+            "components": {
+                "liq_strength": round(float(liq_strength), 4),
+                "gex_strength": round(float(gex_strength), 4),
+                "oi_strength": round(float(oi_strength), 4),
+                "structure_strength": round(float(structure_strength), 4),
+            },
+        }
+
+    level_confidence = {
+        "Delta Neutral": _level_confidence(dn_strike),
+        "Primary Wall": _level_confidence(p_wall_strike),
+        "Primary Floor": _level_confidence(p_floor_strike),
+        "Secondary Wall": _level_confidence(s_wall_strike),
+        "Secondary Floor": _level_confidence(s_floor_strike),
+        "Gamma Flip": _level_confidence(g_flip_strike),
+    }
+    level_confidence["Target Resistance"] = dict(level_confidence["Primary Wall"])
+    level_confidence["Target Support"] = dict(level_confidence["Primary Floor"])
+    level_confidence["Upper 0.50σ"] = {"score": 40, "label": "Low"}
+    level_confidence["Upper 0.25σ"] = {"score": 45, "label": "Medium"}
+    level_confidence["Lower 0.25σ"] = {"score": 45, "label": "Medium"}
+    level_confidence["Lower 0.50σ"] = {"score": 40, "label": "Low"}
+
+    # Blend in direct strike-selection confidence and enforce primary > secondary.
+    level_confidence["Primary Wall"]["score"] = int(
+        round((0.60 * level_confidence["Primary Wall"]["score"]) + (0.40 * primary_wall_conf_sel))
+    )
+    level_confidence["Secondary Wall"]["score"] = int(
+        round((0.60 * level_confidence["Secondary Wall"]["score"]) + (0.40 * secondary_wall_conf_sel))
+    )
+    level_confidence["Primary Floor"]["score"] = int(
+        round((0.60 * level_confidence["Primary Floor"]["score"]) + (0.40 * primary_floor_conf_sel))
+    )
+    level_confidence["Secondary Floor"]["score"] = int(
+        round((0.60 * level_confidence["Secondary Floor"]["score"]) + (0.40 * secondary_floor_conf_sel))
+    )
+
+    margin = int(max(3, round(min_primary_gap)))
+    if level_confidence["Primary Wall"]["score"] <= level_confidence["Secondary Wall"]["score"]:
+        level_confidence["Primary Wall"]["score"] = min(
+            100, level_confidence["Secondary Wall"]["score"] + margin
+        )
+    if level_confidence["Primary Floor"]["score"] <= level_confidence["Secondary Floor"]["score"]:
+        level_confidence["Primary Floor"]["score"] = min(
+            100, level_confidence["Secondary Floor"]["score"] + margin
+        )
+    if wall_structure_compressed:
+        level_confidence["Primary Wall"]["score"] = min(level_confidence["Primary Wall"]["score"], 68)
+        level_confidence["Secondary Wall"]["score"] = min(level_confidence["Secondary Wall"]["score"], 66)
+    if floor_structure_compressed:
+        level_confidence["Primary Floor"]["score"] = min(level_confidence["Primary Floor"]["score"], 68)
+        level_confidence["Secondary Floor"]["score"] = min(level_confidence["Secondary Floor"]["score"], 66)
+
+    for key in ["Primary Wall", "Secondary Wall", "Primary Floor", "Secondary Floor"]:
+        score_i = int(max(0, min(100, level_confidence[key]["score"])))
+        level_confidence[key]["score"] = score_i
+        level_confidence[key]["label"] = "High" if score_i >= 70 else "Medium" if score_i >= 45 else "Low"
+
+    # Freshness penalty so stale options chains cannot present high confidence.
+    conf_mult = float(options_health.get("confidence_multiplier", 1.0))
+    for key, val in level_confidence.items():
+        base_score = int(val.get("score", 0))
+        adj_score = int(round(base_score * conf_mult))
+        adj_score = max(0, min(100, adj_score))
+        if adj_score >= 70:
+            adj_label = "High"
+        elif adj_score >= 45:
+            adj_label = "Medium"
+        else:
+            adj_label = "Low"
+        val["score_base"] = base_score
+        val["score"] = adj_score
+        val["label"] = adj_label
+
+    results = [
+        ("Target Resistance", (p_wall_strike * ratio) + 35, 3.0, "🎯"),
+        ("Primary Wall", p_wall_strike * ratio, 5.0, "🔴"),
+        ("Primary Floor", p_floor_strike * ratio, 5.0, "🟢"),
+        ("Target Support", (p_floor_strike * ratio) - 35, 3.0, "🎯"),
+        ("Secondary Wall", s_wall_strike * ratio, 3.0, "🟠"),
+        ("Secondary Floor", s_floor_strike * ratio, 3.0, "🟡"),
+        ("Gamma Flip", g_flip_strike * ratio, 10.0, "⚡"),
+        ("Delta Neutral", dn_nq, 5.0, "⚖️"),
+        ("Upper 0.50σ", nq_now + nq_em_050, 5.0, "📊"),
+        ("Upper 0.25σ", nq_now + nq_em_025, 3.0, "📊"),
+        ("Lower 0.25σ", nq_now - nq_em_025, 3.0, "📊"),
+        ("Lower 0.50σ", nq_now - nq_em_050, 5.0, "📊"),
+    ]
+
+    return {
+        "df": df,
+        "dn_strike": dn_strike,
+        "dn_nq": dn_nq,
+        "g_flip_strike": g_flip_strike,
+        "g_flip_nq": g_flip_strike * ratio,
+        "net_delta": net_delta,
+        "p_wall": p_wall_strike * ratio,
+        "p_floor": p_floor_strike * ratio,
+        "s_wall": s_wall_strike * ratio,
+        "s_floor": s_floor_strike * ratio,
+        "calls": calls,
+        "puts": puts,
+        "strike_delta": strike_delta,
+        "results": results,
+        "level_confidence": level_confidence,
+        "data_meta": {
+            "options_source": options_health.get("source", "CBOE"),
+            "options_asof_utc": options_health.get("asof_utc"),
+            "options_latency_s": options_health.get("latency_s"),
+            "options_freshness": options_health.get("status", "unknown"),
+            "confidence_multiplier": conf_mult,
+            "wall_model": "zone_v4_gamma_structure_blend",
+            "strike_window_pct": round(float(strike_window_pct), 4),
+            "primary_side_cap_pct": round(float(side_cap_pct), 4),
+            "min_primary_span_nq": round(float(min_span_nq), 2),
+            "max_primary_span_nq": round(float(max_span_nq), 2),
+            "current_primary_span_nq": round(float(current_span_nq), 2),
+            "liq_quantile": float(liq_q),
+            "structure_compressed": bool(wall_structure_compressed or floor_structure_compressed),
+        },
+        "straddle": straddle,
+        "nq_em_full": nq_em_full,
+        "atm_strike": atm_strike,
+    }
+
+
+def expiration_books(df_raw, target_exps, today=None):
+    """`ExpirationBook` per target expiration from one scan of the chain (None where it has no live rows)."""
+    live = df_raw[
+        df_raw["expiration"].isin(target_exps) & (df_raw["open_interest"] > 0) & (df_raw["iv"] > 0)
+    ]
+    if live.empty:
+        return {exp: None for exp in target_exps}
+
+    # One scan of the chain: group row positions by expiration, extract engine arrays once.
+    positions_by_exp = live.groupby("expiration", sort=False).indices
+    columns = chain_columns(live)
+    today = today or datetime.now().date()
+
+    books = {}
+    for target_exp in target_exps:
+        positions = positions_by_exp.get(target_exp)
+        if positions is None or len(positions) == 0:
+            books[target_exp] = None
+            continue
+        try:
+            exp_date = target_exp.date() if hasattr(target_exp, "date") else target_exp
+            dte_days = max(0, int((exp_date - today).days))
+        except Exception:
+            dte_days = 0
+        books[target_exp] = ExpirationBook(
+            live.iloc[positions], dte_days, columns=slice_columns(columns, positions)
+        )
+    return books
+
+
+def levels_for_chain(snapshot, target_exps, qqq_price, ratio, nq_now, options_health):
+    """Uncached books + payloads for one chain snapshot; picklable entry point for worker processes."""
+    books = expiration_books(snapshot.df, target_exps)
+    return {
+        exp: compute_expiration_levels(book, qqq_price, ratio, nq_now, options_health)
+        for exp, book in books.items()
+    }
@@ -0,0 +1,137 @@
+"""Process-wide freshness metadata: latest record per key (O(1) reads), a short history ring, optional shared memory."""
+
+import json
+import struct
+import threading
+import time
+from collections import deque
+
+_HEADER = struct.Struct("<QQ")  # seqlock version (odd while writing), payload length
+
+
+class MetaStore:
+    """Source / as-of timestamp / lag per dataset or quote key, shared by every session in the process.
+
+    With `shm_name`, one writer process publishes its latest records into a shared-memory segment and
+    reader processes merge them in on read (newest timestamp wins), so a collector process and the
+    app agree on freshness.
+    """
+
+    def __init__(self, history=32, shm_name=None, shm_writer=False, shm_size=1 << 20):
+        self._latest = {}
+        self._history = {}
+        self._history_len = int(history)
+        self._lock = threading.Lock()
+        self._shm = None
+        self._shm_name = shm_name or None
+        self._shm_size = int(shm_size)
+        self._shm_writer = bool(shm_writer)
+        self._shm_version = 0
+        self._next_attach = 0.0
+        self._dirty = False
+        if self._shm_name:
+            self._shm = _attach_shm(self._shm_name, self._shm_size, create=self._shm_writer)
+
+    def record(self, key, source, timestamp_ms=None, **extra):
+        now_ms = int(time.time() * 1000)
+        timestamp_ms = int(timestamp_ms if timestamp_ms is not None else now_ms)
+        row = {
+            "source": source,
+            "timestamp_ms": timestamp_ms,
+            "recorded_ms": now_ms,
+            "lag_ms": max(0, now_ms - timestamp_ms),
+            **extra,
+        }
+        with self._lock:
+            self._latest[key] = row
+            ring = self._history.get(key)
+            if ring is None:
+                ring = self._history[key] = deque(maxlen=self._history_len)
+            ring.append(row)
+            self._dirty = True
+        if self._shm is not None and self._shm_writer:
+            self._publish()
+        return row
+
+    def get(self, key):
+        if self._shm_name and not self._shm_writer:
+            self._sync()
+        return self._latest.get(key)
+
+    def history(self, key):
+        with self._lock:
+            return list(self._history.get(key, ()))
+
+    def snapshot(self, prefix=""):
+        if self._shm_name and not self._shm_writer:
+            self._sync()
+        with self._lock:
+            return {k: dict(v) for k, v in self._latest.items() if k.startswith(prefix)}
+
+    def merge(self, rows):
+        """Fold in records written elsewhere (shared memory, collector snapshots); newest timestamp wins."""
+        with self._lock:
+            for key, row in rows.items():
+                mine = self._latest.get(key)
+                if mine is None or row.get("timestamp_ms", 0) > mine.get("timestamp_ms", 0):
+                    self._latest[key] = row
+
+    def _publish(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(self._latest, separators=(",", ":")).encode()
+            self._dirty = False
+            buf = self._shm.buf
+            if _HEADER.size + len(payload) > len(buf):
+                return
+            version = _HEADER.unpack_from(buf, 0)[0] + 1
+            _HEADER.pack_into(buf, 0, version, 0)
+            buf[_HEADER.size : _HEADER.size + len(payload)] = payload
+            _HEADER.pack_into(buf, 0, version + 1, len(payload))
+
+    def _sync(self):
+        if self._shm is None:
+            # Writer may start after us; retry the attach now and then rather than on every read.
+            now = time.time()
+            if now < self._next_attach:
+                return
+            self._next_attach = now + 5.0
+            self._shm = _attach_shm(self._shm_name, self._shm_size, create=False)
+            if self._shm is None:
+                return
+        buf = self._shm.buf
+        for _ in range(8):
+            version, length = _HEADER.unpack_from(buf, 0)
+            if version == self._shm_version:
+                return
+            if version % 2:
+                time.sleep(0.0005)
+                continue
+            payload = bytes(buf[_HEADER.size : _HEADER.size + length])
+            if _HEADER.unpack_from(buf, 0)[0] != version:
+                continue
+            try:
+                shared = json.loads(payload) if length else {}
+            except ValueError:
+                return
+            self.merge(shared)
+            self._shm_version = version
+            return
+
+
+def _attach_shm(name, size, create):
+    from multiprocessing import resource_tracker, shared_memory
+
+    try:
+        if create:
+            try:
+                return shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                return shared_memory.SharedMemory(name=name)
+        shm = shared_memory.SharedMemory(name=name)
+        # Readers must not unlink the writer's segment when they exit.
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+    except Exception:
+        return None
@@ -0,0 +1,142 @@
+"""Per-provider health: latency percentiles, error rate, and a circuit breaker that fails fast while a provider is down."""
+
+import threading
+import time
+from collections import deque
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling a provider whose circuit is open; fallback chains treat it like any fetch error."""
+
+
+# failures: consecutive failures that open the circuit. open_s doubles on every re-trip, up to max_open_s.
+BREAKER_DEFAULTS = {"failures": 3, "open_s": 15.0, "max_open_s": 300.0}
+
+
+class ProviderHealth:
+    """Closed -> open after `failures` consecutive failures -> half-open once `open_s` passes (one probe call).
+    A failed probe re-opens with twice the wait; a successful one closes and resets the wait.
+
+    `allow()` returns "probe" for the half-open probe; pass it back as `record(..., probe=True)`. Results of
+    calls let through before the circuit opened only feed the stats, so they cannot end the probe early.
+    """
+
+    def __init__(self, name, failures=3, open_s=15.0, max_open_s=300.0, window=200):
+        self.name = name
+        self.failures = int(failures)
+        self.base_open_s = float(open_s)
+        self.max_open_s = float(max_open_s)
+        self.open_s = self.base_open_s
+        self.state = "closed"
+        self.opened_until = 0.0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.requests = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() >= self.opened_until:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return "probe"
+            self.rejected += 1
+            return False
+
+    def record(self, elapsed_s, ok, probe=False):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(elapsed_s)
+            self._outcomes.append(ok)
+            if not ok:
+                self.errors += 1
+            if probe:
+                self._probing = False
+                if ok:
+                    self.state = "closed"
+                    self.open_s = self.base_open_s
+                    self.consecutive_failures = 0
+                else:
+                    self.open_s = min(self.max_open_s, self.open_s * 2)
+                    self._trip()
+                return
+            if self.state != "closed":
+                return
+            if ok:
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failures:
+                self._trip()
+
+    def _trip(self):
+        self.state = "open"
+        self.opened_until = time.monotonic() + self.open_s
+        self.trips += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            outcomes = list(self._outcomes)
+            open_for = max(0.0, self.opened_until - time.monotonic()) if self.state == "open" else 0.0
+            row = {
+                "provider": self.name,
+                "state": self.state,
+                "requests": self.requests,
+                "error_rate": (outcomes.count(False) / len(outcomes)) if outcomes else None,
+                "p50_ms": None,
+                "p95_ms": None,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "retry_in_s": round(open_for, 1),
+            }
+        if latencies:
+            row["p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+            row["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+        return row
+
+
+_LOCK = threading.Lock()
+_HEALTH = {}
+
+
+def provider_health(name, **overrides):
+    with _LOCK:
+        health = _HEALTH.get(name)
+        if health is None:
+            health = _HEALTH[name] = ProviderHealth(name, **{**BREAKER_DEFAULTS, **overrides})
+        return health
+
+
+def guarded_call(name, fn, *args, **kwargs):
+    """Run `fn` under the provider's breaker (for clients that don't go through http_pool, e.g. yfinance)."""
+    health = provider_health(name)
+    admitted = health.allow()
+    if not admitted:
+        raise CircuitOpenError(f"{name} circuit open")
+    probe = admitted == "probe"
+    started = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException:
+        # BaseException too: a Streamlit rerun/stop mid-probe must still hand the probe slot back.
+        health.record(time.perf_counter() - started, False, probe=probe)
+        raise
+    health.record(time.perf_counter() - started, True, probe=probe)
+    return result
+
+
+def get_provider_health():
+    with _LOCK:
+        health = list(_HEALTH.values())
+    return sorted((h.snapshot() for h in health), key=lambda row: row["provider"])
@@ -0,0 +1,80 @@
+"""Background reference-price table: slow, independent prints used to sanity-check realtime quotes in O(1)."""
+
+import statistics
+import threading
+import time
+from collections import deque
+
+
+class ReferenceTable:
+    """Refreshes every registered symbol via `fetch_fn(symbol) -> price | None` on its own thread.
+
+    Lookups never fetch except the first one for a symbol, which seeds it synchronously so a cold process still
+    checks its first quote. Prints older than `max_age_s` are ignored.
+    """
+
+    def __init__(self, fetch_fn, refresh_s=15.0, max_age_s=60.0, history=5):
+        self.fetch_fn = fetch_fn
+        self.refresh_s = float(refresh_s)
+        self.max_age_s = float(max_age_s)
+        self.history = int(history)
+        self._prints = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.fetches = 0
+        self.failures = 0
+        self.lookups = 0
+
+    def _fetch(self, symbol):
+        self.fetches += 1
+        try:
+            price = self.fetch_fn(symbol)
+        except Exception:
+            price = None
+        if not price:
+            self.failures += 1
+            return
+        with self._lock:
+            self._prints[symbol].append((time.time(), float(price)))
+
+    def _run(self):
+        # Wait first: the lookup that started this thread has just seeded its symbol itself.
+        while True:
+            self._wake.wait(self.refresh_s)
+            self._wake.clear()
+            with self._lock:
+                symbols = list(self._prints)
+            for symbol in symbols:
+                self._fetch(symbol)
+
+    def _ensure(self, symbol):
+        with self._lock:
+            if symbol in self._prints:
+                return False
+            self._prints[symbol] = deque(maxlen=self.history)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="reference-prices", daemon=True)
+                self._thread.start()
+        return True
+
+    def get(self, symbol, mode="last"):
+        """(price, age_s) from fresh prints: the latest one, or their median with mode="median". None if stale."""
+        self.lookups += 1
+        if self._ensure(symbol):
+            self._fetch(symbol)
+        cutoff = time.time() - self.max_age_s
+        with self._lock:
+            prints = [(ts, px) for ts, px in self._prints.get(symbol, ()) if ts >= cutoff]
+        if not prints:
+            return None
+        age_s = time.time() - prints[-1][0]
+        if mode == "median":
+            return statistics.median(px for _, px in prints), age_s
+        return prints[-1][1], age_s
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            ages = {symbol: round(now - prints[-1][0], 1) for symbol, prints in self._prints.items() if prints}
+        return {"symbols": ages, "fetches": self.fetches, "failures": self.failures, "lookups": self.lookups}
@@ -0,0 +1,50 @@
+"""Coarser OHLCV bars derived from a 1m base series, memoized per (symbol, interval, window)."""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# Minute intervals whose bins line up with Yahoo's clock-aligned bars (hourly bars are session-aligned, so they
+# are still downloaded as-is).
+RESAMPLE_RULES = {"2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min"}
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def resample_ohlcv(bars, interval):
+    """Left-labelled OHLCV bins; bins without a base bar are dropped, as Yahoo omits them."""
+    if bars is None or bars.empty:
+        return pd.DataFrame(columns=list(OHLCV_AGG))
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in bars.columns}
+    out = bars.resample(RESAMPLE_RULES[interval], label="left", closed="left").agg(agg)
+    return out.dropna(subset=["Open"])
+
+
+class ResampleMemo:
+    """Last resampled frame per key, reused while the base series is unchanged. The store only ever appends or
+    restates its last bar, so length, end points and the last row identify a base."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = int(max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key, base, interval):
+        signature = None
+        if not base.empty:
+            signature = (len(base), base.index[0], base.index[-1], tuple(base.iloc[-1].tolist()))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.stats["hits"] += 1
+            return entry[1].copy()
+        self.stats["misses"] += 1
+        frame = resample_ohlcv(base, interval)
+        with self._lock:
+            self._entries[key] = (signature, frame)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return frame.copy()
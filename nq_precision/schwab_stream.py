@@ -0,0 +1,220 @@
+"""Schwab streamer (websocket) LEVELONE quotes held in an in-memory last-tick table.
+
+One background thread per process keeps the subscription alive (login, subscribe, reconnect with backoff);
+readers only touch `QuoteTable`, so a rerun never waits on the socket.
+"""
+
+import asyncio
+import bisect
+import json
+import threading
+import time
+from collections import deque
+
+try:
+    from websockets.asyncio.client import connect as ws_connect
+except ImportError:  # optional: streaming is skipped and the HTTP quote path is used
+    ws_connect = None
+
+
+# Field ids per service (Schwab streamer LEVELONE docs); only what the app reads.
+LEVELONE_FIELDS = {
+    "LEVELONE_EQUITIES": {"1": "bid", "2": "ask", "3": "last", "33": "mark", "34": "quote_time_ms", "35": "trade_time_ms"},
+    "LEVELONE_FUTURES": {"1": "bid", "2": "ask", "3": "last", "10": "quote_time_ms", "11": "trade_time_ms"},
+}
+SUBSCRIBE_FIELDS = {service: ",".join(["0", *fields]) for service, fields in LEVELONE_FIELDS.items()}
+
+
+class QuoteTable:
+    """Last tick per symbol plus a short (timestamp, price) ring, so two symbols can be read as of one instant."""
+
+    def __init__(self, history=512):
+        self._rows = {}
+        self._ticks = {}
+        self._history = int(history)
+        self._lock = threading.Lock()
+        self.last_message_ms = None
+        self.updates = 0
+
+    def update(self, service, symbol, fields, recv_ms=None):
+        recv_ms = int(recv_ms if recv_ms is not None else time.time() * 1000)
+        names = LEVELONE_FIELDS.get(service, {})
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                row = self._rows[symbol] = {"symbol": symbol, "service": service}
+            for field_id, value in fields.items():
+                name = names.get(field_id)
+                if name is not None and value is not None:
+                    row[name] = value
+            row["recv_ms"] = recv_ms
+            price = row.get("last") or row.get("mark")
+            ts = row.get("trade_time_ms") or row.get("quote_time_ms") or recv_ms
+            if price:
+                ring = self._ticks.get(symbol)
+                if ring is None:
+                    ring = self._ticks[symbol] = deque(maxlen=self._history)
+                if not ring or ts >= ring[-1][0]:
+                    ring.append((int(ts), float(price)))
+            self.last_message_ms = recv_ms
+            self.updates += 1
+
+    def get(self, symbol):
+        row = self._rows.get(symbol)
+        return dict(row) if row is not None else None
+
+    def symbols(self):
+        with self._lock:
+            return list(self._rows)
+
+    def price_at(self, symbol, ts_ms):
+        """(tick_ts, price) of the latest tick at or before `ts_ms`, or None."""
+        with self._lock:
+            ring = list(self._ticks.get(symbol, ()))
+        if not ring:
+            return None
+        i = bisect.bisect_right([t for t, _ in ring], ts_ms)
+        return ring[i - 1] if i else None
+
+    def synced(self, symbol_a, symbol_b):
+        """Both symbols as of the later of their last ticks' common instant: (asof_ms, tick_a, tick_b, skew_ms)."""
+        with self._lock:
+            ring_a = self._ticks.get(symbol_a)
+            ring_b = self._ticks.get(symbol_b)
+            if not ring_a or not ring_b:
+                return None
+            asof = min(ring_a[-1][0], ring_b[-1][0])
+        tick_a = self.price_at(symbol_a, asof)
+        tick_b = self.price_at(symbol_b, asof)
+        if tick_a is None or tick_b is None:
+            return None
+        return asof, tick_a, tick_b, abs(tick_a[0] - tick_b[0])
+
+
+def login_request(info, token):
+    return {
+        "requests": [
+            {
+                "service": "ADMIN",
+                "requestid": "0",
+                "command": "LOGIN",
+                "SchwabClientCustomerId": info.get("schwabClientCustomerId", ""),
+                "SchwabClientCorrelId": info.get("schwabClientCorrelId", ""),
+                "parameters": {
+                    "Authorization": token,
+                    "SchwabClientChannel": info.get("schwabClientChannel", ""),
+                    "SchwabClientFunctionId": info.get("schwabClientFunctionId", ""),
+                },
+            }
+        ]
+    }
+
+
+def subs_request(info, subscriptions):
+    return {
+        "requests": [
+            {
+                "service": service,
+                "requestid": str(i + 1),
+                "command": "SUBS",
+                "SchwabClientCustomerId": info.get("schwabClientCustomerId", ""),
+                "SchwabClientCorrelId": info.get("schwabClientCorrelId", ""),
+                "parameters": {"keys": ",".join(keys), "fields": SUBSCRIBE_FIELDS[service]},
+            }
+            for i, (service, keys) in enumerate(subscriptions.items())
+            if keys
+        ]
+    }
+
+
+def apply_message(table, message, recv_ms=None):
+    """Fold one streamer frame into the table; returns the ADMIN/SUBS response codes it carried."""
+    codes = []
+    for item in message.get("data", []) or []:
+        service = item.get("service")
+        if service not in LEVELONE_FIELDS:
+            continue
+        for content in item.get("content", []) or []:
+            symbol = content.get("key")
+            if symbol:
+                table.update(service, symbol, content, recv_ms=recv_ms)
+    for item in message.get("response", []) or []:
+        codes.append((item.get("service"), item.get("command"), (item.get("content") or {}).get("code")))
+    if message.get("notify"):
+        table.last_message_ms = int(recv_ms if recv_ms is not None else time.time() * 1000)
+    return codes
+
+
+class SchwabStreamer:
+    """Background websocket subscription feeding a `QuoteTable`.
+
+    `info_fn()` returns the streamer info dict (streamerSocketUrl and client ids) and `token_fn()` an
+    access token; both are called on every (re)connect so token refreshes are picked up.
+    """
+
+    def __init__(self, info_fn, token_fn, subscriptions, table=None, stale_after_s=30.0):
+        self.info_fn = info_fn
+        self.token_fn = token_fn
+        self.subscriptions = {service: list(keys) for service, keys in subscriptions.items()}
+        self.table = table or QuoteTable()
+        self.stale_after_s = float(stale_after_s)
+        self.connected = False
+        self.connects = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def live(self):
+        last = self.table.last_message_ms
+        return self.connected and last is not None and (time.time() * 1000 - last) <= self.stale_after_s * 1000
+
+    def start(self):
+        if ws_connect is None:
+            self.last_error = "websockets not installed"
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="schwab-stream", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        asyncio.run(self._loop())
+
+    async def _loop(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                await self._session()
+                backoff = 1.0
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            self.connected = False
+            if self._stop.wait(backoff):
+                return
+            backoff = min(30.0, backoff * 2)
+
+    async def _session(self):
+        info, token = self.info_fn(), self.token_fn()
+        if not info or not token or not info.get("streamerSocketUrl"):
+            raise RuntimeError("streamer info or token unavailable")
+        async with ws_connect(info["streamerSocketUrl"], open_timeout=10, max_size=None) as ws:
+            await ws.send(json.dumps(login_request(info, token)))
+            codes = apply_message(self.table, json.loads(await asyncio.wait_for(ws.recv(), 10)))
+            if not any(svc == "ADMIN" and cmd == "LOGIN" and code == 0 for svc, cmd, code in codes):
+                raise RuntimeError(f"login rejected: {codes}")
+            await ws.send(json.dumps(subs_request(info, self.subscriptions)))
+            self.connected = True
+            self.connects += 1
+            while not self._stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), 1.0)
+                except asyncio.TimeoutError:
+                    continue
+                apply_message(self.table, json.loads(raw))
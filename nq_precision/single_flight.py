@@ -0,0 +1,77 @@
+"""Keyed single-flight: concurrent calls with the same key share one upstream fetch."""
+
+import functools
+import pickle
+import threading
+from concurrent.futures import Future
+
+
+_GROUPS = []
+_GROUPS_LOCK = threading.Lock()
+
+
+class SingleFlight:
+    """The first caller for a key runs the call; callers arriving while it runs wait on its future.
+
+    Waiters get a copy of the result (pickled, like st.cache_data), so no two sessions share a mutable
+    object. Nothing is kept once the call finishes; caching stays with the layers above.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"issued": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats["issued"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            result = future.result()
+            try:
+                return pickle.loads(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+            except Exception:
+                return result
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+def single_flight(key_fn=None):
+    """Decorator: coalesce concurrent calls per `key_fn(fn, args, kwargs)` (default: the call's args)."""
+
+    def decorate(fn):
+        group = SingleFlight(fn.__name__)
+        with _GROUPS_LOCK:
+            _GROUPS.append(group)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_fn(fn, args, kwargs) if key_fn is not None else (args, tuple(sorted(kwargs.items())))
+            return group.do(key, fn, *args, **kwargs)
+
+        wrapper.single_flight = group
+        return wrapper
+
+    return decorate
+
+
+def get_single_flight_stats():
+    with _GROUPS_LOCK:
+        groups = list(_GROUPS)
+    return {group.name: dict(group.stats) for group in groups}
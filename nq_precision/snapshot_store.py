@@ -0,0 +1,76 @@
+"""SQLite snapshot store: the collector process writes pickled dataset snapshots, the app only reads them."""
+
+import pickle
+import sqlite3
+import threading
+import time
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    asof_ms INTEGER NOT NULL,
+    max_age_ms INTEGER NOT NULL,
+    elapsed_ms REAL,
+    payload BLOB NOT NULL
+)
+"""
+
+
+class SnapshotStore:
+    """One row per dataset key (latest snapshot wins). WAL mode, so readers never block the writer."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def put(self, key, value, max_age_s, elapsed_s=None, asof_ms=None):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        asof_ms = int(asof_ms if asof_ms is not None else time.time() * 1000)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO snapshots (key, asof_ms, max_age_ms, elapsed_ms, payload) VALUES (?, ?, ?, ?, ?)",
+            (key, asof_ms, int(max_age_s * 1000), None if elapsed_s is None else elapsed_s * 1000, payload),
+        )
+        return asof_ms
+
+    def asof(self, key):
+        row = self._conn().execute("SELECT asof_ms FROM snapshots WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, key, fresh_only=True):
+        """(value, asof_ms), or None when missing or older than the max age the writer gave it."""
+        row = self._conn().execute(
+            "SELECT asof_ms, max_age_ms, payload FROM snapshots WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        asof_ms, max_age_ms, payload = row
+        if fresh_only and time.time() * 1000 - asof_ms > max_age_ms:
+            return None
+        return pickle.loads(payload), asof_ms
+
+    def status(self):
+        now_ms = time.time() * 1000
+        rows = self._conn().execute(
+            "SELECT key, asof_ms, max_age_ms, elapsed_ms, length(payload) FROM snapshots ORDER BY key"
+        ).fetchall()
+        return [
+            {
+                "key": key,
+                "age_s": round((now_ms - asof_ms) / 1000, 1),
+                "fresh": now_ms - asof_ms <= max_age_ms,
+                "fetch_ms": None if elapsed_ms is None else round(elapsed_ms, 1),
+                "bytes": size,
+            }
+            for key, asof_ms, max_age_ms, elapsed_ms, size in rows
+        ]
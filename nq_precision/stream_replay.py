@@ -0,0 +1,177 @@
+"""Local stand-in for the Schwab streamer: accepts LOGIN/SUBS and pushes LEVELONE frames.
+
+Frames come from a JSONL recording (one streamer message per line, time fields restamped to now) or from a
+synthetic correlated random walk. Point the app at it with SCHWAB_STREAMER_URL = "ws://127.0.0.1:8765".
+
+    python -m nq_precision.stream_replay --port 8765 [--file frames.jsonl] [--interval 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+from websockets.asyncio.server import serve
+
+from nq_precision.schwab_stream import LEVELONE_FIELDS
+
+
+SYNTHETIC_BASES = {
+    "NQ": 21000.0, "ES": 6000.0, "YM": 44000.0, "RTY": 2300.0, "DX": 100.0, "GC": 2600.0, "CL": 70.0, "QQQ": 510.0,
+}
+_TIME_FIELDS = {"LEVELONE_FUTURES": ("10", "11"), "LEVELONE_EQUITIES": ("34", "35")}
+
+
+def _base_price(key):
+    root = key.lstrip("/")
+    for name, price in SYNTHETIC_BASES.items():
+        if root.startswith(name):
+            return price
+    return 100.0
+
+
+def _response(request, msg):
+    return {
+        "response": [
+            {
+                "service": request.get("service"),
+                "command": request.get("command"),
+                "requestid": request.get("requestid"),
+                "timestamp": int(time.time() * 1000),
+                "content": {"code": 0, "msg": msg},
+            }
+        ]
+    }
+
+
+def synthetic_frames(subscriptions, seed=7):
+    """Endless LEVELONE frames; one shared shock keeps cross-asset ratios (e.g. NQ/QQQ) steady."""
+    rng = random.Random(seed)
+    prices = {key: _base_price(key) for keys in subscriptions.values() for key in keys}
+    while True:
+        shock = rng.gauss(0, 0.0002)
+        now_ms = int(time.time() * 1000)
+        data = []
+        for service, keys in subscriptions.items():
+            content = []
+            for key in keys:
+                px = prices[key] = prices[key] * (1 + shock + rng.gauss(0, 0.00002))
+                tick = 0.25 if service == "LEVELONE_FUTURES" else 0.01
+                last = round(px / tick) * tick
+                quote_field, trade_field = _TIME_FIELDS[service]
+                content.append(
+                    {"key": key, "1": last - tick, "2": last + tick, "3": last, quote_field: now_ms, trade_field: now_ms}
+                )
+            if content:
+                data.append({"service": service, "timestamp": now_ms, "command": "SUBS", "content": content})
+        yield {"data": data}
+
+
+def recorded_frames(path):
+    """Frames from a JSONL recording, looped, with quote/trade times moved to now so staleness checks pass."""
+    with open(path) as fh:
+        frames = [json.loads(line) for line in fh if line.strip()]
+    while frames:
+        for frame in frames:
+            now_ms = int(time.time() * 1000)
+            for item in frame.get("data", []):
+                for content in item.get("content", []):
+                    for field in _TIME_FIELDS.get(item.get("service"), ()):
+                        if field in content:
+                            content[field] = now_ms
+            yield frame
+
+
+class ReplayServer:
+    """Runs the stand-in on its own thread; `url` is what SCHWAB_STREAMER_URL should point at."""
+
+    def __init__(self, host="127.0.0.1", port=0, path=None, interval_s=0.05, heartbeat_s=10.0):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval_s = float(interval_s)
+        self.heartbeat_s = float(heartbeat_s)
+        self.logins = 0
+        self.frames_sent = 0
+        self._ready = threading.Event()
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, ws):
+        subscriptions = {}
+        pusher = None
+        try:
+            async for raw in ws:
+                for request in json.loads(raw).get("requests", []):
+                    command = request.get("command")
+                    if command == "LOGIN":
+                        self.logins += 1
+                        await ws.send(json.dumps(_response(request, "server=replay;status=PN")))
+                    elif command in ("SUBS", "ADD") and request.get("service") in LEVELONE_FIELDS:
+                        keys = [k for k in request.get("parameters", {}).get("keys", "").split(",") if k]
+                        subscriptions.setdefault(request["service"], [])
+                        subscriptions[request["service"]] = list(dict.fromkeys(subscriptions[request["service"]] + keys))
+                        await ws.send(json.dumps(_response(request, f"{command} command succeeded")))
+                        if pusher is not None:
+                            pusher.cancel()
+                        pusher = asyncio.create_task(self._push(ws, dict(subscriptions)))
+        finally:
+            if pusher is not None:
+                pusher.cancel()
+
+    async def _push(self, ws, subscriptions):
+        frames = recorded_frames(self.path) if self.path else synthetic_frames(subscriptions)
+        last_heartbeat = time.monotonic()
+        for frame in frames:
+            await ws.send(json.dumps(frame))
+            self.frames_sent += 1
+            if time.monotonic() - last_heartbeat >= self.heartbeat_s:
+                await ws.send(json.dumps({"notify": [{"heartbeat": str(int(time.time() * 1000))}]}))
+                last_heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval_s)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        async with serve(self._handler, self.host, self.port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stopped.wait()
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="stream-replay", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Schwab streamer stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--file", default=None, help="JSONL recording of streamer frames (default: synthetic).")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between frames.")
+    opts = parser.parse_args(argv)
+    server = ReplayServer(opts.host, opts.port, path=opts.file, interval_s=opts.interval).start()
+    print(f"streamer stand-in on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Stale-while-revalidate cache for data getters: serve the last good value, refresh it in the background."""
+
+import functools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="swr")
+_CACHES = []
+_CACHES_LOCK = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ("blob", "fetched_at", "usable")
+
+    def __init__(self, blob, fetched_at, usable=True):
+        self.blob = blob
+        self.fetched_at = fetched_at
+        self.usable = usable
+
+
+class SWRCache:
+    """Process-wide cache behind `swr_cache`. Shared by every session; one refresh per key at a time."""
+
+    def __init__(self, fn, ttl, max_stale, max_entries, on_refresh, usable=None):
+        self.fn = fn
+        self.name = fn.__name__
+        self.ttl = float(ttl)
+        self.max_stale = float(max_stale)
+        self.max_entries = int(max_entries)
+        self.on_refresh = on_refresh
+        self.usable = usable
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "waits": 0, "refreshes": 0, "errors": 0, "kept": 0}
+
+    def _key(self, args, kwargs):
+        try:
+            return pickle.dumps((args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return repr((args, sorted(kwargs.items())))
+
+    def _store(self, key, value):
+        usable = self.usable is None or bool(self.usable(value))
+        entry = _Entry(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time(), usable)
+        with self._lock:
+            previous = self._entries.get(key)
+            # A failed refresh never replaces a good value; the good one is served until it runs out at max_stale.
+            if not usable and previous is not None and previous.usable:
+                if time.time() - previous.fetched_at < self.max_stale:
+                    self.stats["kept"] += 1
+                    return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _compute(self, key, args, kwargs, future, mode):
+        started = time.perf_counter()
+        try:
+            value = self.fn(*args, **kwargs)
+            entry = self._store(key, value)
+            self.stats["refreshes"] += 1
+            future.set_result(entry)
+        except BaseException as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        if self.on_refresh is not None and future.exception() is None and future.result().usable:
+            try:
+                self.on_refresh(self.name, mode, time.perf_counter() - started, self.max_stale)
+            except Exception:
+                pass
+
+    def _claim(self, key):
+        # Returns (future, is_owner): the owner runs the fetch; everyone else shares its future.
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _refresh_in_background(self, key, args, kwargs):
+        future, owner = self._claim(key)
+        if not owner:
+            return
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def _run():
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            self._compute(key, args, kwargs, future, "background")
+
+        try:
+            _REFRESH_POOL.submit(_run)
+        except Exception:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get(self, args, kwargs):
+        key = self._key(args, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+        age = time.time() - entry.fetched_at if entry is not None else None
+
+        if entry is not None and age < self.ttl:
+            self.stats["fresh"] += 1
+        elif entry is not None and age < self.max_stale:
+            self.stats["stale"] += 1
+            self._refresh_in_background(key, args, kwargs)
+        else:
+            self.stats["miss"] += 1
+            future, owner = self._claim(key)
+            if owner:
+                self._compute(key, args, kwargs, future, "inline")
+            else:
+                self.stats["waits"] += 1
+            entry = future.result()
+        return pickle.loads(entry.blob)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def swr_cache(ttl, max_stale=None, max_entries=64, on_refresh=None, usable=None):
+    """Serve cached values for `ttl` seconds, then serve stale (up to `max_stale`) while one background
+    refresh runs. Past `max_stale`, or on a miss, callers block on a single shared fetch.
+
+    Hits return copies (values are stored pickled, like st.cache_data). `usable(value)` tells a getter's
+    failure value (None, an empty frame, ...) from data: a failed refresh keeps the previous good value.
+    `on_refresh(name, mode, elapsed_s, max_stale)` runs after each fetch that returned usable data.
+    """
+
+    def decorate(fn):
+        cache = SWRCache(
+            fn, ttl, max_stale if max_stale is not None else 4 * ttl, max_entries, on_refresh, usable=usable
+        )
+        with _CACHES_LOCK:
+            _CACHES.append(cache)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cache.get(args, kwargs)
+
+        wrapper.cache = cache
+        wrapper.clear = cache.clear
+        wrapper.usable = usable
+        return wrapper
+
+    return decorate
+
+
+def clear_swr_caches():
+    with _CACHES_LOCK:
+        caches = list(_CACHES)
+    for cache in caches:
+        cache.clear()
+
+
+def get_swr_stats():
+    with _CACHES_LOCK:
+        caches = list(_CACHES)
+    return {cache.name: dict(cache.stats) for cache in caches}
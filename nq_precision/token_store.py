@@ -0,0 +1,141 @@
+"""Process-wide OAuth access-token store: single-flight refresh, early renewal, optional file backing."""
+
+import json
+import os
+import threading
+import time
+
+
+class TokenStore:
+    """One access token shared by every session and worker in the process (and, with `path`, across processes).
+
+    `refresh_fn()` returns `(token, expires_in_s)` or None. Only one caller runs it at a time; callers
+    that arrive during a refresh wait for it and reuse its result. Inside `renew_before_s` of expiry the
+    token is renewed by the first caller while the rest keep using the still-valid one.
+    """
+
+    def __init__(self, refresh_fn, path=None, renew_before_s=300.0, min_valid_s=30.0, retry_after_s=15.0):
+        self._refresh_fn = refresh_fn
+        self.path = path or None
+        self.renew_before_s = float(renew_before_s)
+        self.min_valid_s = float(min_valid_s)
+        self.retry_after_s = float(retry_after_s)
+        self._retry_at = 0.0
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "refreshes": 0,
+            "failures": 0,
+            "coalesced": 0,
+            "invalidations": 0,
+            "file_loads": 0,
+            "refresh_s": 0.0,
+            "last_refresh_ms": None,
+            "last_refresh_at": None,
+        }
+
+    def _valid_for(self, now):
+        return self._expires_at - now if self._token else 0.0
+
+    def _load_file(self, now):
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            token, expires_at = saved.get("access_token"), float(saved.get("expires_at", 0))
+        except Exception:
+            return
+        if token and expires_at > self._expires_at and expires_at - now > self.min_valid_s:
+            self._token, self._expires_at = token, expires_at
+            self._stats["file_loads"] += 1
+
+    def _save_file(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"access_token": self._token, "expires_at": self._expires_at}, f)
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def _refresh_locked(self):
+        started = time.perf_counter()
+        try:
+            result = self._refresh_fn()
+        except Exception:
+            result = None
+        elapsed = time.perf_counter() - started
+        self._stats["refresh_s"] += elapsed
+        self._stats["last_refresh_ms"] = round(elapsed * 1000, 1)
+        if not result or not result[0]:
+            self._stats["failures"] += 1
+            # Back off so a bad credential or a rate limit isn't retried on every rerun.
+            self._retry_at = time.time() + self.retry_after_s
+            return False
+        token, expires_in = result
+        self._token, self._expires_at = token, time.time() + float(expires_in)
+        self._stats["refreshes"] += 1
+        self._stats["last_refresh_at"] = time.time()
+        self._save_file()
+        return True
+
+    def get(self, force_refresh=False, rejected=None):
+        """Current token, refreshing if needed. `rejected` is the token a 401 came back for."""
+        now = time.time()
+        token = self._token
+        if rejected is not None and token != rejected:
+            # Another caller already replaced the token this 401 was about.
+            force_refresh = False
+        if not force_refresh:
+            valid_for = self._valid_for(now)
+            if valid_for > self.renew_before_s:
+                return token
+            if valid_for > self.min_valid_s:
+                # Early renewal: whoever gets the lock renews, everyone else keeps the valid token.
+                if not self._lock.acquire(blocking=False):
+                    return token
+                try:
+                    if self._token == token:
+                        self._load_file(time.time())
+                        if self._valid_for(time.time()) <= self.renew_before_s:
+                            self._refresh_locked()
+                    return self._token
+                finally:
+                    self._lock.release()
+
+        generation = token
+        with self._lock:
+            if self._token != generation and self._valid_for(time.time()) > self.min_valid_s:
+                self._stats["coalesced"] += 1
+                return self._token
+            if force_refresh:
+                self._stats["invalidations"] += 1
+                self._token, self._expires_at = None, 0.0
+            else:
+                self._load_file(time.time())
+                if self._valid_for(time.time()) > self.renew_before_s:
+                    return self._token
+                if time.time() < self._retry_at:
+                    return self._token if self._valid_for(time.time()) > self.min_valid_s else None
+            if self._refresh_locked():
+                return self._token
+            # Refresh failed: a token that is still valid beats none.
+            return self._token if self._valid_for(time.time()) > self.min_valid_s else None
+
+    def stats(self):
+        # Lock-free read: the health strip must not stall behind an in-flight refresh.
+        row = dict(self._stats)
+        valid_for = self._valid_for(time.time())
+        done = row["refreshes"] + row["failures"]
+        row["avg_refresh_ms"] = round(row["refresh_s"] / done * 1000, 1) if done else None
+        row["expires_in_s"] = int(valid_for) if valid_for > 0 else 0
+        row["file_backed"] = bool(self.path)
+        return row
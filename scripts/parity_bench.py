@@ -0,0 +1,343 @@
+"""Parity and timing checks for the vectorized hot paths against the per-row code they replaced.
+
+    python scripts/parity_bench.py              # every check
+    python scripts/parity_bench.py occ levels   # a subset, by name
+    python scripts/parity_bench.py --baseline <git-rev>
+
+The repo has no test suite; run this after touching any of the functions below. Inputs are synthetic and seeded,
+so no network access is needed. Reference implementations still in the tree's history are loaded from the
+`--baseline` revision (default: the root commit) and called unwrapped, so st.cache_data never answers for them.
+"""
+
+import argparse
+import inspect
+import logging
+import math
+import os
+import pickle
+import re
+import subprocess
+import sys
+import time
+import types
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+logging.disable(logging.WARNING)
+
+from nq_precision import full_data as fd  # noqa: E402
+from nq_precision.chain_snapshot import ChainSnapshot  # noqa: E402
+from nq_precision.level_engine import expiration_books  # noqa: E402
+
+
+BASELINE_REV = None
+_BASELINE = None
+
+
+def baseline():
+    """full_data.py as of BASELINE_REV, imported as a standalone module."""
+    global _BASELINE
+    if _BASELINE is None:
+        def git(*args):
+            return subprocess.run(["git", "-C", REPO, *args], check=True, capture_output=True, text=True).stdout
+
+        rev = BASELINE_REV or git("rev-list", "--max-parents=0", "HEAD").split()[0]
+        name = f"{rev}:nq_precision/full_data.py"
+        module = types.ModuleType("baseline_full_data")
+        module.__file__ = name
+        exec(compile(git("show", name), name, "exec"), module.__dict__)
+        _BASELINE = module
+    return _BASELINE
+
+
+def assert_close(old, new, rtol, path="payload"):
+    """Recursive equality for level payloads: frames and floats within rtol, everything else exact."""
+    if isinstance(old, pd.DataFrame):
+        assert list(old.columns) == list(new.columns), (path, list(old.columns), list(new.columns))
+        pd.testing.assert_index_equal(old.index, new.index, exact=False, obj=f"{path}.index")
+        for col in old.columns:
+            a, b = old[col], new[col]
+            if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+                a, b = a.to_numpy(dtype=float), b.to_numpy(dtype=float)
+                # Tolerance scaled to the column: sums that cancel to near zero keep only absolute precision.
+                scale = np.nanmax(np.abs(a)) if np.isfinite(a).any() else 0.0
+                np.testing.assert_allclose(b, a, rtol=rtol, atol=rtol * scale, err_msg=f"{path}.{col}")
+            else:
+                pd.testing.assert_series_equal(a, b, check_dtype=False, obj=f"{path}.{col}")
+    elif isinstance(old, dict):
+        assert old.keys() == new.keys(), (path, sorted(old), sorted(new))
+        for key in old:
+            assert_close(old[key], new[key], rtol, f"{path}.{key}")
+    elif isinstance(old, (list, tuple)):
+        assert len(old) == len(new), (path, len(old), len(new))
+        for i, (a, b) in enumerate(zip(old, new)):
+            assert_close(a, b, rtol, f"{path}[{i}]")
+    elif isinstance(old, (float, np.floating)) and not isinstance(new, str):
+        assert math.isclose(old, new, rel_tol=rtol, abs_tol=1e-9) or (math.isnan(old) and math.isnan(new)), (
+            path,
+            old,
+            new,
+        )
+    else:
+        assert old == new, (path, old, new)
+
+
+def synthetic_chain(seed=0, spot=500.0, expirations=30, strikes=200, ticker="QQQ"):
+    """CBOE-shaped chain rows (OCC symbols + greeks), plus one malformed symbol."""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    rows = []
+    for e in range(expirations):
+        exp = today + timedelta(days=e if e < 10 else 7 * (e - 8))
+        for k in range(strikes):
+            if e > 5:
+                strike = round(spot * 0.7 + k * (spot * 0.6 / strikes), 0)
+            else:
+                strike = spot - strikes / 4 + k * 0.5
+            for cp in "CP":
+                m = (spot - strike) / spot
+                delta = 1 / (1 + np.exp(-m * 20)) if cp == "C" else -1 / (1 + np.exp(m * 20))
+                bid = max(0.0, rng.normal(2, 1))
+                rows.append(
+                    {
+                        "option": f"{ticker}{exp:%y%m%d}{cp}{int(round(strike * 1000)):08d}",
+                        "bid": bid,
+                        "ask": bid + abs(rng.normal(0.1, 0.05)),
+                        "iv": abs(rng.normal(0.2, 0.05)) if rng.random() > 0.05 else 0.0,
+                        "open_interest": float(rng.integers(0, 5000)) if rng.random() > 0.1 else 0.0,
+                        "volume": float(rng.integers(0, 3000)),
+                        "delta": delta,
+                        "gamma": abs(rng.normal(0.02, 0.01)),
+                        "theta": -0.1,
+                        "vega": 0.2,
+                        "rho": 0.01,
+                        "last_trade_price": bid,
+                    }
+                )
+    rows.append({"option": "BADSYMBOL", "bid": 0.0, "ask": 0.0, "open_interest": 0.0, "volume": 0.0, "delta": 0.0})
+    return pd.DataFrame(rows)
+
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+# --- OCC symbol parsing (_fetch_cboe_options_raw) ---
+
+_OCC_ROW_PATTERN = re.compile(r"^(.+)(\d{6})([PC])(\d+)$")
+
+
+def _parse_occ_row(row):
+    match = _OCC_ROW_PATTERN.search(row["option"])
+    if match:
+        option_type = "call" if match.group(3) == "C" else "put"
+        strike = int(match.group(4)) / 1000
+        exp_date = datetime.strptime("20" + match.group(2), "%Y%m%d")
+        return pd.Series({"strike": strike, "type": option_type, "expiration": exp_date})
+    return pd.Series({"strike": 0, "type": "unknown", "expiration": None})
+
+
+def check_occ(seeds):
+    cases = 0
+    old_s = new_s = 0.0
+    for seed in range(seeds):
+        raw = synthetic_chain(seed, strikes=40 if seed % 2 else 200)
+        old, t_old = _timed(raw.apply, _parse_occ_row, axis=1)
+        new, t_new = _timed(fd._parse_occ_symbols, raw["option"])
+        old_s += t_old
+        new_s += t_new
+        valid = old["type"] != "unknown"
+        assert (valid == (new["type"] != "unknown")).all()
+        pd.testing.assert_frame_equal(
+            old[valid].astype({"strike": float, "expiration": "datetime64[ns]"}), new[valid], check_dtype=False
+        )
+        assert (new.loc[~valid, "strike"] == 0).all() and new.loc[~valid, "expiration"].isna().all()
+        cases += len(raw)
+    return cases, old_s, new_s
+
+
+# --- Level engine (process_expiration) ---
+
+# Snapshots keep chain columns as float32 (the compact schema), so engine outputs match the float64 baseline
+# to about 1e-6 relative, not bit for bit.
+LEVELS_RTOL = 1e-5
+
+
+def parsed_chain(seed, spot, strikes=200):
+    raw = synthetic_chain(seed, spot=spot, strikes=strikes)
+    df = pd.concat([raw, fd._parse_occ_symbols(raw["option"])], axis=1)
+    return df[df["type"] != "unknown"].copy()
+
+
+def check_levels(seeds):
+    old_fn = inspect.unwrap(baseline().process_expiration)
+    cases = 0
+    old_s = new_s = 0.0
+    for seed in range(seeds):
+        for spot in (500.0, 487.3):
+            df = parsed_chain(seed, spot, strikes=200 if seed % 2 else 14)
+            # The cached snapshot round-trips through pickle, which is where the compact schema applies.
+            snapshot = pickle.loads(pickle.dumps(ChainSnapshot(df, spot, "CBOE")))
+            for exp in sorted(df["expiration"].unique())[:12]:
+                for ratio in (41.3, 40.0):
+                    qqq, nq = spot * 1.001, spot * ratio
+                    old, t_old = _timed(old_fn, df, exp, qqq, ratio, nq)
+                    new, t_new = _timed(
+                        lambda: fd._levels_for_books(expiration_books(snapshot.df, [exp]), qqq, ratio, nq)[exp]
+                    )
+                    old_s += t_old
+                    new_s += t_new
+                    if old is None:
+                        assert new is None, exp
+                        continue
+                    assert_close(old, new, LEVELS_RTOL)
+                    cases += 1
+    return cases, old_s, new_s
+
+
+# --- Delta-neutral strike (calculate_delta_neutral) ---
+
+
+def check_delta_neutral(seeds):
+    old_fn = baseline().calculate_delta_neutral
+    cases = 0
+    old_s = new_s = 0.0
+    for seed in range(seeds):
+        chain = parsed_chain(seed, 500.0)
+        # Feed quirks the sign normalization has to handle: missing deltas and puts quoted as positive magnitudes.
+        rng = np.random.default_rng(seed)
+        chain.loc[chain.sample(frac=0.1, random_state=seed).index, "delta"] = np.nan
+        flip = chain["type"].eq("put").to_numpy() & (rng.random(len(chain)) < 0.3)
+        chain.loc[flip, "delta"] = chain.loc[flip, "delta"].abs()
+        frames = [chain[chain["expiration"] == exp] for exp in sorted(chain["expiration"].unique())[:10]]
+        for df in frames + [chain]:
+            for spot in (480.0, 500.0, 515.0):
+                old, t_old = _timed(old_fn, df, spot)
+                new, t_new = _timed(fd.calculate_delta_neutral, df, spot)
+                old_s += t_old
+                new_s += t_new
+                assert math.isclose(old[0], new[0], rel_tol=1e-9), (old[0], new[0])
+                pd.testing.assert_frame_equal(old[1].reset_index(drop=True), new[1], check_exact=False, rtol=1e-9)
+                pd.testing.assert_frame_equal(old[2], new[2])
+                cases += 1
+    return cases, old_s, new_s
+
+
+# --- Initial-balance backtest (get_initial_balance_backtest) ---
+
+
+def synthetic_minute_bars(seed, days_back=130):
+    """Futures-like 1m bars (UTC index, as yfinance returns them): weekdays, a daily 17:00 ET halt, missing bars,
+    NaN volume, one session without volume (mean-close VWAP) and one that never leaves its IB (no break)."""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.now(tz="America/New_York").normalize()
+    idx = pd.date_range(today - pd.Timedelta(days=days_back), today, freq="1min")
+    idx = idx[(idx.dayofweek < 5) & (idx.hour != 17)]
+    idx = idx[rng.random(len(idx)) > 0.01]
+    px = 21000 + np.cumsum(rng.normal(0, 2, len(idx)))
+    volume = rng.integers(0, 500, len(idx)).astype(float)
+    volume[rng.random(len(idx)) < 0.05] = np.nan
+    bars = pd.DataFrame(
+        {
+            "Open": px + rng.normal(0, 0.5, len(idx)),
+            "High": px + rng.random(len(idx)) * 3,
+            "Low": px - rng.random(len(idx)) * 3,
+            "Close": px + rng.normal(0, 0.5, len(idx)),
+            "Volume": volume,
+        },
+        index=idx,
+    )
+    days = sorted(set(idx.date))
+    bars.loc[idx.date == days[len(days) // 2], "Volume"] = 0.0
+    flat_day = days[-5]
+    minutes = idx.hour * 60 + idx.minute
+    in_ib = (idx.date == flat_day) & (minutes >= 9 * 60 + 30) & (minutes < 10 * 60 + 30)
+    after = (idx.date == flat_day) & (minutes >= 10 * 60 + 29)
+    level = bars.loc[in_ib, "Close"].mean()
+    bars.loc[after, ["Open", "Close"]] = level
+    bars.loc[after, "High"] = level + 0.01
+    bars.loc[after, "Low"] = level - 0.01
+    bars.index = bars.index.tz_convert("UTC")
+    return bars
+
+
+def check_ib_backtest(seeds):
+    base = baseline()
+    old_fn = inspect.unwrap(base.get_initial_balance_backtest)
+    new_fn = inspect.unwrap(fd.get_initial_balance_backtest)
+    bars = None
+
+    class _Ticker:
+        def __init__(self, symbol):
+            pass
+
+        def history(self, **kwargs):
+            return bars.copy()
+
+    # Same bars and calendar for both sides; the new code reads through get_bars (the bar store), the old one
+    # straight from yfinance.
+    high_impact = lambda key, days=3: pd.DataFrame(  # noqa: E731
+        {
+            "impact": ["High", "High", "High", "low"],
+            "date_et": [(date.today() - timedelta(days=d)).isoformat() for d in (8, 9, 10, 11)],
+        }
+    )
+    base.yf = types.SimpleNamespace(Ticker=_Ticker)
+    base.get_economic_calendar_window = high_impact
+    saved = fd.get_bars, fd.get_economic_calendar_window
+    fd.get_bars = lambda symbol, interval="5m", days=5: fd._to_et_index(bars.copy())
+    fd.get_economic_calendar_window = high_impact
+    cases = 0
+    old_s = new_s = 0.0
+    try:
+        for seed in range(seeds):
+            bars = synthetic_minute_bars(seed)
+            for ib_start, ib_end in (("09:30", "10:30"), ("09:45", "10:15"), ("09:00", "09:35")):
+                kwargs = {"days": 90, "ib_start": ib_start, "ib_end": ib_end, "finnhub_key": "key"}
+                old, t_old = _timed(old_fn, **kwargs)
+                new, t_new = _timed(new_fn, **kwargs)
+                old_s += t_old
+                new_s += t_new
+                pd.testing.assert_frame_equal(old["sessions"], new["sessions"], check_exact=False, rtol=1e-9)
+                assert_close(old["summary"], new["summary"], 1e-9, "summary")
+                cases += len(new["sessions"])
+    finally:
+        fd.get_bars, fd.get_economic_calendar_window = saved
+    return cases, old_s, new_s
+
+
+CHECKS = {
+    "occ": check_occ,
+    "levels": check_levels,
+    "delta_neutral": check_delta_neutral,
+    "ib_backtest": check_ib_backtest,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("checks", nargs="*", help=f"checks to run (default: all of {', '.join(CHECKS)})")
+    parser.add_argument("--seeds", type=int, default=4, help="synthetic inputs per check")
+    parser.add_argument("--baseline", help="git revision holding the reference implementations (default: root)")
+    args = parser.parse_args(argv)
+    global BASELINE_REV
+    BASELINE_REV = args.baseline
+    unknown = sorted(set(args.checks) - set(CHECKS))
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(unknown)}")
+    for name in args.checks or CHECKS:
+        cases, old_s, new_s = CHECKS[name](args.seeds)
+        print(
+            f"{name:14s} parity ok over {cases} cases   "
+            f"old {old_s * 1000:9.1f} ms   new {new_s * 1000:8.1f} ms   ({old_s / max(new_s, 1e-9):.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()